@@ -5,18 +5,21 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 if not SECRET_KEY:
     raise ValueError("SECRET_KEY environment variable is not set")
 ALGORITHM = "HS256"
-def create_token(email: str):
+def create_token(email: str, user_id: int = None):
     try:
         payload = {
             "sub": email,
             "exp": datetime.utcnow() + timedelta(hours=2)
         }
+        if user_id is not None:
+            payload["uid"] = user_id
         return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
     except Exception as e:
         raise Exception(f"Token creation failed: {str(e)}")
-def decode_token(token: str) -> str:
+def decode_token_claims(token: str) -> dict:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except Exception as e:
         raise Exception(f"Invalid token: {str(e)}")
+def decode_token(token: str) -> str:
+    return decode_token_claims(token).get("sub")
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from dotenv import load_dotenv
@@ -23,4 +25,70 @@ else:
     raise ValueError("DATABASE_URL environment variable is not set")
 
 
+def _async_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the asyncio one (asyncpg, or aiosqlite for SQLite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        query = dict(parsed.query)
+        # asyncpg calls libpq's `sslmode` simply `ssl`.
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
+# The async engine serves the async routes (search, history, quiz, auth), whose
+# DB waits then no longer occupy threadpool slots next to blocking LLM calls.
+# Sync code (admin routes, background writers, maintenance commands) keeps
+# using `engine`. Set ASYNC_DATABASE_URL to override the derived URL.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=300
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+
+# Optional read-only replica for the admin analytics (see utils/read_replica.py),
+# with a pool of its own so long reports never hold connections that the
+# search and history writes need.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+if READ_DATABASE_URL:
+    # A replica that stops answering must fail fast, not hang for the TCP
+    # timeout, so reads can fall back to the primary.
+    read_connect_args = {}
+    if make_url(READ_DATABASE_URL).get_backend_name() == "postgresql":
+        read_connect_args["connect_timeout"] = int(os.getenv("READ_CONNECT_TIMEOUT", "3"))
+    read_engine = create_engine(
+        READ_DATABASE_URL,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_size=int(os.getenv("READ_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("READ_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.getenv("READ_POOL_TIMEOUT", "5")),
+        connect_args=read_connect_args
+    )
+    ReadSessionLocal = sessionmaker(bind=read_engine)
+else:
+    read_engine = None
+    ReadSessionLocal = None
+
+
 Base = declarative_base()
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,111 @@
+"""Shared FastAPI dependencies for resolving the authenticated user.
+
+Tokens carry the user id (`uid` claim), and principals, including the role
+that `require_admin` checks, are resolved through a short-TTL in-process
+cache, so hot endpoints normally run no user query at all. The role is never
+taken from the token, so a demotion applies without waiting for tokens to
+expire. Anything that changes a user's profile or role must call
+`invalidate_principal`.
+"""
+import os
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .auth import decode_token_claims
+from .database import get_async_db
+from .models import User
+from .utils.cache import TTLCache
+
+
+class Principal:
+    """Snapshot of the authenticated user; not attached to any session."""
+    __slots__ = ("id", "email", "username", "role", "first_name", "last_name", "language")
+
+    def __init__(self, id, email=None, username=None, role=None, first_name=None, last_name=None, language=None):
+        self.id = id
+        self.email = email
+        self.username = username
+        self.role = role
+        self.first_name = first_name
+        self.last_name = last_name
+        self.language = language
+
+    @classmethod
+    def from_user(cls, user: User):
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            role=user.role,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            language=user.language,
+        )
+
+
+_principals = TTLCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+)
+
+
+def invalidate_principal(user_id: int):
+    _principals.delete(user_id)
+
+
+def _bearer_claims(authorization: Optional[str]):
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    try:
+        return decode_token_claims(authorization.split(" ", 1)[1])
+    except Exception:
+        return None
+
+
+async def resolve_principal(claims: dict, db: AsyncSession) -> Optional[Principal]:
+    user_id = claims.get("uid")
+    if user_id is not None:
+        principal = _principals.get(user_id)
+        if principal is not None:
+            return principal
+        user = await db.scalar(select(User).where(User.id == user_id))
+    else:
+        # Tokens issued before the uid claim existed only carry the email/username.
+        sub = claims.get("sub")
+        if not sub:
+            return None
+        user = await db.scalar(select(User).where(or_(User.email == sub, User.username == sub)).limit(1))
+
+    if not user:
+        return None
+    principal = Principal.from_user(user)
+    _principals.set(user.id, principal)
+    return principal
+
+
+async def get_current_user_optional(authorization: Optional[str] = Header(default=None), db: AsyncSession = Depends(get_async_db)) -> Optional[Principal]:
+    claims = _bearer_claims(authorization)
+    if not claims:
+        return None
+    return await resolve_principal(claims, db)
+
+
+async def get_current_user(authorization: Optional[str] = Header(default=None), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(401, "Missing or invalid authorization header")
+    claims = _bearer_claims(authorization)
+    if not claims:
+        raise HTTPException(401, "Invalid token")
+    principal = await resolve_principal(claims, db)
+    if not principal:
+        raise HTTPException(401, "Invalid token or user not found")
+    return principal
+
+
+async def require_admin(user: Principal = Depends(get_current_user)) -> Principal:
+    if user.role != "admin":
+        raise HTTPException(403, "Not authorized as admin")
+    return user
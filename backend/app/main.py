@@ -1,14 +1,21 @@
+import asyncio
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from .database import Base, engine
 from .routes import auth_routes, search_routes, admin
+from .utils.history_writer import history_writer
+from .utils.time_accumulator import time_accumulator
+from .utils.warmup import warmup
+from .utils.trends import trends
 
 
 load_dotenv()
 
 
-Base.metadata.create_all(engine)
 app = FastAPI(title="ConceptClarity API")
 
 
@@ -22,9 +29,51 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Next-Page"],
 )
 
 
 app.include_router(auth_routes.router)
 app.include_router(search_routes.router)
 app.include_router(admin.router)
+
+
+@app.on_event("startup")
+def create_schema_if_requested():
+    # Creating the schema is an explicit step (`python -m app.manage migrate`),
+    # so a cold start needs no database round trip. AUTO_MIGRATE=1 brings back
+    # create-on-start for local development.
+    if os.getenv("AUTO_MIGRATE") == "1":
+        Base.metadata.create_all(engine)
+
+
+_warmup_task = None
+
+
+@app.on_event("startup")
+async def start_warmup():
+    # Runs in the background so the process starts serving /health at once;
+    # /ready reports when the warmup is done.
+    global _warmup_task
+    _warmup_task = asyncio.create_task(warmup.run())
+
+
+@app.get("/health")
+async def health():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 503 until the startup warmup has finished."""
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up", "warmup": warmup.stats()})
+    return {"status": "ready", "warmup": warmup.stats()}
+
+
+@app.on_event("shutdown")
+def drain_write_buffers():
+    history_writer.stop()
+    time_accumulator.stop()
+    trends.stop()
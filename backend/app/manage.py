@@ -0,0 +1,156 @@
+"""Maintenance commands.
+
+Run from the backend directory, e.g.:
+
+    python -m app.manage migrate
+    python -m app.manage backfill-normalized-queries
+    python -m app.manage backfill-core-keys
+    python -m app.manage backfill-rollups
+    python -m app.manage reconcile-user-stats
+    python -m app.manage build-glossary --input science-extract.jsonl
+"""
+import argparse
+import os
+
+from .database import Base, SessionLocal, engine
+from .models import ExplanationAlias, SearchHistory
+from .utils.glossary import build_glossary
+from .utils.query_normalizer import normalize_query
+from .utils.rollups import rollup_job
+from .utils.user_stats import reconcile
+
+
+def migrate():
+    """Create missing tables and their indexes.
+
+    Existing tables are not altered; column changes to a live database are
+    applied with the SQL files in db/migrations.
+    """
+    Base.metadata.create_all(engine)
+    print(f"[INFO] Schema up to date ({len(Base.metadata.tables)} tables)")
+
+
+def backfill_normalized_queries(batch_size: int = 1000):
+    """Fill `search_history.normalized_query` for rows written before the column existed."""
+    db = SessionLocal()
+    updated = 0
+    try:
+        last_id = 0
+        while True:
+            rows = (
+                db.query(SearchHistory.id, SearchHistory.query)
+                .filter(SearchHistory.normalized_query.is_(None), SearchHistory.id > last_id)
+                .order_by(SearchHistory.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            mappings = []
+            for row_id, query in rows:
+                if query.startswith("[Image] "):
+                    query = query[len("[Image] "):]
+                mappings.append({"id": row_id, "normalized_query": normalize_query(query)})
+            db.bulk_update_mappings(SearchHistory, mappings)
+            db.commit()
+            updated += len(mappings)
+            last_id = rows[-1][0]
+    finally:
+        db.close()
+    print(f"[INFO] Backfilled normalized_query on {updated} search_history rows")
+
+
+def backfill_core_keys(batch_size: int = 1000):
+    """Fill `search_history.core_key` for rows written before the column existed."""
+    db = SessionLocal()
+    updated = 0
+    try:
+        last_id = 0
+        while True:
+            rows = (
+                db.query(SearchHistory.id, SearchHistory.normalized_query)
+                .filter(SearchHistory.core_key.is_(None), SearchHistory.id > last_id)
+                .order_by(SearchHistory.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            query_keys = {query_key for _, query_key in rows if query_key}
+            aliases = dict(
+                db.query(ExplanationAlias.query_key, ExplanationAlias.core_key)
+                .filter(ExplanationAlias.query_key.in_(query_keys))
+                .all()
+            ) if query_keys else {}
+            mappings = [
+                {"id": row_id, "core_key": aliases.get(query_key, query_key)}
+                for row_id, query_key in rows
+                if query_key
+            ]
+            if mappings:
+                db.bulk_update_mappings(SearchHistory, mappings)
+                db.commit()
+            updated += len(mappings)
+            last_id = rows[-1][0]
+    finally:
+        db.close()
+    print(f"[INFO] Backfilled core_key on {updated} search_history rows")
+
+
+def backfill_rollups(chunk_days: int = 30):
+    """Build the daily analytics rollups for all history up to yesterday."""
+    days = rollup_job.backfill(chunk_days)
+    print(f"[INFO] Rolled up {days} days of search and quiz history")
+
+
+def reconcile_user_stats():
+    """Rebuild the per-user totals in user_stats from search_history and quiz_results."""
+    db = SessionLocal()
+    try:
+        rows = reconcile(db)
+    finally:
+        db.close()
+    print(f"[INFO] Rebuilt user_stats for {rows} users")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.manage")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("migrate", help="Create missing tables and indexes (run once per deploy)")
+
+    backfill = subparsers.add_parser("backfill-normalized-queries", help="Compute normalized_query for existing history rows")
+    backfill.add_argument("--batch-size", type=int, default=1000)
+
+    core_keys = subparsers.add_parser("backfill-core-keys", help="Record the resolved core term on existing history rows")
+    core_keys.add_argument("--batch-size", type=int, default=1000)
+
+    rollups = subparsers.add_parser("backfill-rollups", help="Build the daily analytics rollups from existing history")
+    rollups.add_argument("--chunk-days", type=int, default=30, help="Days rebuilt per transaction")
+
+    subparsers.add_parser("reconcile-user-stats", help="Rebuild the per-user totals from history and quiz results")
+
+    glossary = subparsers.add_parser("build-glossary", help="Build the offline glossary from a local Wikipedia dump or extract")
+    glossary.add_argument("--input", required=True, help="MediaWiki XML dump (.xml/.xml.bz2) or JSON-lines extract")
+    glossary.add_argument("--output", default=None, help="Defaults to GLOSSARY_PATH or data/glossary.bin")
+    glossary.add_argument("--max-summary-chars", type=int, default=600)
+
+    args = parser.parse_args(argv)
+    if args.command == "migrate":
+        migrate()
+    elif args.command == "backfill-normalized-queries":
+        backfill_normalized_queries(args.batch_size)
+    elif args.command == "backfill-core-keys":
+        backfill_core_keys(args.batch_size)
+    elif args.command == "backfill-rollups":
+        backfill_rollups(args.chunk_days)
+    elif args.command == "reconcile-user-stats":
+        reconcile_user_stats()
+    elif args.command == "build-glossary":
+        output = args.output or os.getenv("GLOSSARY_PATH")
+        count = build_glossary(args.input, output, args.max_summary_chars)
+        print(f"[INFO] Wrote {count} glossary entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Date, DateTime, Boolean, UniqueConstraint, Index, func, literal_column
 from .database import Base
 from datetime import datetime
 
@@ -30,11 +30,14 @@ class SearchHistory(Base):
     __tablename__ = "search_history"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, index=True)
+    user_id = Column(Integer)  # indexed together with created_at, see below
     query = Column(String, nullable=False)
+    normalized_query = Column(String(255), index=True, nullable=True)
+    # Normalized English core term the search resolved to (same key as Explanation.core_key).
+    core_key = Column(String(255), index=True, nullable=True)
     result = Column(Text, nullable=False)
     feedback = Column(Integer, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     search_level = Column(String(20), nullable=True)
     search_language = Column(String(10), default="en")
     search_source = Column(String(20), default="text")
@@ -61,3 +64,122 @@ class QuizResult(Base):
     topic = Column(String(255), nullable=True)
     time_taken = Column(Integer, default=0) # New field in seconds
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Fraction of questions answered correctly (0 for an empty quiz). The leaderboard
+# indexes are built on this exact expression, so queries must sort and filter on
+# it rather than spelling out their own division. Literals are inlined because a
+# bound parameter would not match the indexed expression.
+quiz_score_ratio = func.coalesce(
+    QuizResult.score * literal_column("1.0") / func.nullif(QuizResult.total_questions, literal_column("0")),
+    literal_column("0"),
+)
+
+# Access-path indexes (see db/migrations/2026-10-19_add_access_path_indexes.sql).
+Index("ix_search_history_user_id_created_at", SearchHistory.user_id, SearchHistory.created_at.desc())
+Index("ix_search_history_query_lower_trim", func.lower(func.trim(SearchHistory.query)))
+Index("ix_search_history_language_created_at", func.lower(SearchHistory.search_language), SearchHistory.created_at)
+Index(
+    "ix_quiz_results_difficulty_ratio",
+    QuizResult.difficulty, quiz_score_ratio.desc(), QuizResult.total_questions.desc(), QuizResult.created_at.desc(),
+)
+Index(
+    "ix_quiz_results_ratio",
+    quiz_score_ratio.desc(), QuizResult.total_questions.desc(), QuizResult.created_at.desc(),
+)
+
+
+class Explanation(Base):
+    """A generated explanation, stored once per English core term and language."""
+    __tablename__ = "explanations"
+    __table_args__ = (UniqueConstraint("core_key", "language", name="uq_explanations_core_key_language"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    core_key = Column(String(255), nullable=False, index=True)
+    language = Column(String(20), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON of the explanation dict
+    source = Column(String(20), default="generated")  # generated | translated
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ExplanationAlias(Base):
+    """Maps a normalized user query (any script) to the core term it resolved to."""
+    __tablename__ = "explanation_aliases"
+
+    query_key = Column(String(255), primary_key=True)
+    core_key = Column(String(255), nullable=False, index=True)
+    is_corrected = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SearchDailyRollup(Base):
+    """Searches per UTC day, user role, language, level and source (see utils/rollups.py)."""
+    __tablename__ = "search_daily_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False, index=True)
+    role = Column(String(30), nullable=True)
+    language = Column(String(20), nullable=True)  # lower(search_language)
+    level = Column(String(20), nullable=True)
+    source = Column(String(20), nullable=True)
+    searches = Column(Integer, nullable=False, default=0)
+    video_views = Column(Integer, nullable=False, default=0)
+
+
+class QuizDailyRollup(Base):
+    """Quiz attempts, time and score sums per UTC day, user role and difficulty (see utils/rollups.py)."""
+    __tablename__ = "quiz_daily_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False, index=True)
+    role = Column(String(30), nullable=True)
+    difficulty = Column(String(20), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    time_taken = Column(BigInteger, nullable=False, default=0)
+    score_sum = Column(BigInteger, nullable=False, default=0)
+    question_sum = Column(BigInteger, nullable=False, default=0)
+
+
+class RollupState(Base):
+    """How far the daily rollups are complete: every day before `covered_until`."""
+    __tablename__ = "rollup_state"
+
+    name = Column(String(50), primary_key=True)
+    covered_until = Column(Date, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class RollupDirtyDay(Base):
+    """A rolled-up day whose history changed afterwards; rebuilt on the next rollup run (see utils/rollups.py)."""
+    __tablename__ = "rollup_dirty_days"
+
+    day = Column(Date, primary_key=True)
+    marked_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SketchSnapshot(Base):
+    """Latest copy of one process's trend sketch for an hour or day (see utils/trends.py)."""
+    __tablename__ = "sketch_snapshots"
+    __table_args__ = (UniqueConstraint("source", "kind", "bucket", "key", name="uq_sketch_snapshots_bucket"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String(100), nullable=False)  # host:pid of the process that wrote it
+    kind = Column(String(20), nullable=False)  # terms | users
+    bucket = Column(String(20), nullable=False, index=True)  # UTC hour (terms) or day (users)
+    key = Column(String(30), nullable=False)  # language (terms) or role (users)
+    payload = Column(Text, nullable=False)  # JSON of the sketch
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class UserStats(Base):
+    """Running per-user totals, updated in the same transaction as the rows they count (see utils/user_stats.py)."""
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, primary_key=True)
+    searches = Column(Integer, nullable=False, default=0)
+    videos_watched = Column(Integer, nullable=False, default=0)
+    quiz_attempts = Column(Integer, nullable=False, default=0)
+    quiz_score_sum = Column(BigInteger, nullable=False, default=0)
+    quiz_question_sum = Column(BigInteger, nullable=False, default=0)
+    quiz_time = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
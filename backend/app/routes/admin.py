@@ -1,54 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
+from datetime import datetime, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-import difflib
+from sqlalchemy import func, or_, select
 from ..database import SessionLocal
-from ..models import User, SearchHistory, AppReview, QuizResult
+from ..models import User, SearchHistory, AppReview, UserStats
 from ..schemas import UserLogin
-from ..security import verify_password
-from ..auth import create_token, decode_token
+from ..security import PasswordHasherBusy, hasher_stats, verify_password_async
+from ..auth import create_token
+from ..dependencies import Principal, require_admin
+from ..utils.fast_llm_service import llm_service
+from ..utils.history_writer import history_writer
+from ..utils.time_accumulator import time_accumulator
+from ..utils.warmup import warmup
+from ..utils.leaderboard import leaderboard
+from ..utils.admin_stats import StatsFilter, compute_stats
+from ..utils.dashboard_cache import dashboard_cache, etag_matches
+from ..utils.rollups import rollup_job
+from ..utils.trends import trends
+from ..utils.export_jobs import ExportUnavailable, export_jobs
+from ..utils.read_replica import get_read_db, read_replica, read_session
+from ..utils.exports import COLUMNS as EXPORT_COLUMNS, ROWS as EXPORT_ROWS, SECTIONS as EXPORT_SECTIONS, ExportFilter, csv_chunks, gzip_chunks, ndjson_chunks
 
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-@router.post("/login")
-def admin_login(user: UserLogin, db: Session = Depends(get_db)):
-    try:
+def _find_user(user: UserLogin):
+    # A short-lived session, so no pooled connection is held while bcrypt runs.
+    with SessionLocal() as db:
         db_user = None
         if user.email:
             db_user = db.query(User).filter(User.email == user.email).first()
         if not db_user and user.username:
             db_user = db.query(User).filter(User.username == user.username).first()
+        return db_user
+
+
+@router.post("/login")
+async def admin_login(user: UserLogin):
+    try:
+        db_user = await run_in_threadpool(_find_user, user)
 
-        if not db_user or not verify_password(user.password, db_user.password_hash):
+        if not db_user or not await verify_password_async(user.password, db_user.password_hash):
             raise HTTPException(401, "Invalid credentials")
         
         if db_user.role != "admin":
             raise HTTPException(403, "Not authorized as admin")
             
-        token = create_token(db_user.email or db_user.username)
+        token = create_token(db_user.email or db_user.username, user_id=db_user.id)
         return {"access_token": token, "username": db_user.username}
 
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise HTTPException(503, "Too many sign-ins in progress. Please retry in a moment.", headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(500, f"Login failed: {str(e)}")
 
 
-from datetime import datetime, timedelta
+def _dashboard_response(name: str, key: tuple, compute, if_none_match: Optional[str], response: Response):
+    """Serve a dashboard result from the filter-keyed cache, or 304 if the client's copy is current."""
+    result, etag = dashboard_cache.get_or_compute(name, key, dashboard_cache.TABLES, compute)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return result
+
 
 @router.get("/stats")
 def get_stats(
+    response: Response,
     timeframe: str = "all",
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
@@ -57,365 +82,144 @@ def get_stats(
     topics: Optional[str] = None,
     min_quiz_score: Optional[int] = None,
     max_quiz_score: Optional[int] = None,
-    authorization: str = Header(None), 
-    db: Session = Depends(get_db)
+    top_terms: int = Query(5, ge=1, le=100),
+    if_none_match: Optional[str] = Header(default=None),
+    admin: Principal = Depends(require_admin),
+    db: Session = Depends(get_read_db)
 ):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(401, "Missing authorization header")
-    
-    token = authorization.split(" ", 1)[1]
-    sub = decode_token(token)
-    if not sub:
-        raise HTTPException(401, "Invalid token")
-        
-    user = db.query(User).filter((User.email == sub) | (User.username == sub)).first()
-    if not user or user.role != "admin":
-        raise HTTPException(403, "Not authorized as admin")
-
-    admin_ids_tuple = db.query(User.id).filter(User.role == "admin").all()
-    admin_ids = [i[0] for i in admin_ids_tuple]
-    if not admin_ids:
-        admin_ids = [-1]
-
-    parsed_roles = [r.strip() for r in roles.split(",")] if roles else None
-    parsed_languages = [l.strip().lower() for l in languages.split(",")] if languages else None
-    parsed_topics = [t.strip().lower() for t in topics.split(",")] if topics else None
-
-    start_dt = None
-    end_dt = None
-    if start_date:
-        try:
-            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        except:
-            pass
-    if end_date:
-        try:
-            end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-            end_dt = end_dt + timedelta(days=1) - timedelta(seconds=1)
-        except:
-            pass
-
-    if not start_dt:
-        if timeframe == "7d":
-            start_dt = datetime.utcnow() - timedelta(days=7)
-        elif timeframe == "30d":
-            start_dt = datetime.utcnow() - timedelta(days=30)
-
-    user_query = db.query(User).filter(User.role != "admin")
-    if start_dt:
-        user_query = user_query.filter(User.created_at >= start_dt)
-    if end_dt:
-        user_query = user_query.filter(User.created_at <= end_dt)
-    if parsed_roles:
-        user_query = user_query.filter(User.role.in_(parsed_roles))
-    total_members = user_query.count()
-
-    review_query = db.query(AppReview).filter(AppReview.user_id.notin_(admin_ids))
-    if start_dt:
-        review_query = review_query.filter(AppReview.created_at >= start_dt)
-    if end_dt:
-        review_query = review_query.filter(AppReview.created_at <= end_dt)
-    if parsed_roles:
-        review_query = review_query.join(User, AppReview.user_id == User.id).filter(User.role.in_(parsed_roles))
-    total_reviews = review_query.count()
-    
-    avg_rating_query = db.query(func.avg(AppReview.rating)).filter(AppReview.user_id.notin_(admin_ids))
-    if start_dt:
-        avg_rating_query = avg_rating_query.filter(AppReview.created_at >= start_dt)
-    if end_dt:
-        avg_rating_query = avg_rating_query.filter(AppReview.created_at <= end_dt)
-    if parsed_roles:
-        avg_rating_query = avg_rating_query.join(User, AppReview.user_id == User.id).filter(User.role.in_(parsed_roles))
-    avg_rating = avg_rating_query.scalar() or 0.0
-
-    raw_stats_query = (
-        db.query(func.trim(func.lower(SearchHistory.query)).label("query"), func.count(SearchHistory.id).label("count"))
-        .filter(SearchHistory.user_id.notin_(admin_ids))
+    flt = StatsFilter.from_params(timeframe, start_date, end_date, roles, languages, topics, min_quiz_score, max_quiz_score)
+    return _dashboard_response(
+        "stats", (flt.key(), top_terms), lambda: compute_stats(db, flt, top_terms), if_none_match, response
     )
-    if start_dt:
-        raw_stats_query = raw_stats_query.filter(SearchHistory.created_at >= start_dt)
-    if end_dt:
-        raw_stats_query = raw_stats_query.filter(SearchHistory.created_at <= end_dt)
-    if parsed_roles:
-        raw_stats_query = raw_stats_query.join(User, SearchHistory.user_id == User.id).filter(User.role.in_(parsed_roles))
-    
-    lang_codes = []
-    if parsed_languages:
-        for l in parsed_languages:
-            if l == "english": lang_codes.extend(["en", "english"])
-            elif l == "telugu": lang_codes.extend(["te", "telugu"])
-            elif l == "hindi": lang_codes.extend(["hi", "hindi"])
-            else: lang_codes.append(l)
-        raw_stats_query = raw_stats_query.filter(func.lower(SearchHistory.search_language).in_(lang_codes))
-
-    raw_stats = raw_stats_query.group_by(func.trim(func.lower(SearchHistory.query))).order_by(desc("count")).limit(50).all()
-
-    merged_stats = []
-    
-    for r in raw_stats:
-        term = r[0]
-        count = r[1]
-        
-        merged = False
-        for i, existing in enumerate(merged_stats):
-            existing_term = existing["word"]
-            
-            if difflib.SequenceMatcher(None, term, existing_term).ratio() > 0.85:
-                merged_stats[i]["count"] += count
-                merged = True
-                break
-        
-        if not merged:
-            merged_stats.append({"word": term, "count": count})
-    
-    merged_stats.sort(key=lambda x: x["count"], reverse=True)
-    final_stats = merged_stats[:5]
-    
-    level_counts_query = db.query(SearchHistory.search_level, func.count(SearchHistory.id)).filter(SearchHistory.user_id.notin_(admin_ids))
-    if start_dt:
-        level_counts_query = level_counts_query.filter(SearchHistory.created_at >= start_dt)
-    if end_dt:
-        level_counts_query = level_counts_query.filter(SearchHistory.created_at <= end_dt)
-    if parsed_roles:
-        level_counts_query = level_counts_query.join(User, SearchHistory.user_id == User.id).filter(User.role.in_(parsed_roles))
-    if parsed_languages:
-        level_counts_query = level_counts_query.filter(func.lower(SearchHistory.search_language).in_(lang_codes))
-        
-    level_counts = level_counts_query.group_by(SearchHistory.search_level).all()
-    level_stats = [{"name": lvl or "unknown", "value": count} for lvl, count in level_counts]
-
-    source_counts_query = db.query(SearchHistory.search_source, func.count(SearchHistory.id)).filter(SearchHistory.user_id.notin_(admin_ids))
-    if start_dt:
-        source_counts_query = source_counts_query.filter(SearchHistory.created_at >= start_dt)
-    if end_dt:
-        source_counts_query = source_counts_query.filter(SearchHistory.created_at <= end_dt)
-    if parsed_roles:
-        source_counts_query = source_counts_query.join(User, SearchHistory.user_id == User.id).filter(User.role.in_(parsed_roles))
-    if parsed_languages:
-        source_counts_query = source_counts_query.filter(func.lower(SearchHistory.search_language).in_(lang_codes))
-
-    source_counts = source_counts_query.group_by(SearchHistory.search_source).all()
-    source_stats = [{"name": src or "unknown", "value": count} for src, count in source_counts]
-
-    lang_map = {
-        "en": "English",
-        "english": "English",
-        "te": "Telugu",
-        "telugu": "Telugu",
-        "hi": "Hindi",
-        "hindi": "Hindi"
+
+
+@router.get("/trending")
+def get_trending(
+    hours: int = Query(6, ge=1, le=24),
+    language: Optional[str] = Query(None, pattern="^(English|Telugu|Hindi|en|te|hi)$"),
+    limit: int = Query(10, ge=1, le=50),
+    days: int = Query(7, ge=1, le=30),
+    admin: Principal = Depends(require_admin)
+):
+    """Live top terms and daily active users from the in-process sketches (approximate, no table scans)."""
+    return {
+        "trending": trends.trending(hours, language, limit),
+        "active_users": trends.active_users(days),
     }
-    
-    raw_lang_counts_query = db.query(SearchHistory.search_language, func.count(SearchHistory.id)).filter(SearchHistory.user_id.notin_(admin_ids))
-    if start_dt:
-        raw_lang_counts_query = raw_lang_counts_query.filter(SearchHistory.created_at >= start_dt)
-    if end_dt:
-        raw_lang_counts_query = raw_lang_counts_query.filter(SearchHistory.created_at <= end_dt)
-    if parsed_roles:
-        raw_lang_counts_query = raw_lang_counts_query.join(User, SearchHistory.user_id == User.id).filter(User.role.in_(parsed_roles))
-    if parsed_languages:
-        raw_lang_counts_query = raw_lang_counts_query.filter(func.lower(SearchHistory.search_language).in_(lang_codes))
-
-    raw_lang_counts = raw_lang_counts_query.group_by(SearchHistory.search_language).all()
-    
-    normalized_langs = {}
-    for lang_code, count in raw_lang_counts:
-        clean_code = (lang_code or "").strip().lower()
-        lang_name = lang_map.get(clean_code, "Unknown")
-        if lang_name != "Unknown":
-            normalized_langs[lang_name] = normalized_langs.get(lang_name, 0) + count
-            
-    language_stats = [{"name": name, "value": val} for name, val in normalized_langs.items()]
-
-    roles_stats_query = db.query(User.role, func.count(User.id)).filter(User.role != "admin")
-    if start_dt:
-        roles_stats_query = roles_stats_query.filter(User.created_at >= start_dt)
-    if end_dt:
-        roles_stats_query = roles_stats_query.filter(User.created_at <= end_dt)
-    if parsed_roles:
-        roles_stats_query = roles_stats_query.filter(User.role.in_(parsed_roles))
-        
-    roles_stats = [{"name": r or "unknown", "value": c} for r, c in roles_stats_query.group_by(User.role).all()]
-
-    from sqlalchemy import cast, Date
-    daily_counts_query = db.query(cast(SearchHistory.created_at, Date), func.count(SearchHistory.id)).filter(SearchHistory.user_id.notin_(admin_ids))
-    if start_dt:
-        daily_counts_query = daily_counts_query.filter(SearchHistory.created_at >= start_dt)
-    if end_dt:
-        daily_counts_query = daily_counts_query.filter(SearchHistory.created_at <= end_dt)
-    if parsed_roles:
-        daily_counts_query = daily_counts_query.join(User, SearchHistory.user_id == User.id).filter(User.role.in_(parsed_roles))
-    if parsed_languages:
-        daily_counts_query = daily_counts_query.filter(func.lower(SearchHistory.search_language).in_(lang_codes))
-
-    daily_counts = daily_counts_query.group_by(cast(SearchHistory.created_at, Date)).order_by(cast(SearchHistory.created_at, Date).desc()).limit(30).all()
-    daily_searches = [{"date": str(d), "count": c} for d, c in reversed(daily_counts)]
-
-    total_time_spent_query = db.query(func.sum(User.time_spent)).filter(User.role != "admin")
-    if start_dt:
-        total_time_spent_query = total_time_spent_query.filter(User.created_at >= start_dt)
-    if end_dt:
-        total_time_spent_query = total_time_spent_query.filter(User.created_at <= end_dt)
-    if parsed_roles:
-        total_time_spent_query = total_time_spent_query.filter(User.role.in_(parsed_roles))
-
-    total_time_spent = total_time_spent_query.scalar() or 0
-
-    total_quiz_time_query = db.query(func.sum(QuizResult.time_taken)).filter(QuizResult.user_id.notin_(admin_ids))
-    if start_dt:
-        total_quiz_time_query = total_quiz_time_query.filter(QuizResult.created_at >= start_dt)
-    if end_dt:
-        total_quiz_time_query = total_quiz_time_query.filter(QuizResult.created_at <= end_dt)
-    if parsed_roles:
-        total_quiz_time_query = total_quiz_time_query.join(User, QuizResult.user_id == User.id).filter(User.role.in_(parsed_roles))
-    
-    total_quiz_time = total_quiz_time_query.scalar() or 0
-
-    total_quiz_users_query = db.query(func.count(func.distinct(QuizResult.user_id))).filter(QuizResult.user_id.notin_(admin_ids))
-    if start_dt:
-        total_quiz_users_query = total_quiz_users_query.filter(QuizResult.created_at >= start_dt)
-    if end_dt:
-        total_quiz_users_query = total_quiz_users_query.filter(QuizResult.created_at <= end_dt)
-    if parsed_roles:
-        total_quiz_users_query = total_quiz_users_query.join(User, QuizResult.user_id == User.id).filter(User.role.in_(parsed_roles))
-    if parsed_topics:
-        total_quiz_users_query = total_quiz_users_query.filter(func.lower(QuizResult.topic).in_(parsed_topics))
-    if min_quiz_score is not None:
-        total_quiz_users_query = total_quiz_users_query.filter((QuizResult.score * 100.0 / QuizResult.total_questions) >= min_quiz_score)
-    if max_quiz_score is not None:
-        total_quiz_users_query = total_quiz_users_query.filter((QuizResult.score * 100.0 / QuizResult.total_questions) <= max_quiz_score)
-
-    total_quiz_users = total_quiz_users_query.scalar() or 0
-    
-    total_video_views_query = db.query(func.count(SearchHistory.id)).filter(SearchHistory.video_watched == True, SearchHistory.user_id.notin_(admin_ids))
-    if start_dt:
-        total_video_views_query = total_video_views_query.filter(SearchHistory.created_at >= start_dt)
-    if end_dt:
-        total_video_views_query = total_video_views_query.filter(SearchHistory.created_at <= end_dt)
-    if parsed_roles:
-        total_video_views_query = total_video_views_query.join(User, SearchHistory.user_id == User.id).filter(User.role.in_(parsed_roles))
-    if parsed_languages:
-        total_video_views_query = total_video_views_query.filter(func.lower(SearchHistory.search_language).in_(lang_codes))
-
-    total_video_views = total_video_views_query.scalar() or 0
-    
-    top_quizzes_query = db.query(QuizResult, User).join(User, QuizResult.user_id == User.id).filter(User.role != "admin")
-    if start_dt:
-        top_quizzes_query = top_quizzes_query.filter(QuizResult.created_at >= start_dt)
-    if end_dt:
-        top_quizzes_query = top_quizzes_query.filter(QuizResult.created_at <= end_dt)
-    if parsed_roles:
-        top_quizzes_query = top_quizzes_query.filter(User.role.in_(parsed_roles))
-    if parsed_topics:
-        top_quizzes_query = top_quizzes_query.filter(func.lower(QuizResult.topic).in_(parsed_topics))
-    if min_quiz_score is not None:
-        top_quizzes_query = top_quizzes_query.filter((QuizResult.score * 100.0 / QuizResult.total_questions) >= min_quiz_score)
-    if max_quiz_score is not None:
-        top_quizzes_query = top_quizzes_query.filter((QuizResult.score * 100.0 / QuizResult.total_questions) <= max_quiz_score)
-
-    top_quizzes_data = top_quizzes_query.order_by(
-            (QuizResult.score * 1.0 / QuizResult.total_questions).desc(),
-            QuizResult.total_questions.desc(),
-            QuizResult.created_at.desc()
-        ).limit(100).all() 
-
-    top_quizzers = []
-    seen_users = set()
-    for qr, u in top_quizzes_data:
-        if u.id not in seen_users:
-            seen_users.add(u.id)
-            top_quizzers.append({
-                "user_id": u.id,
-                "username": u.username or u.first_name or "Anonymous",
-                "score": f"{qr.score}/{qr.total_questions}",
-                "percentage": round((qr.score / qr.total_questions) * 100) if qr.total_questions > 0 else 0
-            })
-            if len(top_quizzers) >= 10:
-                break
 
+
+@router.get("/metrics")
+def get_metrics(admin: Principal = Depends(require_admin)):
+    """Runtime counters of the explanation pipeline (cache, circuit breaker, prefetch), the bcrypt pool, the write buffers, the leaderboard, the dashboard cache, the rollups, the trend sketches, the export jobs and the read replica."""
     return {
-        "total_members": total_members,
-        "total_reviews": total_reviews,
-        "average_rating": round(avg_rating, 1),
-        "most_searched_words": final_stats,
-        "level_stats": level_stats,
-        "source_stats": source_stats,
-        "language_stats": language_stats,
-        "roles_stats": roles_stats,
-        "daily_searches": daily_searches,
-        "total_time_spent": total_time_spent,
-        "total_quiz_time": total_quiz_time,
-        "total_quiz_users": total_quiz_users,
-        "total_video_views": total_video_views,
-        "top_quizzers": top_quizzers
+        **llm_service.stats(),
+        "password_hasher": hasher_stats(),
+        "history_writer": history_writer.stats(),
+        "time_accumulator": time_accumulator.stats(),
+        "warmup": warmup.stats(),
+        "leaderboard": leaderboard.stats(),
+        "dashboard_cache": dashboard_cache.stats(),
+        "rollups": rollup_job.stats(),
+        "trends": trends.stats(),
+        "export_jobs": export_jobs.stats(),
+        "read_replica": read_replica.stats(),
     }
 
 
-@router.get("/users")
-def get_users(authorization: str = Header(None), db: Session = Depends(get_db)):
-    if not authorization:
-        raise HTTPException(401, "Missing authorization header")
-    
-    token = authorization.split(" ")[1]
-    sub = decode_token(token)
-    if not sub:
-        raise HTTPException(401, "Invalid token")
-        
-    admin_user = db.query(User).filter((User.email == sub) | (User.username == sub)).first()
-    if not admin_user or admin_user.role != "admin":
-         raise HTTPException(403, "Not authorized as admin")
+USER_SORTS = ("id", "username", "created_at", "time_spent", "quiz_score", "quiz_time_spent", "videos_watched")
+
 
-    users = db.query(User).filter(User.role != "admin").all()
-    user_ids = [u.id for u in users]
-    
+@router.get("/users")
+def get_users(
+    response: Response,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+    search: Optional[str] = Query(None, max_length=100, description="Matches username, email or name"),
+    sort: str = Query("id", pattern="^-?(" + "|".join(USER_SORTS) + ")$", description="Prefix with - for descending"),
+    if_none_match: Optional[str] = Header(default=None),
+    admin: Principal = Depends(require_admin),
+    db: Session = Depends(get_read_db)
+):
+    """A page of non-admin users with their quiz totals, reviews and last 5 searches.
+
+    The total number of matching users is sent in X-Total-Count, and the next
+    page number in X-Next-Page (absent on the last page).
+    """
+    search = (search or "").strip().lower()
+    result = _dashboard_response(
+        "users", (page, page_size, search, sort), lambda: _users_page(db, page, page_size, search, sort), if_none_match, response
+    )
+    if isinstance(result, Response):
+        return result
+    response.headers["X-Total-Count"] = str(result["total"])
+    if result["next_page"]:
+        response.headers["X-Next-Page"] = str(result["next_page"])
+    return result["users"]
+
+
+def _users_page(db: Session, page: int, page_size: int, search: str, sort: str) -> dict:
+    # Everything below is bounded by the page: the per-user totals come from
+    # user_stats and only the page's users get their reviews and recent
+    # searches loaded.
+    users = db.query(User, UserStats).outerjoin(UserStats, UserStats.user_id == User.id).filter(User.role != "admin")
+    if search:
+        users = users.filter(or_(*(
+            func.lower(column).contains(search, autoescape=True)
+            for column in (User.username, User.email, User.first_name, User.last_name)
+        )))
+    total = users.count()
+
+    name = sort.lstrip("-")
+    if name == "quiz_score":
+        order = UserStats.quiz_score_sum * 1.0 / func.nullif(UserStats.quiz_question_sum, 0)
+    elif name == "quiz_time_spent":
+        order = func.coalesce(UserStats.quiz_time, 0)
+    elif name == "videos_watched":
+        order = func.coalesce(UserStats.videos_watched, 0)
+    elif name == "username":
+        order = func.lower(func.coalesce(User.username, User.first_name))
+    else:
+        order = getattr(User, name)
+    # NULLs (users without quizzes) sort last either way; id keeps pages stable.
+    nulls_last = order.is_(None)
+    if sort.startswith("-"):
+        order = order.desc()
+    page_rows = users.order_by(nulls_last, order, User.id).offset((page - 1) * page_size).limit(page_size).all()
+    user_ids = [user.id for user, _ in page_rows]
+    next_page = page + 1 if page * page_size < total else None
     if not user_ids:
-        return []
+        return {"users": [], "total": total, "next_page": next_page}
 
-    # Bulk fetch reviews
-    reviews = db.query(AppReview).filter(AppReview.user_id.in_(user_ids)).all()
     reviews_map = {}
-    for r in reviews:
-        if r.user_id not in reviews_map: reviews_map[r.user_id] = []
-        reviews_map[r.user_id].append({"rating": r.rating, "comment": r.comment, "date": r.created_at})
-
-    # Bulk fetch quiz results
-    quiz_results = db.query(QuizResult).filter(QuizResult.user_id.in_(user_ids)).all()
-    quizzes_map = {}
-    for qr in quiz_results:
-        if qr.user_id not in quizzes_map: quizzes_map[qr.user_id] = []
-        quizzes_map[qr.user_id].append(qr)
-
-    # Bulk fetch videos watched count
-    videos_watched_rows = db.query(SearchHistory.user_id, func.count(SearchHistory.id)).filter(
-        SearchHistory.user_id.in_(user_ids), 
-        SearchHistory.video_watched == True
-    ).group_by(SearchHistory.user_id).all()
-    videos_map = {row[0]: row[1] for row in videos_watched_rows}
-
-
-    search_history_rows = db.query(SearchHistory).filter(
-        SearchHistory.user_id.in_(user_ids)
-    ).order_by(SearchHistory.user_id, SearchHistory.created_at.desc()).all()
-    
+    for r in db.query(AppReview).filter(AppReview.user_id.in_(user_ids)).order_by(AppReview.id).all():
+        reviews_map.setdefault(r.user_id, []).append({"rating": r.rating, "comment": r.comment, "date": r.created_at})
+
+    recent = (
+        select(
+            SearchHistory.user_id,
+            SearchHistory.query,
+            SearchHistory.search_level,
+            SearchHistory.created_at,
+            func.row_number().over(
+                partition_by=SearchHistory.user_id,
+                order_by=(SearchHistory.created_at.desc(), SearchHistory.id.desc()),
+            ).label("position"),
+        )
+        .where(SearchHistory.user_id.in_(user_ids))
+        .subquery()
+    )
     sh_map = {}
-    for sh in search_history_rows:
-        if sh.user_id not in sh_map: sh_map[sh.user_id] = []
-        if len(sh_map[sh.user_id]) < 5:
-            sh_map[sh.user_id].append({"query": sh.query, "level": sh.search_level, "date": sh.created_at})
+    for row in db.execute(
+        select(recent).where(recent.c.position <= 5).order_by(recent.c.user_id, recent.c.position)
+    ):
+        sh_map.setdefault(row.user_id, []).append({"query": row.query, "level": row.search_level, "date": row.created_at})
 
     user_data = []
-    for user in users:
-        user_quizzes = quizzes_map.get(user.id, [])
-        has_played_quiz = len(user_quizzes) > 0
-        
+    for user, stats in page_rows:
+        has_played_quiz = bool(stats and stats.quiz_attempts)
         avg_quiz_score = "N/A"
-        quiz_time_spent = 0
-        if has_played_quiz:
-            total_earned = sum(qr.score for qr in user_quizzes)
-            total_possible = sum(qr.total_questions for qr in user_quizzes)
-            quiz_time_spent = sum(qr.time_taken or 0 for qr in user_quizzes)
-            if total_possible > 0:
-                avg_quiz_score = f"{round((total_earned / total_possible) * 100, 1)}%"
+        if has_played_quiz and stats.quiz_question_sum:
+            avg_quiz_score = f"{round((stats.quiz_score_sum / stats.quiz_question_sum) * 100, 1)}%"
 
         user_data.append({
             "id": user.id,
@@ -423,18 +227,19 @@ def get_users(authorization: str = Header(None), db: Session = Depends(get_db)):
             "email": user.email,
             "role": user.role,
             "time_spent": user.time_spent or 0,
-            "quiz_time_spent": quiz_time_spent,
+            "quiz_time_spent": stats.quiz_time if stats else 0,
             "has_played_quiz": has_played_quiz,
             "avg_quiz_score": avg_quiz_score,
-            "videos_watched": videos_map.get(user.id, 0),
+            "videos_watched": stats.videos_watched if stats else 0,
             "reviews": reviews_map.get(user.id, []),
             "search_history": sh_map.get(user.id, [])
         })
-    
-    return user_data
+
+    return {"users": user_data, "total": total, "next_page": next_page}
 
 @router.get("/export_data")
 def export_data(
+    request: Request,
     timeframe: str = "all",
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
@@ -442,128 +247,118 @@ def export_data(
     languages: Optional[str] = None,
     min_quiz_score: Optional[int] = None,
     max_quiz_score: Optional[int] = None,
-    authorization: str = Header(None), 
-    db: Session = Depends(get_db)
+    format: str = Query("json", pattern="^(json|csv|ndjson)$"),
+    section: Optional[str] = Query(None, pattern="^(" + "|".join(EXPORT_SECTIONS) + ")$"),
+    admin: Principal = Depends(require_admin),
+    db: Session = Depends(get_read_db)
 ):
-    """Generates the heavily categorized analytical data requested for Excel/CSV/PDF export."""
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(401, "Missing authorization header")
-    
-    token = authorization.split(" ", 1)[1]
-    sub = decode_token(token)
-    if not sub:
-        raise HTTPException(401, "Invalid token")
-        
-    user = db.query(User).filter((User.email == sub) | (User.username == sub)).first()
-    if not user or user.role != "admin":
-        raise HTTPException(403, "Not authorized as admin")
-
-    admin_ids_tuple = db.query(User.id).filter(User.role == "admin").all()
-    admin_ids = [i[0] for i in admin_ids_tuple]
-    if not admin_ids:
-        admin_ids = [-1]
-
-    # Filters parsing
-    parsed_roles = [r.strip() for r in roles.split(",")] if roles else None
-    parsed_languages = [l.strip().lower() for l in languages.split(",")] if languages else None
-    
-    start_dt, end_dt = None, None
-    if start_date:
-        try: start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        except: pass
-    if end_date:
-        try: end_dt = datetime.strptime(end_date, "%Y-%m-%d"); end_dt = end_dt + timedelta(days=1) - timedelta(seconds=1)
-        except: pass
-    if not start_dt:
-        if timeframe == "7d": start_dt = datetime.utcnow() - timedelta(days=7)
-        elif timeframe == "30d": start_dt = datetime.utcnow() - timedelta(days=30)
-    
-    lang_codes = []
-    if parsed_languages:
-        for l in parsed_languages:
-            if l == "english": lang_codes.extend(["en", "english"])
-            elif l == "telugu": lang_codes.extend(["te", "telugu"])
-            elif l == "hindi": lang_codes.extend(["hi", "hindi"])
-            else: lang_codes.append(l)
-
-    # 1. Users & Leaderboard Data
-    users_query = db.query(User).filter(User.role != "admin")
-    if start_dt: users_query = users_query.filter(User.created_at >= start_dt)
-    if end_dt: users_query = users_query.filter(User.created_at <= end_dt)
-    if parsed_roles: users_query = users_query.filter(User.role.in_(parsed_roles))
-    
-    all_users = users_query.all()
-    users_export = []
-    
-    for u in all_users:
-        quizzes = db.query(QuizResult).filter(QuizResult.user_id == u.id).all()
-        total_earned = sum(qr.score for qr in quizzes)
-        total_possible = sum(qr.total_questions for qr in quizzes)
-        avg_score_pct = round((total_earned / total_possible) * 100, 1) if total_possible > 0 else 0
-        
-        users_export.append({
-            "id": u.id,
-            "name": u.username or u.first_name or "Anonymous",
-            "email": u.email or "N/A",
-            "role": u.role or "user",
-            "joined_date": u.created_at.strftime("%Y-%m-%d %H:%M:%S") if u.created_at else "N/A",
-            "last_login": "N/A",
-            "total_quizzes_attempted": len(quizzes),
-            "average_score": f"{avg_score_pct}%",
-            "time_spent": u.time_spent or 0,
-            
-            "accuracy": avg_score_pct
-        })
-        
-    leaderboard_export = sorted(users_export, key=lambda x: (x["accuracy"], x["total_quizzes_attempted"]), reverse=True)
-    # Assign Ranks
-    for idx, lb_user in enumerate(leaderboard_export):
-        lb_user["rank"] = idx + 1
-
-    # 2. Quiz Results Data
-    quiz_query = db.query(QuizResult, User).join(User, QuizResult.user_id == User.id).filter(User.role != "admin")
-    if start_dt: quiz_query = quiz_query.filter(QuizResult.created_at >= start_dt)
-    if end_dt: quiz_query = quiz_query.filter(QuizResult.created_at <= end_dt)
-    if parsed_roles: quiz_query = quiz_query.filter(User.role.in_(parsed_roles))
-    if min_quiz_score is not None: quiz_query = quiz_query.filter((QuizResult.score * 100.0 / QuizResult.total_questions) >= min_quiz_score)
-    if max_quiz_score is not None: quiz_query = quiz_query.filter((QuizResult.score * 100.0 / QuizResult.total_questions) <= max_quiz_score)
-    
-    quiz_results_export = []
-    for qr, u in quiz_query.all():
-        pct = (qr.score / qr.total_questions * 100) if qr.total_questions > 0 else 0
-        quiz_results_export.append({
-            "user_name": u.username or u.first_name or "Anonymous",
-            "quiz_name": "General Quiz",
-            "category": (qr.topic or "Mixed").capitalize().replace("_", " "),
-            "score": qr.score,
-            "total_marks": qr.total_questions,
-            "percentage": f"{round(pct, 1)}%",
-            "time_taken": getattr(qr, 'time_taken', "N/A"),
-            "attempt_date": qr.created_at.strftime("%Y-%m-%d %H:%M:%S") if qr.created_at else "N/A",
-            "status": "Pass" if pct >= 50 else "Fail"
-        })
+    """Generates the heavily categorized analytical data requested for Excel/CSV/PDF export.
+
+    `format=json` (the default) returns all four sections in one document.
+    `format=csv` or `format=ndjson` streams a single `section` straight from a
+    server-side cursor, gzip-compressed when the client accepts it, so even
+    million-row sections are exported in constant memory.
+    """
+    flt = ExportFilter.from_params(timeframe, start_date, end_date, roles, languages, min_quiz_score, max_quiz_score)
+    if format == "json":
+        return {name: list(EXPORT_ROWS[name](db, flt)) for name in EXPORT_SECTIONS}
+    if section is None:
+        raise HTTPException(400, "section is required for csv and ndjson exports")
+
+    def body():
+        # The request's session is closed before a streamed body is sent, so
+        # the rows are read on a session of their own.
+        export_db = read_session()
+        try:
+            rows = EXPORT_ROWS[section](export_db, flt)
+            if format == "csv":
+                yield from csv_chunks(rows, EXPORT_COLUMNS[section])
+            else:
+                yield from ndjson_chunks(rows)
+        finally:
+            export_db.close()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="{section}.{format}"'}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(gzip_chunks(body()), media_type=media_type, headers=headers)
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+
+def _export_job_view(job: dict) -> dict:
+    total = job["rows_total"]
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "format": job["format"],
+        "params": job["params"],
+        "progress": round(job["rows_written"] / total, 4) if total else (1.0 if job["status"] == "done" else 0.0),
+        "rows_written": job["rows_written"],
+        "rows_total": total,
+        "error": job["error"],
+        "created_at": datetime.fromtimestamp(job["created_at"], timezone.utc).isoformat(),
+        "finished_at": datetime.fromtimestamp(job["finished_at"], timezone.utc).isoformat() if job["finished_at"] else None,
+        "files": {
+            name: {**section, "url": f"/admin/exports/{job['id']}/{name}" if section["done"] else None}
+            for name, section in job["sections"].items()
+        },
+    }
 
-    # 3. Search Analytics Data
-    search_query = db.query(SearchHistory, User).join(User, SearchHistory.user_id == User.id).filter(User.role != "admin")
-    if start_dt: search_query = search_query.filter(SearchHistory.created_at >= start_dt)
-    if end_dt: search_query = search_query.filter(SearchHistory.created_at <= end_dt)
-    if parsed_roles: search_query = search_query.filter(User.role.in_(parsed_roles))
-    if parsed_languages: search_query = search_query.filter(func.lower(SearchHistory.search_language).in_(lang_codes))
-    
-    search_analytics_export = []
-    for sh, u in search_query.all():
-        search_analytics_export.append({
-            "search_query": sh.query,
-            "user": u.username or u.first_name or "Anonymous",
-            "language": sh.search_language or "en",
-            "date": sh.created_at.strftime("%Y-%m-%d %H:%M:%S") if sh.created_at else "N/A",
-            "result_count": 1,
-            "difficulty_level": sh.search_level or "Beginner"
-        })
 
-    return {
-        "users": users_export,
-        "leaderboard": leaderboard_export,
-        "quiz_results": quiz_results_export,
-        "search_analytics": search_analytics_export
+@router.post("/exports", status_code=202)
+def create_export(
+    timeframe: str = "all",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    roles: Optional[str] = None,
+    languages: Optional[str] = None,
+    min_quiz_score: Optional[int] = None,
+    max_quiz_score: Optional[int] = None,
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    admin: Principal = Depends(require_admin)
+):
+    """Start a background export of all sections (same filters as /export_data) and return its job.
+
+    An identical filter set that is already exported, or still being
+    exported, returns that job instead of starting another. Poll
+    GET /admin/exports/{id} for progress; finished files are listed with
+    their download URLs.
+    """
+    def normalized(values: Optional[str], lower: bool = False):
+        if not values:
+            return None
+        items = {v.strip().lower() if lower else v.strip() for v in values.split(",") if v.strip()}
+        return ",".join(sorted(items)) or None
+
+    params = {
+        "timeframe": timeframe,
+        "start_date": start_date,
+        "end_date": end_date,
+        "roles": normalized(roles),
+        "languages": normalized(languages, lower=True),
+        "min_quiz_score": min_quiz_score,
+        "max_quiz_score": max_quiz_score,
     }
+    try:
+        return _export_job_view(export_jobs.submit(params, format))
+    except ExportUnavailable as e:
+        raise HTTPException(400, str(e))
+
+
+@router.get("/exports/{job_id}")
+def get_export(job_id: str, admin: Principal = Depends(require_admin)):
+    job = export_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Export not found")
+    return _export_job_view(job)
+
+
+@router.get("/exports/{job_id}/{section}")
+def download_export(job_id: str, section: str, admin: Principal = Depends(require_admin)):
+    """A finished export file; supports Range requests for resumable downloads."""
+    path = export_jobs.file_path(job_id, section)
+    if path is None:
+        raise HTTPException(404, "Export file not found or not ready")
+    media_type = "application/gzip" if path.name.endswith(".gz") else "application/vnd.apache.parquet"
+    return FileResponse(path, media_type=media_type, filename=path.name)
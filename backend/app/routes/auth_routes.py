@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session, load_only
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from ..database import SessionLocal
+from ..database import AsyncSessionLocal, get_async_db
 from ..models import User
 from ..schemas import UserCreate, UserLogin
 from datetime import datetime
-from ..security import hash_password, verify_password
-from ..auth import create_token, decode_token
-from typing import Optional
+from ..security import PasswordHasherBusy, hash_password_async, verify_password_async
+from ..auth import create_token
+from ..dependencies import Principal, get_current_user, invalidate_principal
+from ..utils.time_accumulator import time_accumulator
+from ..utils.dashboard_cache import dashboard_cache
 from ..models import AppReview
 from ..schemas import AppReviewCreate, AppReviewOut
 
@@ -15,21 +19,45 @@ from ..schemas import AppReviewCreate, AppReviewOut
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+BUSY_DETAIL = "Too many sign-ins in progress. Please retry in a moment."
 
 
-@router.post("/signup")
-def signup(user: UserCreate, db: Session = Depends(get_db)):
-    try:
-        if user.email and db.query(User).filter(User.email == user.email).first():
+async def _find_login_user(user: UserLogin):
+    # A short-lived session, so no pooled connection is held while bcrypt runs.
+    async with AsyncSessionLocal() as db:
+        login_columns = load_only(User.id, User.email, User.username, User.role, User.password_hash)
+        db_user = None
+        if user.email:
+            db_user = await db.scalar(select(User).options(login_columns).where(User.email == user.email))
+        if not db_user and user.username:
+            db_user = await db.scalar(select(User).options(login_columns).where(User.username == user.username))
+        return db_user
+
+
+async def _check_signup_available(user: UserCreate):
+    async with AsyncSessionLocal() as db:
+        if user.email and await db.scalar(select(User.id).where(User.email == user.email)):
             raise HTTPException(400, "Email already exists")
-        if user.username and db.query(User).filter(User.username == user.username).first():
+        if user.username and await db.scalar(select(User.id).where(User.username == user.username)):
             raise HTTPException(400, "Username already exists")
+
+
+async def _insert_user(new_user: User):
+    async with AsyncSessionLocal() as db:
+        try:
+            db.add(new_user)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+# Signup and login look users up in their own short-lived sessions, so waiting
+# on the bcrypt pool holds no pooled DB connection.
+@router.post("/signup")
+async def signup(user: UserCreate):
+    try:
+        await _check_signup_available(user)
             
         role = user.role or "general_user"
         
@@ -38,69 +66,46 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
             username=user.username,
             role=role,
             language=user.language,
-            password_hash=hash_password(user.password)
+            password_hash=await hash_password_async(user.password)
         )
         
-        db.add(new_user)
-        db.commit()
+        await _insert_user(new_user)
+        dashboard_cache.bump("users")
         return {"message": "User created successfully"}
 
+    except HTTPException:
+        raise
+    except PasswordHasherBusy:
+        raise HTTPException(503, BUSY_DETAIL, headers={"Retry-After": "1"})
     except IntegrityError as e:
-        db.rollback()
         raise HTTPException(400, "User already exists or invalid data")
     except SQLAlchemyError as e:
-        db.rollback()
         raise HTTPException(500, f"Database error: {str(e)}")
     except Exception as e:
-        db.rollback()
         raise HTTPException(500, f"Signup failed: {str(e)}")
 
 
 @router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin):
     try:
-        db_user = None
-        if user.email:
-            db_user = (
-                db.query(User)
-                .options(load_only(User.id, User.email, User.username, User.password_hash))
-                .filter(User.email == user.email)
-                .first()
-            )
-        if not db_user and user.username:
-            db_user = (
-                db.query(User)
-                .options(load_only(User.id, User.email, User.username, User.password_hash))
-                .filter(User.username == user.username)
-                .first()
-            )
-
-        if not db_user or not verify_password(user.password, db_user.password_hash):
+        db_user = await _find_login_user(user)
+
+        if not db_user or not await verify_password_async(user.password, db_user.password_hash):
             raise HTTPException(401, "Invalid credentials")
             
-        token = create_token(db_user.email or db_user.username)
+        token = create_token(db_user.email or db_user.username, user_id=db_user.id)
         return {"access_token": token}
 
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise HTTPException(503, BUSY_DETAIL, headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(500, f"Login failed: {str(e)}")
 
 
 @router.get("/me")
-def me(authorization: Optional[str] = Header(default=None), db: Session = Depends(get_db)):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(401, "Missing or invalid authorization header")
-    
-    token = authorization.split(" ", 1)[1]
-    sub = decode_token(token)
-    if not sub:
-        raise HTTPException(401, "Invalid token")
-        
-    user = db.query(User).filter((User.email == sub) | (User.username == sub)).first()
-    if not user:
-        raise HTTPException(404, "User not found")
-        
+async def me(user: Principal = Depends(get_current_user)):
     return {
         "email": user.email,
         "username": user.username,
@@ -112,20 +117,12 @@ def me(authorization: Optional[str] = Header(default=None), db: Session = Depend
 
 
 @router.put("/profile")
-def update_profile(
+async def update_profile(
     data: dict,
-    authorization: Optional[str] = Header(default=None),
-    db: Session = Depends(get_db)
+    principal: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(401, "Missing or invalid authorization header")
-    
-    token = authorization.split(" ", 1)[1]
-    sub = decode_token(token)
-    if not sub:
-        raise HTTPException(401, "Invalid token")
-        
-    user = db.query(User).filter((User.email == sub) | (User.username == sub)).first()
+    user = await db.get(User, principal.id)
     if not user:
         raise HTTPException(404, "User not found")
         
@@ -135,7 +132,7 @@ def update_profile(
     language = data.get("language")
 
     if new_username and new_username != user.username:
-        if db.query(User).filter(User.username == new_username).first():
+        if await db.scalar(select(User.id).where(User.username == new_username)):
             raise HTTPException(400, "Username already exists")
         user.username = new_username
         
@@ -145,29 +142,19 @@ def update_profile(
         user.language = language
         
     db.add(user)
-    db.commit()
+    await db.commit()
+    invalidate_principal(user.id)
+    dashboard_cache.bump("users")
     return {"message": "Profile updated successfully"}
 
 
 @router.post("/review")
-def submit_review(
+async def submit_review(
     review: AppReviewCreate,
-    authorization: Optional[str] = Header(default=None),
-    db: Session = Depends(get_db)
+    user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(401, "Missing or invalid authorization header")
-    
-    token = authorization.split(" ", 1)[1]
-    sub = decode_token(token)
-    if not sub:
-        raise HTTPException(401, "Invalid token")
-        
-    user = db.query(User).filter((User.email == sub) | (User.username == sub)).first()
-    if not user:
-        raise HTTPException(404, "User not found")
-
-    existing_review = db.query(AppReview).filter(AppReview.user_id == user.id).first()
+    existing_review = await db.scalar(select(AppReview).where(AppReview.user_id == user.id).limit(1))
     
     if existing_review:
         existing_review.rating = review.rating
@@ -181,28 +168,17 @@ def submit_review(
         )
         db.add(new_review)
     
-    db.commit()
+    await db.commit()
+    dashboard_cache.bump("reviews")
     return {"message": "Review submitted successfully"}
 
 
 @router.get("/review", response_model=AppReviewOut)
-def get_review(
-    authorization: Optional[str] = Header(default=None),
-    db: Session = Depends(get_db)
+async def get_review(
+    user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(401, "Missing or invalid authorization header")
-    
-    token = authorization.split(" ", 1)[1]
-    sub = decode_token(token)
-    if not sub:
-        raise HTTPException(401, "Invalid token")
-        
-    user = db.query(User).filter((User.email == sub) | (User.username == sub)).first()
-    if not user:
-        raise HTTPException(404, "User not found")
-
-    review = db.query(AppReview).filter(AppReview.user_id == user.id).first()
+    review = await db.scalar(select(AppReview).where(AppReview.user_id == user.id).limit(1))
     if not review:
         raise HTTPException(404, "No review found")
         
@@ -213,23 +189,9 @@ class TimeUpdate(BaseModel):
     time_spent: int
 
 @router.post("/record-time")
-def record_time(
+async def record_time(
     data: TimeUpdate,
-    authorization: Optional[str] = Header(default=None),
-    db: Session = Depends(get_db)
+    user: Principal = Depends(get_current_user)
 ):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(401, "Missing or invalid authorization header")
-    
-    token = authorization.split(" ", 1)[1]
-    sub = decode_token(token)
-    if not sub:
-        raise HTTPException(401, "Invalid token")
-        
-    user = db.query(User).filter((User.email == sub) | (User.username == sub)).first()
-    if not user:
-        raise HTTPException(404, "User not found")
-        
-    user.time_spent = (user.time_spent or 0) + data.time_spent
-    db.commit()
+    time_accumulator.add(user.id, data.time_spent)
     return {"status": "success"}
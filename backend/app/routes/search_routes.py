@@ -1,67 +1,47 @@
-from fastapi import APIRouter, Query, UploadFile, File, Depends, Header, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Query, UploadFile, File, Depends, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from ..utils.fast_llm_service import llm_service
-from ..database import SessionLocal
-from ..models import User, SearchHistory, QuizResult
-from ..auth import decode_token
-from ..schemas import SearchHistoryOut, FeedbackUpdate, QuizResultCreate, QuizResultOut
+from ..utils.query_normalizer import normalize_query
+from ..utils.history_writer import history_writer
+from ..utils.leaderboard import leaderboard
+from ..utils.dashboard_cache import dashboard_cache
+from ..utils.trends import trends
+from ..utils.user_stats import decrement_statement, increment_statement
+from ..utils.rollups import mark_dirty_statement, utc_day
+from ..utils.pagination import decode_cursor, encode_cursor
+from ..database import get_async_db
+from ..models import User, SearchHistory, QuizResult, UserStats
+from ..dependencies import Principal, get_current_user, get_current_user_optional
+from ..schemas import FeedbackUpdate, QuizResultCreate, QuizResultOut
 import json
 
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-def get_current_user_optional(authorization: Optional[str] = Header(default=None), db: Session = Depends(get_db)):
-    if not authorization or not authorization.startswith("Bearer "):
-        return None
-    token = authorization.split(" ", 1)[1]
-    
-    try:
-        sub = decode_token(token)
-    except Exception:
-        return None
-        
-    if not sub:
-        return None
-        
-    user = db.query(User).filter((User.email == sub) | (User.username == sub)).first()
-    return user
-
-
-def get_current_user(authorization: Optional[str] = Header(default=None), db: Session = Depends(get_db)):
-    user = get_current_user_optional(authorization, db)
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid token or user not found")
-    return user
-
-
+# Routes here are async and use AsyncSession; the blocking LLM client and the
+# sync history writer run in the threadpool.
 @router.get("/search")
-def search_term(
-    q: str,
+async def search_term(
+    q: str = Query(..., max_length=500),
     level: str = Query(None, pattern="^(easy|medium|hard)$"),
     language: str = Query("English", pattern="^(English|Telugu|Hindi|en|te|hi)$"),
     fetch_media: bool = Query(True),
-    user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    user: Optional[Principal] = Depends(get_current_user_optional)
 ):
     try:
         lang_map = {"en": "English", "te": "Telugu", "hi": "Hindi"}
         language = lang_map.get(language, language)
 
         if level:
-            level_details = llm_service.get_level_details(q, level, language)
+            level_details = await run_in_threadpool(llm_service.get_level_details, q, level, language)
             is_scientific = level_details.get("is_scientific", True)
             definition = level_details.get("text", "")
             
+            core_term = level_details.get("core_term") or q
             result_data = {
                 "is_scientific": is_scientific,
                 "term": level_details.get("corrected_term", q),
@@ -72,13 +52,15 @@ def search_term(
                 "examples": level_details.get("examples", []),
                 "related_words": level_details.get("related_words", []),
                 "video_id": level_details.get("video_id") if fetch_media else None,
+                "stale": level_details.get("stale", False),
                 "source": "llm",
                 "confidence": "medium" if is_scientific else "high"
             }
         else:
-            llm_explanation = llm_service.get_fast_explanation(q, language, fetch_media=fetch_media)
+            llm_explanation = await run_in_threadpool(llm_service.get_fast_explanation, q, language, fetch_media=fetch_media)
             is_scientific = llm_explanation.get("is_scientific", True) if isinstance(llm_explanation, dict) else True
             definition = llm_explanation.get("easy") if isinstance(llm_explanation, dict) else llm_explanation
+            core_term = (llm_explanation.get("core_term") if isinstance(llm_explanation, dict) else None) or q
             
             result_data = {
                 "is_scientific": is_scientific,
@@ -93,26 +75,29 @@ def search_term(
                 "examples": llm_explanation.get("examples", []) if isinstance(llm_explanation, dict) else [],
                 "related_words": llm_explanation.get("related_words", []) if isinstance(llm_explanation, dict) else [],
                 "video_id": llm_explanation.get("video_id") if isinstance(llm_explanation, dict) else None,
+                "stale": llm_explanation.get("stale", False) if isinstance(llm_explanation, dict) else False,
                 "source": "llm",
                 "confidence": "medium" if is_scientific else "high"
             }
 
+        if is_scientific:
+            trends.record_search(normalize_query(core_term), language, user.id if user else None, user.role if user else None)
+
         if user and is_scientific:
             summary_result = definition
             if len(summary_result) > 200:
                 summary_result = summary_result[:200] + "..."
-            history_entry = SearchHistory(
+            result_data["history_id"] = await run_in_threadpool(
+                history_writer.add,
                 user_id=user.id,
                 query=q,
+                normalized_query=normalize_query(q),
+                core_key=normalize_query(core_term),
                 result=summary_result,
                 search_level=level if level else "easy",
                 search_language=language if language else "en",
                 search_source="text"
             )
-            db.add(history_entry)
-            db.commit()
-            db.refresh(history_entry)
-            result_data["history_id"] = history_entry.id
             
         return result_data
 
@@ -134,67 +119,137 @@ def search_media(q: str):
          return {"error": str(e)}
 
 
-@router.get("/history", response_model=List[SearchHistoryOut])
-def get_history(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+HISTORY_FIELDS = ("id", "query", "result", "feedback", "created_at", "search_level", "search_language", "search_source", "video_watched")
+DEFAULT_HISTORY_FIELDS = ("id", "query", "result", "feedback", "created_at")  # the SearchHistoryOut shape
+HISTORY_LANGUAGES = {"en": ["en", "english"], "te": ["te", "telugu"], "hi": ["hi", "hindi"]}
+
+
+@router.get("/history")
+async def get_history(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200, description="Page size"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of: " + ", ".join(HISTORY_FIELDS)),
+    level: Optional[str] = Query(None, pattern="^(easy|medium|hard)$"),
+    language: Optional[str] = Query(None, pattern="^(English|Telugu|Hindi|en|te|hi)$"),
+    source: Optional[str] = Query(None, pattern="^(text|voice|image)$"),
+    user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    history = db.query(SearchHistory).filter(SearchHistory.user_id == user.id).order_by(SearchHistory.created_at.desc()).all()
-    return history
+    """A page of the user's searches, newest first.
+
+    Keyset-paginated on (created_at, id): pass the X-Next-Cursor response header
+    back as `cursor` for the next page; the header is absent on the last page.
+    """
+    selected = DEFAULT_HISTORY_FIELDS
+    if fields:
+        selected = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [f for f in selected if f not in HISTORY_FIELDS]
+        if unknown or not selected:
+            raise HTTPException(status_code=400, detail=f"Unknown history fields: {', '.join(unknown)}")
+
+    await run_in_threadpool(history_writer.ensure_flushed, user_id=user.id)
+
+    # Only the requested columns are read, so omitting `result` skips the heavy text entirely.
+    columns = dict.fromkeys(("id", "created_at") + selected)
+    query = select(*[getattr(SearchHistory, c) for c in columns]).where(SearchHistory.user_id == user.id)
+    if level:
+        query = query.where(SearchHistory.search_level == level)
+    if language:
+        code = language[:2].lower()
+        query = query.where(func.lower(SearchHistory.search_language).in_(HISTORY_LANGUAGES[code]))
+    if source:
+        query = query.where(SearchHistory.search_source == source)
+    if cursor:
+        try:
+            after_created_at, after_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(tuple_(SearchHistory.created_at, SearchHistory.id) < tuple_(after_created_at, after_id))
+
+    rows = (await db.execute(query.order_by(SearchHistory.created_at.desc(), SearchHistory.id.desc()).limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return [{f: getattr(row, f) for f in selected} for row in rows]
 
 
 @router.delete("/history/{history_id}")
-def delete_history_item(
+async def delete_history_item(
     history_id: int,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    item = db.query(SearchHistory).filter(SearchHistory.id == history_id, SearchHistory.user_id == user.id).first()
+    await run_in_threadpool(history_writer.ensure_flushed, history_id=history_id)
+    item = await db.scalar(select(SearchHistory).where(SearchHistory.id == history_id, SearchHistory.user_id == user.id))
     if not item:
         raise HTTPException(status_code=404, detail="History item not found")
-    db.delete(item)
-    db.commit()
+    await db.delete(item)
+    await db.execute(decrement_statement(user.id, searches=1, videos_watched=1 if item.video_watched else 0))
+    dirty = mark_dirty_statement(db.get_bind().dialect.name, [item.created_at.date()])
+    if dirty is not None:
+        await db.execute(dirty)
+    await db.commit()
+    dashboard_cache.bump("searches")
     return {"status": "ok"}
 
 
 @router.delete("/history")
-def clear_history(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def clear_history(
+    user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db.query(SearchHistory).filter(SearchHistory.user_id == user.id).delete()
-    db.commit()
+    await run_in_threadpool(history_writer.ensure_flushed, user_id=user.id)
+    dialect_name = db.get_bind().dialect.name
+    days = await db.scalars(select(utc_day(SearchHistory.created_at, dialect_name)).where(SearchHistory.user_id == user.id).distinct())
+    dirty = mark_dirty_statement(dialect_name, days.all())
+    if dirty is not None:
+        await db.execute(dirty)
+    await db.execute(delete(SearchHistory).where(SearchHistory.user_id == user.id))
+    await db.execute(update(UserStats).where(UserStats.user_id == user.id).values(searches=0, videos_watched=0))
+    await db.commit()
+    dashboard_cache.bump("searches")
     return {"status": "ok"}
 
 
 @router.put("/history/{history_id}/feedback")
-def update_feedback(
+async def update_feedback(
     history_id: int,
     feedback_data: FeedbackUpdate,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    item = db.query(SearchHistory).filter(SearchHistory.id == history_id, SearchHistory.user_id == user.id).first()
+    await run_in_threadpool(history_writer.ensure_flushed, history_id=history_id)
+    item = await db.scalar(select(SearchHistory).where(SearchHistory.id == history_id, SearchHistory.user_id == user.id))
     if not item:
         raise HTTPException(status_code=404, detail="History item not found")
 
     item.feedback = feedback_data.feedback
-    db.commit()
+    await db.commit()
     return {"status": "ok", "feedback": item.feedback}
 
 
 @router.post("/history/{history_id}/video")
-def track_video_watched(
+async def track_video_watched(
     history_id: int,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    item = db.query(SearchHistory).filter(SearchHistory.id == history_id, SearchHistory.user_id == user.id).first()
+    await run_in_threadpool(history_writer.ensure_flushed, history_id=history_id)
+    item = await db.scalar(select(SearchHistory).where(SearchHistory.id == history_id, SearchHistory.user_id == user.id))
     if not item:
         raise HTTPException(status_code=404, detail="History item not found")
 
-    item.video_watched = True
-    db.commit()
+    if not item.video_watched:
+        item.video_watched = True
+        dialect_name = db.get_bind().dialect.name
+        await db.execute(increment_statement(dialect_name, {user.id: {"videos_watched": 1}}))
+        dirty = mark_dirty_statement(dialect_name, [item.created_at.date()])
+        if dirty is not None:
+            await db.execute(dirty)
+        await db.commit()
+    dashboard_cache.bump("searches")
     return {"status": "ok", "video_watched": True}
 
 
@@ -203,8 +258,7 @@ async def analyze_image(
     file: UploadFile = File(...),
     language: str = Query("English", pattern="^(English|Telugu|Hindi|en|te|hi)$"),
     level: str = Query(None, pattern="^(easy|medium|hard)$"),
-    user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    user: Optional[Principal] = Depends(get_current_user_optional)
 ):
     try:
         contents = await file.read()
@@ -212,33 +266,40 @@ async def analyze_image(
         lang_map = {"en": "English", "te": "Telugu", "hi": "Hindi"}
         language = lang_map.get(language, language)
         
-        result = llm_service.get_image_explanation(contents, language, level)
+        result = await run_in_threadpool(llm_service.get_image_explanation, contents, language, level)
         
+        if result.get("source") != "error":
+            trends.record_search(
+                normalize_query(result.get("core_term") or result.get("term")),
+                language,
+                user.id if user else None,
+                user.role if user else None
+            )
+
         if user and result.get("source") != "error":
-             history_entry = SearchHistory(
+             result["history_id"] = await run_in_threadpool(
+                history_writer.add,
                 user_id=user.id,
                 query=f"[Image] {result.get('term')}",
+                normalized_query=normalize_query(result.get("term")),
+                core_key=normalize_query(result.get("core_term") or result.get("term")),
                 result=result.get("definition"),
                 search_level=level if level else "easy",
                 search_language=language if language else "en",
                 search_source="image"
             )
-             db.add(history_entry)
-             db.commit()
-             db.refresh(history_entry)
-             result["history_id"] = history_entry.id
 
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/quiz")
-def get_user_quiz(
+async def get_user_quiz(
     language: str = Query("English", pattern="^(English|Telugu|Hindi|en|te|hi)$"),
     level: str = Query("medium", pattern="^(simple|easy|medium|hard)$"),
     topic: Optional[str] = Query(None, description="Specific topic to generate quiz for"),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         lang_map = {"en": "English", "te": "Telugu", "hi": "Hindi"}
@@ -254,17 +315,20 @@ def get_user_quiz(
         if topic and topic.strip():
             unique_terms = [topic.strip()]
         else:
-            history = db.query(SearchHistory).filter(
-                SearchHistory.user_id == user.id,
-                SearchHistory.query.notlike("[%]%")
-            ).order_by(SearchHistory.created_at.desc()).limit(20).all()
+            await run_in_threadpool(history_writer.ensure_flushed, user_id=user.id)
+            history = (await db.scalars(
+                select(SearchHistory.query).where(
+                    SearchHistory.user_id == user.id,
+                    SearchHistory.query.notlike("[%]%")
+                ).order_by(SearchHistory.created_at.desc()).limit(20)
+            )).all()
 
             terms_set = set()
-            for h in history:
-                term = h.query.strip().lower()
+            for query in history:
+                term = query.strip().lower()
                 if term and term not in terms_set:
                     terms_set.add(term)
-                    unique_terms.append(h.query)
+                    unique_terms.append(query)
                 if len(unique_terms) >= 5:
                     break
 
@@ -278,7 +342,7 @@ def get_user_quiz(
         else:
             num_q = 20
 
-        quiz_data = llm_service.generate_quiz(unique_terms, effective_level, language, num_questions=num_q)
+        quiz_data = await run_in_threadpool(llm_service.generate_quiz, unique_terms, effective_level, language, num_questions=num_q)
         
         if quiz_data.get("error"):
             raise HTTPException(status_code=500, detail=quiz_data["error"])
@@ -296,10 +360,10 @@ def get_user_quiz(
 
 
 @router.post("/quiz/results", response_model=QuizResultOut)
-def save_quiz_result(
+async def save_quiz_result(
     result: QuizResultCreate,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         new_result = QuizResult(
@@ -311,8 +375,17 @@ def save_quiz_result(
             time_taken=result.time_taken
         )
         db.add(new_result)
-        db.commit()
-        db.refresh(new_result)
+        await db.execute(increment_statement(db.get_bind().dialect.name, {user.id: {
+            "quiz_attempts": 1,
+            "quiz_score_sum": result.score,
+            "quiz_question_sum": result.total_questions,
+            "quiz_time": result.time_taken or 0,
+        }}))
+        await db.commit()
+        await db.refresh(new_result)
+        leaderboard.record(new_result)
+        trends.record_activity(user.id, user.role)
+        dashboard_cache.bump("quizzes")
         
         return QuizResultOut(
             id=new_result.id,
@@ -329,41 +402,70 @@ def save_quiz_result(
         raise HTTPException(status_code=500, detail="Failed to save quiz score")
 
 
+def _leaderboard_row(entry, names: dict) -> QuizResultOut:
+    return QuizResultOut(
+        id=entry.id,
+        user_id=entry.user_id,
+        username=names.get(entry.user_id) or "Anonymous Researcher",
+        score=entry.score,
+        total_questions=entry.total_questions,
+        difficulty=entry.difficulty,
+        topic=entry.topic,
+        time_taken=entry.time_taken,
+        created_at=entry.created_at
+    )
+
+
+async def _display_names(db: AsyncSession, user_ids) -> dict:
+    rows = (await db.execute(select(User.id, User.username, User.first_name).where(User.id.in_(list(user_ids))))).all()
+    return {row.id: row.username or row.first_name for row in rows}
+
+
+# The leaderboard lists each user's best result and is served from the
+# in-memory boards in utils/leaderboard.py; only the usernames are queried.
 @router.get("/quiz/leaderboard", response_model=List[QuizResultOut])
-def get_quiz_leaderboard(
+async def get_quiz_leaderboard(
     difficulty: Optional[str] = Query(None, description="Filter leaderboard by difficulty"),
-    limit: int = Query(10, description="Number of top scores to return"),
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=100, description="Number of top scores to return"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        query = db.query(QuizResult, User).join(User, QuizResult.user_id == User.id)
-        
-        if difficulty:
-            query = query.filter(QuizResult.difficulty == difficulty)
-            
-        results = query.order_by(
-            (QuizResult.score * 1.0 / QuizResult.total_questions).desc(),
-            QuizResult.total_questions.desc(),
-            QuizResult.created_at.desc()
-        ).limit(limit).all()
-        
-        leaderboard = []
-        for qr, user in results:
-            leaderboard.append(QuizResultOut(
-                id=qr.id,
-                user_id=qr.user_id,
-                username=user.username or user.first_name or "Anonymous Researcher",
-                score=qr.score,
-                total_questions=qr.total_questions,
-                difficulty=qr.difficulty,
-                topic=qr.topic,
-                time_taken=qr.time_taken,
-                created_at=qr.created_at
-            ))
-            
-        return leaderboard
+        if not leaderboard.loaded:
+            await run_in_threadpool(leaderboard.ensure_loaded)
+        names = {}
+        while True:
+            entries = leaderboard.top(difficulty, limit)
+            user_ids = {entry.user_id for entry in entries}
+            if user_ids - names.keys():
+                names.update(await _display_names(db, user_ids - names.keys()))
+            # Results of deleted users are evicted, so the next slice refills the list.
+            deleted = user_ids - names.keys()
+            if not deleted:
+                break
+            leaderboard.discard(deleted)
+        return [_leaderboard_row(entry, names) for entry in entries]
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to fetch leaderboard")
+
+
+@router.get("/quiz/leaderboard/me")
+async def get_my_leaderboard_rank(
+    difficulty: Optional[str] = Query(None, description="Rank on one difficulty's leaderboard"),
+    user: Principal = Depends(get_current_user)
+):
+    try:
+        if not leaderboard.loaded:
+            await run_in_threadpool(leaderboard.ensure_loaded)
+        rank, entry, total = leaderboard.rank(user.id, difficulty)
+        return {
+            "rank": rank,
+            "total": total,
+            "best": _leaderboard_row(entry, {user.id: user.username or user.first_name}) if entry else None
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Failed to fetch leaderboard rank")
+
+
 @router.post("/transcribe")
 async def transcribe(
     file: UploadFile = File(...),
@@ -371,7 +473,7 @@ async def transcribe(
 ):
     try:
         contents = await file.read()
-        result = llm_service.transcribe_audio(contents, language)
+        result = await run_in_threadpool(llm_service.transcribe_audio, contents, language)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,12 +1,66 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import bcrypt
-def hash_password(password: str):
+
+# Work factor for new hashes; existing hashes keep the cost they were created with.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# bcrypt runs on its own small pool so a burst of logins cannot occupy the
+# shared threadpool that serves /search. Work beyond the pool plus
+# BCRYPT_MAX_QUEUE waiting jobs is rejected immediately instead of queueing.
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "2"))
+BCRYPT_MAX_QUEUE = int(os.getenv("BCRYPT_MAX_QUEUE", "16"))
+
+_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_capacity = BCRYPT_WORKERS + BCRYPT_MAX_QUEUE
+_in_flight = 0  # running plus queued bcrypt jobs
+_in_flight_lock = threading.Lock()
+
+
+class PasswordHasherBusy(Exception):
+    """The bcrypt pool and its queue are full; the caller should answer 503."""
+
+
+def _truncate(password: str) -> bytes:
     password_bytes = password.encode('utf-8')
     if len(password_bytes) > 72:
         password_bytes = password_bytes[:72]
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password_bytes, salt).decode('utf-8')
+    return password_bytes
+def hash_password(password: str):
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    return bcrypt.hashpw(_truncate(password), salt).decode('utf-8')
 def verify_password(password: str, hashed: str):
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    return bcrypt.checkpw(password_bytes, hashed.encode('utf-8'))
+    return bcrypt.checkpw(_truncate(password), hashed.encode('utf-8'))
+
+
+async def _run_bcrypt(fn, *args):
+    global _in_flight
+    with _in_flight_lock:
+        if _in_flight >= _capacity:
+            raise PasswordHasherBusy()
+        _in_flight += 1
+    try:
+        return await asyncio.wrap_future(_executor.submit(fn, *args))
+    finally:
+        with _in_flight_lock:
+            _in_flight -= 1
+
+
+async def hash_password_async(password: str):
+    return await _run_bcrypt(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str):
+    return await _run_bcrypt(verify_password, password, hashed)
+
+
+def hasher_stats() -> dict:
+    return {
+        "workers": BCRYPT_WORKERS,
+        "max_queue": BCRYPT_MAX_QUEUE,
+        "rounds": BCRYPT_ROUNDS,
+        "in_flight": _in_flight,
+        "available_slots": _capacity - _in_flight,
+    }
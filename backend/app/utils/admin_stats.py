@@ -0,0 +1,435 @@
+"""Aggregations behind /admin/stats.
+
+`StatsFilter` parses the dashboard's query parameters once and hands out the
+WHERE conditions for each table, so every query applies the same date window,
+role filter, language filter and admin exclusion. Admins are excluded with a
+subquery on users instead of a prior round trip for their ids.
+
+All per-search breakdowns (level, source, language, day, video views) come from
+one scan of search_history: GROUPING SETS on PostgreSQL, elsewhere a grouped
+CTE whose few rows are rolled up with UNION ALL in the same statement. Whole
+days already in the daily rollups (utils/rollups.py) are read from there with
+the same statement shape, so the raw scan only covers the rest of the window.
+Total quiz time is split between the quiz rollups and quiz_results the same way.
+"""
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import String, case, cast, func, literal, null, or_, select, tuple_, union_all
+
+from ..models import AppReview, QuizDailyRollup, QuizResult, SearchDailyRollup, SearchHistory, User, UserStats, quiz_score_ratio
+from .read_replica import on_replica
+from .rollups import rollup_job, utc_day
+
+
+LANGUAGE_CODES = {
+    "english": ["en", "english"],
+    "telugu": ["te", "telugu"],
+    "hindi": ["hi", "hindi"],
+}
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "english": "English",
+    "te": "Telugu",
+    "telugu": "Telugu",
+    "hi": "Hindi",
+    "hindi": "Hindi",
+}
+
+RELATIVE_TIMEFRAMES = {"7d": timedelta(days=7), "30d": timedelta(days=30)}
+
+DAILY_SEARCH_DAYS = 30
+
+
+def _parse_date(value: str):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+
+def _split(value: str, lower: bool = False):
+    if not value:
+        return None
+    items = [item.strip() for item in value.split(",")]
+    return [item.lower() for item in items] if lower else items
+
+
+class StatsFilter:
+    """The /admin/stats filters, parsed once and turned into per-table conditions."""
+    __slots__ = ("start_dt", "end_dt", "roles", "language_codes", "topics", "min_quiz_score", "max_quiz_score", "timeframe")
+
+    def __init__(self, start_dt=None, end_dt=None, roles=None, language_codes=None, topics=None, min_quiz_score=None, max_quiz_score=None, timeframe=None):
+        self.start_dt = start_dt
+        self.end_dt = end_dt
+        self.roles = roles
+        self.language_codes = language_codes
+        self.topics = topics
+        self.min_quiz_score = min_quiz_score
+        self.max_quiz_score = max_quiz_score
+        # "7d"/"30d" when start_dt was derived from a relative timeframe.
+        self.timeframe = timeframe
+
+    @classmethod
+    def from_params(cls, timeframe: str = "all", start_date: str = None, end_date: str = None, roles: str = None,
+                    languages: str = None, topics: str = None, min_quiz_score: int = None, max_quiz_score: int = None):
+        start_dt = _parse_date(start_date) if start_date else None
+        end_dt = _parse_date(end_date) if end_date else None
+        if end_dt:
+            end_dt = end_dt + timedelta(days=1) - timedelta(seconds=1)
+        relative = None
+        if not start_dt and timeframe in RELATIVE_TIMEFRAMES:
+            relative = timeframe
+            start_dt = datetime.utcnow() - RELATIVE_TIMEFRAMES[timeframe]
+
+        language_codes = None
+        parsed_languages = _split(languages, lower=True)
+        if parsed_languages:
+            language_codes = []
+            for language in parsed_languages:
+                language_codes.extend(LANGUAGE_CODES.get(language, [language]))
+
+        return cls(
+            start_dt=start_dt,
+            end_dt=end_dt,
+            roles=_split(roles),
+            language_codes=language_codes,
+            topics=_split(topics, lower=True),
+            min_quiz_score=min_quiz_score,
+            max_quiz_score=max_quiz_score,
+            timeframe=relative,
+        )
+
+    def key(self) -> tuple:
+        """Hashable, order-insensitive identity of the filters (for result caching).
+
+        A relative timeframe is keyed by its name rather than its moving start.
+        """
+        return (
+            self.timeframe,
+            None if self.timeframe else self.start_dt,
+            self.end_dt,
+            tuple(sorted(set(self.roles or ()))),
+            tuple(sorted(set(self.language_codes or ()))),
+            tuple(sorted(set(self.topics or ()))),
+            self.min_quiz_score,
+            self.max_quiz_score,
+        )
+
+    def window(self, column) -> list:
+        conditions = []
+        if self.start_dt:
+            conditions.append(column >= self.start_dt)
+        if self.end_dt:
+            conditions.append(column <= self.end_dt)
+        return conditions
+
+    def audience(self, user_id_column):
+        """Rows of non-admin users (restricted to the selected roles, if any)."""
+        if self.roles:
+            return user_id_column.in_(select(User.id).where(User.role.in_(self.roles), User.role != "admin"))
+        return user_id_column.notin_(select(User.id).where(User.role == "admin"))
+
+    def rollup_span(self, covered_until):
+        """(first day or None, end day) of the whole days in the window that the rollups cover, or None."""
+        first = None
+        if self.start_dt:
+            first = self.start_dt.date()
+            if self.start_dt.time() != time.min:
+                first += timedelta(days=1)
+        end = covered_until
+        if self.end_dt:
+            # An end_date filter ends on the day's last second, which counts as the whole day.
+            last = self.end_dt.date() if self.end_dt.time() >= time(23, 59, 59) else self.end_dt.date() - timedelta(days=1)
+            end = min(end, last + timedelta(days=1))
+        if first is not None and first >= end:
+            return None
+        return first, end
+
+    def outside_span(self, column, span) -> list:
+        """Conditions keeping the raw rows of the window that the rollup span does not cover."""
+        first, end = span
+        after = column >= datetime.combine(end, time.min)
+        if first is None:
+            return [after]
+        return [or_(column < datetime.combine(first, time.min), after)]
+
+    def _rollup_days(self, rollup, span) -> list:
+        first, end = span
+        if self.roles:
+            conditions = [rollup.role.in_(self.roles), rollup.role != "admin"]
+        else:
+            conditions = [or_(rollup.role.is_(None), rollup.role != "admin")]
+        conditions.append(rollup.day < end)
+        if first is not None:
+            conditions.append(rollup.day >= first)
+        return conditions
+
+    def search_rollups(self, span) -> list:
+        conditions = self._rollup_days(SearchDailyRollup, span)
+        if self.language_codes:
+            conditions.append(SearchDailyRollup.language.in_(self.language_codes))
+        return conditions
+
+    def quiz_rollups(self, span) -> list:
+        return self._rollup_days(QuizDailyRollup, span)
+
+    def members(self) -> list:
+        conditions = [User.role != "admin", *self.window(User.created_at)]
+        if self.roles:
+            conditions.append(User.role.in_(self.roles))
+        return conditions
+
+    def reviews(self) -> list:
+        return [self.audience(AppReview.user_id), *self.window(AppReview.created_at)]
+
+    def searches(self) -> list:
+        conditions = [self.audience(SearchHistory.user_id), *self.window(SearchHistory.created_at)]
+        if self.language_codes:
+            conditions.append(func.lower(SearchHistory.search_language).in_(self.language_codes))
+        return conditions
+
+    def quizzes(self) -> list:
+        return [self.audience(QuizResult.user_id), *self.window(QuizResult.created_at)]
+
+    def quiz_scores(self) -> list:
+        conditions = []
+        if self.topics:
+            conditions.append(func.lower(QuizResult.topic).in_(self.topics))
+        if self.min_quiz_score is not None:
+            conditions.append(quiz_score_ratio * 100 >= self.min_quiz_score)
+        if self.max_quiz_score is not None:
+            conditions.append(quiz_score_ratio * 100 <= self.max_quiz_score)
+        return conditions
+
+
+def member_stats(db, flt: StatsFilter) -> dict:
+    rows = (
+        db.query(User.role, func.count(User.id), func.sum(User.time_spent))
+        .filter(*flt.members())
+        .group_by(User.role)
+        .all()
+    )
+    return {
+        "total_members": sum(count for _, count, _ in rows),
+        "roles_stats": [{"name": role or "unknown", "value": count} for role, count, _ in rows],
+        "total_time_spent": sum(time_spent or 0 for _, _, time_spent in rows),
+    }
+
+
+def review_stats(db, flt: StatsFilter) -> dict:
+    total, average = db.query(func.count(AppReview.id), func.avg(AppReview.rating)).filter(*flt.reviews()).one()
+    return {"total_reviews": total, "average_rating": round(average or 0.0, 1)}
+
+
+def _breakdown_statement(dialect_name: str, level, source, language, day, searches, videos, conditions):
+    """(kind, key, searches, video views) rows for each breakdown, plus one "total" row.
+
+    `searches` and `videos` are the aggregates to report: counts over
+    search_history, or sums over the daily rollups.
+    """
+    if dialect_name == "postgresql":
+        # GROUPING(level, source, language, day) is a bitmask of the columns
+        # rolled up in a row, which tells the grouping sets apart.
+        kind = case(
+            {7: "level", 11: "source", 13: "language", 14: "day"},
+            value=func.grouping(level, source, language, day),
+            else_="total",
+        )
+        key = func.coalesce(level, source, language, cast(day, String))
+        return (
+            select(kind, key, searches, videos)
+            .where(*conditions)
+            .group_by(func.grouping_sets(tuple_(level), tuple_(source), tuple_(language), tuple_(day), tuple_()))
+        )
+
+    fine = (
+        select(
+            level.label("level"),
+            source.label("source"),
+            language.label("language"),
+            day.label("day"),
+            searches.label("searches"),
+            videos.label("videos"),
+        )
+        .where(*conditions)
+        .group_by(level, source, language, day)
+        .cte("search_breakdown")
+    )
+    parts = [
+        select(literal(kind), cast(fine.c[kind], String), func.sum(fine.c.searches), func.sum(fine.c.videos)).group_by(fine.c[kind])
+        for kind in ("level", "source", "language", "day")
+    ]
+    parts.append(select(literal("total"), null(), func.sum(fine.c.searches), func.sum(fine.c.videos)))
+    return union_all(*parts)
+
+
+def _raw_breakdown(flt: StatsFilter, dialect_name: str, span=None):
+    conditions = flt.searches()
+    if span:
+        conditions += flt.outside_span(SearchHistory.created_at, span)
+    return _breakdown_statement(
+        dialect_name,
+        SearchHistory.search_level,
+        SearchHistory.search_source,
+        func.lower(SearchHistory.search_language),
+        utc_day(SearchHistory.created_at, dialect_name),
+        func.count(),
+        func.sum(case((SearchHistory.video_watched == True, 1), else_=0)),
+        conditions,
+    )
+
+
+def _rollup_breakdown(flt: StatsFilter, dialect_name: str, span):
+    return _breakdown_statement(
+        dialect_name,
+        SearchDailyRollup.level,
+        SearchDailyRollup.source,
+        SearchDailyRollup.language,
+        SearchDailyRollup.day,
+        func.sum(SearchDailyRollup.searches),
+        func.sum(SearchDailyRollup.video_views),
+        flt.search_rollups(span),
+    )
+
+
+def search_breakdown(db, flt: StatsFilter, covered_until=None) -> dict:
+    """Level, source, language, day and video counts.
+
+    Whole days before `covered_until` come from the daily rollups, the rest of
+    the window from search_history.
+    """
+    dialect_name = db.get_bind().dialect.name
+    span = flt.rollup_span(covered_until) if covered_until else None
+    statements = [_raw_breakdown(flt, dialect_name, span)]
+    if span:
+        statements.append(_rollup_breakdown(flt, dialect_name, span))
+
+    levels, sources, languages, days = {}, {}, {}, {}
+    video_views = 0
+    groups = {"level": levels, "source": sources, "language": languages, "day": days}
+    for statement in statements:
+        for kind, key, searches, videos in db.execute(statement):
+            if kind == "total":
+                video_views += videos or 0
+            else:
+                groups[kind][key] = groups[kind].get(key, 0) + (searches or 0)
+
+    language_totals = {}
+    for code, count in languages.items():
+        name = LANGUAGE_NAMES.get((code or "").strip().lower())
+        if name:
+            language_totals[name] = language_totals.get(name, 0) + count
+
+    recent_days = sorted((day for day in days if day is not None), reverse=True)[:DAILY_SEARCH_DAYS]
+    return {
+        "level_stats": [{"name": level or "unknown", "value": count} for level, count in levels.items()],
+        "source_stats": [{"name": source or "unknown", "value": count} for source, count in sources.items()],
+        "language_stats": [{"name": name, "value": count} for name, count in language_totals.items()],
+        "daily_searches": [{"date": str(day), "count": days[day]} for day in reversed(recent_days)],
+        "total_video_views": video_views,
+    }
+
+
+def top_search_terms(db, flt: StatsFilter, limit: int = 5) -> list:
+    """The `limit` most searched terms in the window, counted exactly.
+
+    Searches are grouped by the core term they resolved to, so spellings and
+    phrasings of one concept ("photosynthesis", "Photosynthesis process")
+    count together. Rows written before core_key existed fall back to their
+    normalized query, and rows older than that to the raw query.
+    """
+    term_key = func.coalesce(
+        SearchHistory.core_key,
+        SearchHistory.normalized_query,
+        func.lower(func.trim(SearchHistory.query)),
+    )
+    count = func.count(SearchHistory.id)
+    rows = (
+        db.query(term_key.label("word"), count.label("count"))
+        .filter(*flt.searches())
+        .group_by(term_key)
+        .order_by(count.desc(), term_key)
+        .limit(limit)
+        .all()
+    )
+    return [{"word": word, "count": count} for word, count in rows]
+
+
+def quiz_stats(db, flt: StatsFilter, covered_until=None) -> dict:
+    """Quiz time and the number of quiz takers.
+
+    Quiz time covers every quiz in the window (the topic and score filters
+    only narrow down which users count as quiz takers), so whole days before
+    `covered_until` are summed from the daily rollups and only the rest from
+    quiz_results. Takers are distinct users, which do not add up across
+    days: without a window or score filter they are counted from user_stats,
+    otherwise from quiz_results.
+    """
+    span = flt.rollup_span(covered_until) if covered_until else None
+    raw = flt.quizzes() + (flt.outside_span(QuizResult.created_at, span) if span else [])
+    total_time = db.query(func.sum(QuizResult.time_taken)).filter(*raw).scalar() or 0
+    if span:
+        total_time += db.query(func.sum(QuizDailyRollup.time_taken)).filter(*flt.quiz_rollups(span)).scalar() or 0
+
+    scored = flt.quiz_scores()
+    if scored or flt.start_dt or flt.end_dt:
+        total_users = (
+            db.query(func.count(func.distinct(QuizResult.user_id)))
+            .filter(*flt.quizzes(), *scored)
+            .scalar()
+        )
+    else:
+        total_users = db.query(func.count()).filter(UserStats.quiz_attempts > 0, flt.audience(UserStats.user_id)).scalar()
+    return {"total_quiz_time": total_time, "total_quiz_users": total_users or 0}
+
+
+def top_quizzers(db, flt: StatsFilter, limit: int = 10) -> list:
+    top_quizzes_data = (
+        db.query(QuizResult, User)
+        .join(User, QuizResult.user_id == User.id)
+        .filter(*flt.quizzes(), *flt.quiz_scores())
+        .order_by(quiz_score_ratio.desc(), QuizResult.total_questions.desc(), QuizResult.created_at.desc())
+        .limit(100)
+        .all()
+    )
+
+    quizzers = []
+    seen_users = set()
+    for qr, u in top_quizzes_data:
+        if u.id in seen_users:
+            continue
+        seen_users.add(u.id)
+        quizzers.append({
+            "user_id": u.id,
+            "username": u.username or u.first_name or "Anonymous",
+            "score": f"{qr.score}/{qr.total_questions}",
+            "percentage": round((qr.score / qr.total_questions) * 100) if qr.total_questions > 0 else 0
+        })
+        if len(quizzers) >= limit:
+            break
+    return quizzers
+
+
+def compute_stats(db, flt: StatsFilter, top_terms: int = 5) -> dict:
+    members = member_stats(db, flt)
+    reviews = review_stats(db, flt)
+    covered_until = rollup_job.covered_until(db if on_replica(db) else None)
+    searches = search_breakdown(db, flt, covered_until)
+    quizzes = quiz_stats(db, flt, covered_until)
+    return {
+        "total_members": members["total_members"],
+        "total_reviews": reviews["total_reviews"],
+        "average_rating": reviews["average_rating"],
+        "most_searched_words": top_search_terms(db, flt, top_terms),
+        "level_stats": searches["level_stats"],
+        "source_stats": searches["source_stats"],
+        "language_stats": searches["language_stats"],
+        "roles_stats": members["roles_stats"],
+        "daily_searches": searches["daily_searches"],
+        "total_time_spent": members["total_time_spent"],
+        "total_quiz_time": quizzes["total_quiz_time"],
+        "total_quiz_users": quizzes["total_quiz_users"],
+        "total_video_views": searches["total_video_views"],
+        "top_quizzers": top_quizzers(db, flt),
+    }
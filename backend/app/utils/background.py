@@ -0,0 +1,50 @@
+import threading
+
+
+class PeriodicFlusher:
+    """Base for in-memory buffers that are written to the database in batches.
+
+    Subclasses implement `flush()`. A daemon thread calls it every `interval`
+    seconds, or sooner after `wake()` (e.g. when a buffer reaches its size
+    trigger). The thread is started on first use; `stop()` ends it and runs a
+    final flush, and is called from the app's shutdown hook.
+    """
+    def __init__(self, name: str, interval: float):
+        self.name = name
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def flush(self):
+        raise NotImplementedError
+
+    def wake(self):
+        self._wake.set()
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._stopping or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ERROR] {self.name} flush failed: {e}")
+
+    def stop(self, timeout: float = 10):
+        """Stop the worker and flush whatever is still buffered."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Small thread-safe LRU cache with a per-entry time-to-live.
+
+    Route handlers run in the threadpool, so every access takes the lock.
+    Hit/miss counters are kept so cache effectiveness can be reported.
+    """
+    def __init__(self, maxsize: int = 1000, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, stored_at = item
+            if time.time() - stored_at > self.ttl:
+                # Expired entries stay until evicted so get_stale() can still serve them.
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key):
+        """Return the value for `key` even if its TTL has passed (None if evicted)."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            self.stale_hits += 1
+            return item[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        """True if `key` is held, fresh or expired; does not touch the counters."""
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,52 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """Stops calling a failing upstream for a while instead of waiting on every request.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    `allow_request()` returns False until `reset_timeout` seconds have passed.
+    Then a single trial call is let through (half-open); its outcome closes or
+    re-opens the circuit.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None and time.time() - self._opened_at < self.reset_timeout
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.time() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.time()
+
+    def stats(self) -> dict:
+        return {
+            "state": "open" if self.is_open else "closed",
+            "consecutive_failures": self._failures,
+        }
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import threading
+
+from .cache import TTLCache
+
+
+class DashboardCache:
+    """Results of the admin dashboard endpoints, keyed by their normalized filters.
+
+    Each entry also records the version of every table it was computed from.
+    Writes call `bump()` for the tables they change (search history, quizzes,
+    reviews, users), which makes every entry built on the old version
+    unreachable, so a dashboard never shows data older than this process's
+    last write. Writes made by other workers are picked up when the entry
+    expires after ADMIN_CACHE_TTL seconds.
+
+    Every result carries an ETag (a hash of its content); a request whose
+    If-None-Match still matches is answered with 304.
+    """
+    TABLES = ("searches", "quizzes", "reviews", "users")
+
+    def __init__(self):
+        self._results = TTLCache(
+            maxsize=int(os.getenv("ADMIN_CACHE_SIZE", "256")),
+            ttl=float(os.getenv("ADMIN_CACHE_TTL", "30"))
+        )
+        self._lock = threading.Lock()
+        self._versions = dict.fromkeys(self.TABLES, 0)
+
+    def bump(self, *tables: str):
+        with self._lock:
+            for table in tables:
+                self._versions[table] += 1
+
+    def _snapshot(self, tables) -> tuple:
+        with self._lock:
+            return tuple(self._versions[table] for table in tables)
+
+    def get_or_compute(self, name: str, key: tuple, tables, compute):
+        """Return (result, etag) for `name` under filter `key`, computing it on a miss."""
+        # The versions are read before computing, so a write that lands during
+        # the computation leaves this entry under an already outdated key.
+        cache_key = (name, key, self._snapshot(tables))
+        cached = self._results.get(cache_key)
+        if cached is not None:
+            return cached
+        result = compute()
+        entry = (result, etag_for(result))
+        self._results.set(cache_key, entry)
+        return entry
+
+    def clear(self):
+        self._results.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            versions = dict(self._versions)
+        return {**self._results.stats(), "versions": versions}
+
+
+def etag_for(result) -> str:
+    body = json.dumps(result, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        # If-None-Match uses weak comparison, so W/"x" matches "x".
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+dashboard_cache = DashboardCache()
@@ -0,0 +1,149 @@
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from ..database import SessionLocal
+from ..models import Explanation, ExplanationAlias
+from .cache import TTLCache
+
+
+class ExplanationStore:
+    """Explanations keyed by the LLM's English `core_term`, one variant per language.
+
+    A search in any language resolves to a core term (directly, or through an
+    alias learned from an earlier search). If that concept was already explained
+    in another language, the caller only needs a translation instead of a fresh
+    generation. The database is the source of truth; small in-process caches sit
+    in front of it. Storage errors are logged and treated as misses so search
+    never fails because of the store.
+    """
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        cache_size = int(os.getenv("EXPLANATION_STORE_CACHE_SIZE", "5000"))
+        self._variants = TTLCache(maxsize=cache_size, ttl=3600)
+        self._aliases = TTLCache(maxsize=cache_size, ttl=3600)
+
+    def resolve(self, query_key: str):
+        """Return (core_key, is_corrected) for a normalized query, or (None, False)."""
+        alias = self._aliases.get(query_key)
+        if alias is None:
+            db = self.session_factory()
+            try:
+                row = db.query(ExplanationAlias).filter(ExplanationAlias.query_key == query_key).first()
+                if row:
+                    alias = (row.core_key, bool(row.is_corrected))
+                    self._aliases.set(query_key, alias)
+            except Exception as e:
+                print(f"[ERROR] Explanation alias lookup failed: {e}")
+            finally:
+                db.close()
+        return alias or (None, False)
+
+    def get_variant(self, core_key: str, language: str):
+        """Stored explanation for `core_key` in `language`, or None."""
+        key = f"{core_key}:{language.lower()}"
+        payload = self._variants.get(key)
+        if payload is None:
+            db = self.session_factory()
+            try:
+                row = (
+                    db.query(Explanation)
+                    .filter(Explanation.core_key == core_key, Explanation.language == language.lower())
+                    .first()
+                )
+                if row:
+                    payload = json.loads(row.payload)
+                    if "generated_at" not in payload and row.created_at:
+                        payload["generated_at"] = (row.created_at - datetime(1970, 1, 1)).total_seconds()
+                    self._variants.set(key, payload)
+            except Exception as e:
+                print(f"[ERROR] Explanation lookup failed: {e}")
+            finally:
+                db.close()
+        return payload
+
+    def get_canonical(self, core_key: str, exclude_language: str = None):
+        """Best variant to translate from: English first, then any other language.
+
+        Returns (language, payload) or (None, None).
+        """
+        db = self.session_factory()
+        try:
+            rows = db.query(Explanation.language).filter(Explanation.core_key == core_key).all()
+            languages = [r[0] for r in rows if r[0] != (exclude_language or "").lower()]
+        except Exception as e:
+            print(f"[ERROR] Explanation lookup failed: {e}")
+            languages = []
+        finally:
+            db.close()
+
+        if not languages:
+            return None, None
+        language = "english" if "english" in languages else languages[0]
+        return language, self.get_variant(core_key, language)
+
+    def save(self, query_key: str, core_key: str, language: str, payload: dict, source: str = "generated", is_corrected: bool = False, replace: bool = False):
+        """Store a variant and remember that `query_key` resolves to it.
+
+        An existing variant is kept unless `replace` is set (used when a stale
+        explanation has been regenerated). A query that already has an alias
+        is stored under the core term the alias points at. Otherwise, when the
+        core term already has a variant in this language, the query is aliased
+        to it only if the query is that core term itself or the payload was
+        translated from that core term's explanation; any other explanation is
+        stored under the query's own key, so a coarse core term ("cell" for
+        "cell structure") never serves one question another's answer and the
+        generation is not thrown away. The caches are updated with what the
+        database ends up holding, so every process serves the same payload.
+        """
+        language = language.lower()
+        stored = {k: v for k, v in payload.items() if k not in ("time_ms", "source", "stale")}
+
+        db = self.session_factory()
+        try:
+            existing_alias = db.query(ExplanationAlias).filter(ExplanationAlias.query_key == query_key).first()
+            if existing_alias:
+                # A query keeps resolving where it already does.
+                core_key = existing_alias.core_key
+            variant = stored
+            existing = self._find(db, core_key, language)
+            if existing and not replace and not existing_alias and query_key != core_key and source != "translated":
+                core_key = query_key
+                existing = self._find(db, core_key, language)
+            if not existing:
+                db.add(Explanation(core_key=core_key, language=language, payload=json.dumps(stored, ensure_ascii=False), source=source))
+            elif replace:
+                existing.payload = json.dumps(stored, ensure_ascii=False)
+                existing.source = source
+                existing.created_at = datetime.utcnow()
+            else:
+                variant = json.loads(existing.payload)
+                if "generated_at" not in variant and existing.created_at:
+                    variant["generated_at"] = (existing.created_at - datetime(1970, 1, 1)).total_seconds()
+            if existing_alias:
+                alias = (existing_alias.core_key, bool(existing_alias.is_corrected))
+            else:
+                alias = (core_key, is_corrected)
+                db.add(ExplanationAlias(query_key=query_key, core_key=core_key, is_corrected=is_corrected))
+            db.commit()
+        except IntegrityError:
+            # Another worker stored the same concept first; theirs is as good
+            # as ours and is loaded from the database on the next lookup.
+            db.rollback()
+            return
+        except Exception as e:
+            db.rollback()
+            print(f"[ERROR] Failed to store explanation for '{core_key}': {e}")
+            return
+        finally:
+            db.close()
+        self._variants.set(f"{core_key}:{language}", variant)
+        self._aliases.set(query_key, alias)
+
+    @staticmethod
+    def _find(db, core_key: str, language: str):
+        return db.query(Explanation).filter(Explanation.core_key == core_key, Explanation.language == language).first()
+
+explanation_store = ExplanationStore()
@@ -0,0 +1,227 @@
+"""Background export jobs: the admin export datasets written to files on disk.
+
+A job writes every section of `utils.exports` (users, leaderboard,
+quiz_results, search_analytics) for one filter set, as gzipped CSV or as
+Parquet (zstd-compressed, needs the optional `pyarrow` package), one file per
+section under EXPORT_DIR/<job id>/. Rows are streamed from the database and
+written in batches, so a job's memory does not grow with the export.
+
+The job id is derived from the filter set and format, and the job's state is
+kept in a JSON manifest next to its files. Any app process on the same host
+can therefore report progress and serve downloads. Requesting a filter set
+that is already exported (or still running) returns the existing job. Finished
+exports are reused for EXPORT_JOB_TTL seconds and then deleted.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .read_replica import read_session
+from .exports import COLUMNS, ROWS, SECTIONS, ExportFilter, count_rows, csv_chunks
+
+
+DEFAULT_EXPORT_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "exports"
+FORMATS = {"csv": "csv.gz", "parquet": "parquet"}
+INTEGER_COLUMNS = {"rank", "id", "total_quizzes_attempted", "time_spent", "score", "total_marks", "time_taken", "result_count"}
+FLOAT_COLUMNS = {"accuracy"}
+
+
+class ExportUnavailable(Exception):
+    """The requested export format cannot be produced in this deployment."""
+
+
+class ExportJobs:
+    def __init__(self, session_factory=read_session):
+        self.session_factory = session_factory
+        self.directory = Path(os.getenv("EXPORT_DIR", str(DEFAULT_EXPORT_DIR)))
+        self.ttl = float(os.getenv("EXPORT_JOB_TTL", "3600"))
+        # A running job whose manifest has not been touched for this long
+        # belongs to a process that died; asking for it again restarts it.
+        self.stall_timeout = float(os.getenv("EXPORT_JOB_STALL_TIMEOUT", "120"))
+        self._executor = ThreadPoolExecutor(max_workers=int(os.getenv("EXPORT_WORKERS", "1")), thread_name_prefix="export")
+        self._lock = threading.Lock()
+        self.started = 0
+        self.reused = 0
+        self.failed = 0
+
+    @staticmethod
+    def job_id(params: dict, format: str) -> str:
+        body = json.dumps({"params": params, "format": format}, sort_keys=True, default=str)
+        return hashlib.sha1(body.encode()).hexdigest()[:20]
+
+    def submit(self, params: dict, format: str) -> dict:
+        """Start (or reuse) the export of `params` (the export_data query parameters) in `format`."""
+        if format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ExportUnavailable("Parquet exports need the pyarrow package")
+        self.cleanup()
+        job_id = self.job_id(params, format)
+        with self._lock:
+            job = self.get(job_id)
+            if job and (job["status"] == "done" or (job["status"] in ("queued", "running") and not self._stalled(job))):
+                self.reused += 1
+                return job
+            job_dir = self.directory / job_id
+            shutil.rmtree(job_dir, ignore_errors=True)
+            job_dir.mkdir(parents=True, exist_ok=True)
+            job = {
+                "id": job_id,
+                "status": "queued",
+                "format": format,
+                "params": params,
+                "created_at": time.time(),
+                "updated_at": time.time(),
+                "finished_at": None,
+                "error": None,
+                "rows_total": None,
+                "rows_written": 0,
+                "sections": {
+                    name: {"file": f"{name}.{FORMATS[format]}", "rows": 0, "bytes": 0, "done": False}
+                    for name in SECTIONS
+                },
+            }
+            self._save(job)
+            self.started += 1
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str):
+        """The job's manifest, or None if there is no such (unexpired) job."""
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self.directory / job_id / "job.json", encoding="utf-8") as manifest:
+                return json.load(manifest)
+        except (OSError, ValueError):
+            return None
+
+    def file_path(self, job_id: str, section: str):
+        """Path of a finished job's section file, or None."""
+        job = self.get(job_id)
+        if not job or job["status"] != "done" or section not in job["sections"]:
+            return None
+        path = self.directory / job_id / job["sections"][section]["file"]
+        return path if path.exists() else None
+
+    def _stalled(self, job: dict) -> bool:
+        return time.time() - job["updated_at"] > self.stall_timeout
+
+    def _save(self, job: dict):
+        job["updated_at"] = time.time()
+        job_dir = self.directory / job["id"]
+        temp = job_dir / f"job.json.{os.getpid()}.{threading.get_ident()}"
+        with open(temp, "w", encoding="utf-8") as manifest:
+            json.dump(job, manifest)
+        # Atomic, so readers in other processes never see a partial manifest.
+        os.replace(temp, job_dir / "job.json")
+
+    def _run(self, job: dict):
+        flt = ExportFilter.from_params(**job["params"])
+        job["status"] = "running"
+        self._save(job)
+        db = self.session_factory()
+        try:
+            job["rows_total"] = sum(count_rows(db, name, flt) for name in SECTIONS)
+            self._save(job)
+            for name in SECTIONS:
+                section = job["sections"][name]
+                path = self.directory / job["id"] / section["file"]
+                partial = path.with_name(path.name + ".part")
+                writer = self._write_csv if job["format"] == "csv" else self._write_parquet
+                writer(partial, name, ROWS[name](db, flt), job, section)
+                os.replace(partial, path)
+                section["bytes"] = path.stat().st_size
+                section["done"] = True
+                self._save(job)
+            job["status"] = "done"
+            job["finished_at"] = time.time()
+        except Exception as e:
+            print(f"[ERROR] Export job {job['id']} failed: {e}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+            self.failed += 1
+        finally:
+            db.close()
+            self._save(job)
+
+    def _progress(self, job: dict, section: dict, rows: int):
+        section["rows"] += rows
+        job["rows_written"] += rows
+        if time.time() - job["updated_at"] >= 1:
+            self._save(job)
+
+    def _write_csv(self, path: Path, name: str, rows, job: dict, section: dict):
+        with gzip.open(path, "wb") as out:
+            counted = _Counter(rows)
+            for chunk in csv_chunks(counted, COLUMNS[name], rows_per_chunk=1000):
+                out.write(chunk)
+                if counted.pending:
+                    self._progress(job, section, counted.take())
+
+    def _write_parquet(self, path: Path, name: str, rows, job: dict, section: dict):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            (column, pa.int64() if column in INTEGER_COLUMNS else pa.float64() if column in FLOAT_COLUMNS else pa.string())
+            for column in COLUMNS[name]
+        ])
+        batch = []
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= 10000:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                    self._progress(job, section, len(batch))
+                    batch = []
+            if batch:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                self._progress(job, section, len(batch))
+
+    def cleanup(self):
+        """Delete exports that finished more than EXPORT_JOB_TTL seconds ago."""
+        if not self.directory.exists():
+            return
+        for job_dir in self.directory.iterdir():
+            job = self.get(job_dir.name) if job_dir.is_dir() else None
+            if job is None:
+                continue
+            expired = job["status"] in ("done", "failed") and time.time() - (job["finished_at"] or job["updated_at"]) > self.ttl
+            if expired:
+                shutil.rmtree(job_dir, ignore_errors=True)
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "reused": self.reused,
+            "failed": self.failed,
+            "directory": str(self.directory),
+            "ttl_seconds": self.ttl,
+        }
+
+
+class _Counter:
+    """Passes rows through, counting them for progress reports."""
+    def __init__(self, rows):
+        self._rows = rows
+        self.pending = 0
+
+    def __iter__(self):
+        for row in self._rows:
+            self.pending += 1
+            yield row
+
+    def take(self) -> int:
+        pending, self.pending = self.pending, 0
+        return pending
+
+
+export_jobs = ExportJobs()
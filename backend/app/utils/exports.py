@@ -0,0 +1,272 @@
+"""Row streams behind the admin data export.
+
+Each section (users, leaderboard, quiz_results, search_analytics) is produced
+by one query executed with `stream_results` and `yield_per`, so on PostgreSQL
+rows arrive through a server-side cursor in batches of EXPORT_BATCH_SIZE and
+memory stays flat however large the export. Per-user totals come from
+user_stats rather than from aggregating each user's quiz results.
+
+The writers turn a row stream into CSV or NDJSON chunks, optionally gzipped
+on the fly.
+"""
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, literal_column, select
+
+from ..models import QuizResult, SearchHistory, User, UserStats, quiz_score_ratio
+
+
+BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+COLUMNS = {
+    "users": ("id", "name", "email", "role", "joined_date", "last_login", "total_quizzes_attempted", "average_score", "time_spent", "accuracy"),
+    "leaderboard": ("rank", "id", "name", "email", "role", "joined_date", "last_login", "total_quizzes_attempted", "average_score", "time_spent", "accuracy"),
+    "quiz_results": ("user_name", "quiz_name", "category", "score", "total_marks", "percentage", "time_taken", "attempt_date", "status"),
+    "search_analytics": ("search_query", "user", "language", "date", "result_count", "difficulty_level"),
+}
+SECTIONS = tuple(COLUMNS)
+
+
+class ExportFilter:
+    """The export's query parameters, parsed once (same rules as the JSON export has always used)."""
+    __slots__ = ("start_dt", "end_dt", "roles", "languages", "min_quiz_score", "max_quiz_score")
+
+    def __init__(self, start_dt=None, end_dt=None, roles=None, languages=None, min_quiz_score=None, max_quiz_score=None):
+        self.start_dt = start_dt
+        self.end_dt = end_dt
+        self.roles = roles
+        self.languages = languages
+        self.min_quiz_score = min_quiz_score
+        self.max_quiz_score = max_quiz_score
+
+    @classmethod
+    def from_params(cls, timeframe="all", start_date=None, end_date=None, roles=None, languages=None,
+                    min_quiz_score=None, max_quiz_score=None):
+        start_dt, end_dt = None, None
+        if start_date:
+            try:
+                start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+            except ValueError:
+                pass
+        if end_date:
+            try:
+                end_dt = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1) - timedelta(seconds=1)
+            except ValueError:
+                pass
+        if not start_dt:
+            if timeframe == "7d":
+                start_dt = datetime.utcnow() - timedelta(days=7)
+            elif timeframe == "30d":
+                start_dt = datetime.utcnow() - timedelta(days=30)
+
+        language_codes = []
+        for language in (l.strip().lower() for l in languages.split(",")) if languages else ():
+            if language == "english":
+                language_codes.extend(["en", "english"])
+            elif language == "telugu":
+                language_codes.extend(["te", "telugu"])
+            elif language == "hindi":
+                language_codes.extend(["hi", "hindi"])
+            else:
+                language_codes.append(language)
+
+        return cls(
+            start_dt=start_dt,
+            end_dt=end_dt,
+            roles=sorted(r.strip() for r in roles.split(",")) if roles else None,
+            languages=sorted(set(language_codes)) or None,
+            min_quiz_score=min_quiz_score,
+            max_quiz_score=max_quiz_score,
+        )
+
+    def key(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+
+def _timestamp(value) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else "N/A"
+
+
+def _stream(db, statement):
+    return db.execute(statement.execution_options(stream_results=True, yield_per=BATCH_SIZE))
+
+
+def _users_statement(flt: ExportFilter):
+    # 100.0 as a literal keeps the division numeric on PostgreSQL (round()
+    # has no double precision overload) and real on SQLite.
+    accuracy = func.round(UserStats.quiz_score_sum * literal_column("100.0") / func.nullif(UserStats.quiz_question_sum, 0), 1)
+    statement = (
+        select(
+            User.id, User.username, User.first_name, User.email, User.role, User.created_at, User.time_spent,
+            func.coalesce(UserStats.quiz_attempts, 0).label("attempts"),
+            accuracy.label("accuracy"),
+        )
+        .outerjoin(UserStats, UserStats.user_id == User.id)
+        .where(User.role != "admin")
+    )
+    if flt.start_dt:
+        statement = statement.where(User.created_at >= flt.start_dt)
+    if flt.end_dt:
+        statement = statement.where(User.created_at <= flt.end_dt)
+    if flt.roles:
+        statement = statement.where(User.role.in_(flt.roles))
+    return statement, accuracy
+
+
+def _user_row(row) -> dict:
+    accuracy = float(row.accuracy) if row.accuracy is not None else 0
+    return {
+        "id": row.id,
+        "name": row.username or row.first_name or "Anonymous",
+        "email": row.email or "N/A",
+        "role": row.role or "user",
+        "joined_date": _timestamp(row.created_at),
+        "last_login": "N/A",
+        "total_quizzes_attempted": row.attempts,
+        "average_score": f"{accuracy}%",
+        "time_spent": row.time_spent or 0,
+        "accuracy": accuracy,
+    }
+
+
+def iter_users(db, flt: ExportFilter):
+    statement, _ = _users_statement(flt)
+    for row in _stream(db, statement.order_by(User.id)):
+        yield _user_row(row)
+
+
+def iter_leaderboard(db, flt: ExportFilter):
+    statement, accuracy = _users_statement(flt)
+    ordered = statement.order_by(func.coalesce(accuracy, 0).desc(), func.coalesce(UserStats.quiz_attempts, 0).desc(), User.id)
+    for rank, row in enumerate(_stream(db, ordered), start=1):
+        yield {"rank": rank, **_user_row(row)}
+
+
+def _quiz_results_statement(flt: ExportFilter):
+    statement = (
+        select(
+            QuizResult.score, QuizResult.total_questions, QuizResult.topic, QuizResult.time_taken, QuizResult.created_at,
+            User.username, User.first_name,
+        )
+        .join(User, QuizResult.user_id == User.id)
+        .where(User.role != "admin")
+    )
+    if flt.start_dt:
+        statement = statement.where(QuizResult.created_at >= flt.start_dt)
+    if flt.end_dt:
+        statement = statement.where(QuizResult.created_at <= flt.end_dt)
+    if flt.roles:
+        statement = statement.where(User.role.in_(flt.roles))
+    if flt.min_quiz_score is not None:
+        statement = statement.where(quiz_score_ratio * 100 >= flt.min_quiz_score)
+    if flt.max_quiz_score is not None:
+        statement = statement.where(quiz_score_ratio * 100 <= flt.max_quiz_score)
+    return statement
+
+
+def iter_quiz_results(db, flt: ExportFilter):
+    for row in _stream(db, _quiz_results_statement(flt).order_by(QuizResult.id)):
+        pct = (row.score / row.total_questions * 100) if row.total_questions > 0 else 0
+        yield {
+            "user_name": row.username or row.first_name or "Anonymous",
+            "quiz_name": "General Quiz",
+            "category": (row.topic or "Mixed").capitalize().replace("_", " "),
+            "score": row.score,
+            "total_marks": row.total_questions,
+            "percentage": f"{round(pct, 1)}%",
+            "time_taken": row.time_taken,
+            "attempt_date": _timestamp(row.created_at),
+            "status": "Pass" if pct >= 50 else "Fail",
+        }
+
+
+def _search_analytics_statement(flt: ExportFilter):
+    statement = (
+        select(
+            SearchHistory.query, SearchHistory.search_language, SearchHistory.created_at, SearchHistory.search_level,
+            User.username, User.first_name,
+        )
+        .join(User, SearchHistory.user_id == User.id)
+        .where(User.role != "admin")
+    )
+    if flt.start_dt:
+        statement = statement.where(SearchHistory.created_at >= flt.start_dt)
+    if flt.end_dt:
+        statement = statement.where(SearchHistory.created_at <= flt.end_dt)
+    if flt.roles:
+        statement = statement.where(User.role.in_(flt.roles))
+    if flt.languages:
+        statement = statement.where(func.lower(SearchHistory.search_language).in_(flt.languages))
+    return statement
+
+
+def iter_search_analytics(db, flt: ExportFilter):
+    for row in _stream(db, _search_analytics_statement(flt).order_by(SearchHistory.id)):
+        yield {
+            "search_query": row.query,
+            "user": row.username or row.first_name or "Anonymous",
+            "language": row.search_language or "en",
+            "date": _timestamp(row.created_at),
+            "result_count": 1,
+            "difficulty_level": row.search_level or "Beginner",
+        }
+
+
+ROWS = {
+    "users": iter_users,
+    "leaderboard": iter_leaderboard,
+    "quiz_results": iter_quiz_results,
+    "search_analytics": iter_search_analytics,
+}
+
+
+def count_rows(db, section: str, flt: ExportFilter) -> int:
+    """Number of rows `ROWS[section]` will produce."""
+    if section in ("users", "leaderboard"):
+        statement = _users_statement(flt)[0]
+    elif section == "quiz_results":
+        statement = _quiz_results_statement(flt)
+    else:
+        statement = _search_analytics_statement(flt)
+    return db.scalar(select(func.count()).select_from(statement.subquery()))
+
+
+def csv_chunks(rows, columns, rows_per_chunk: int = 500):
+    """CSV text (header first) in chunks of `rows_per_chunk` rows."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(rows, rows_per_chunk: int = 500):
+    """One JSON object per line, in chunks of `rows_per_chunk` rows."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False, default=str))
+        if len(lines) >= rows_per_chunk:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def gzip_chunks(chunks, level: int = 6):
+    """Gzip a byte stream incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
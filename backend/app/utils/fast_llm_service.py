@@ -1,11 +1,16 @@
 import os
 import json
 import time
-import base64
-import requests
 import re
-from groq import Groq
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from .cache import TTLCache
+from .circuit_breaker import CircuitBreaker
+from .explanation_store import explanation_store
+from .glossary import get_glossary
+from .prefetch import RelatedWordPrefetcher
+from .query_normalizer import explanation_cache_key, normalize_query
 load_dotenv()
 
 class FastLLMService:
@@ -14,9 +19,62 @@ class FastLLMService:
         self.api_key = os.getenv("GROQ_API_KEY")
         if not self.api_key:
             print("[ERROR] GROQ_API_KEY not found in environment!")
-        self.client = Groq(api_key=self.api_key)
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._http = None
         self.text_model = "llama-3.3-70b-versatile"
         self.fast_text_model = "llama-3.1-8b-instant"
+        self.explanation_cache = TTLCache(
+            maxsize=int(os.getenv("EXPLANATION_CACHE_SIZE", "2000")),
+            ttl=int(os.getenv("EXPLANATION_CACHE_TTL", "86400"))
+        )
+        self.explanation_ttl = int(os.getenv("EXPLANATION_TTL", str(7 * 86400)))
+        self.explanation_max_stale = int(os.getenv("EXPLANATION_MAX_STALE", str(30 * 86400)))
+        self.circuit = CircuitBreaker(
+            failure_threshold=int(os.getenv("GROQ_CIRCUIT_FAILURES", "5")),
+            reset_timeout=int(os.getenv("GROQ_CIRCUIT_RESET_SECONDS", "30"))
+        )
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="explanation-refresh")
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._usage = threading.local()
+        self.inflight = 0
+        self._inflight_lock = threading.Lock()
+        self.prefetcher = RelatedWordPrefetcher(self)
+
+    @property
+    def client(self):
+        """Groq client, built on first use so importing the app stays cheap.
+
+        The SDK (and its HTTP stack) is only imported here, keeping it off the
+        cold-start path of workers that have not served an LLM request yet.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from groq import Groq
+                    # A short timeout lets slow calls fall through to the cache/glossary
+                    # fallbacks instead of holding the request for the SDK's default minute.
+                    self._client = Groq(
+                        api_key=self.api_key,
+                        timeout=float(os.getenv("GROQ_TIMEOUT_SECONDS", "10")),
+                        max_retries=int(os.getenv("GROQ_MAX_RETRIES", "1"))
+                    )
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+
+    @property
+    def http(self):
+        """Shared requests session, so YouTube lookups reuse warm keep-alive connections."""
+        if self._http is None:
+            with self._client_lock:
+                if self._http is None:
+                    import requests
+                    self._http = requests.Session()
+        return self._http
 
     def get_youtube_video(self, query: str) -> str:
         """Fetch the first YouTube video result for a query via scraping"""
@@ -25,7 +83,7 @@ class FastLLMService:
             search_query = refined_query.replace(" ", "+")
             url = f"https://www.youtube.com/results?search_query={search_query}&sp=EgIQAQ%253D%253D"
             headers = {"User-Agent": "Mozilla/5.0"}
-            response = requests.get(url, headers=headers)
+            response = self.http.get(url, headers=headers)
             
             video_ids = re.findall(r"watch\?v=(\S{11})", response.text)
             if video_ids:
@@ -37,7 +95,276 @@ class FastLLMService:
             print(f"[ERROR] Error fetching video: {e}")
             return None
 
-    def get_fast_explanation(self, query: str, language: str = "English", fetch_media: bool = True) -> dict:
+    def get_fast_explanation(self, query: str, language: str = "English", fetch_media: bool = True, prefetch_related: bool = True) -> dict:
+        """Get explanation in <1 second, served from cache when the canonical query was seen before.
+
+        Explanations older than EXPLANATION_TTL are served immediately as stale
+        while a background refresh runs. Past EXPLANATION_MAX_STALE they are only
+        served when Groq is unavailable (circuit open or the call failed).
+        Fresh results queue their related words for background prefetch unless
+        `prefetch_related` is False (the prefetcher's own calls).
+        """
+        start_time = time.time()
+        cache_key = explanation_cache_key(query, language)
+        cached = self.explanation_cache.get(cache_key)
+        if cached is not None and not self._is_stale(cached):
+            result = dict(cached)
+            if fetch_media and not result.get("video_id"):
+                result["video_id"] = self.get_youtube_video(result.get("core_term", query))
+                if result["video_id"]:
+                    self.explanation_cache.set(cache_key, {**cached, "video_id": result["video_id"]})
+            result["source"] = "cache"
+            result["time_ms"] = int((time.time() - start_time) * 1000)
+            if prefetch_related:
+                self.prefetcher.record_hit(cache_key)
+            return result
+
+        query_key = normalize_query(query)
+        result = self._get_stored_explanation(query, query_key, language)
+        if result is None:
+            stale = self.explanation_cache.get_stale(cache_key)
+            if stale is not None:
+                result = dict(stale)
+                result["source"] = "cache"
+
+        last_resort = None
+        if result is not None and self._is_stale(result):
+            result["stale"] = True
+            age = time.time() - result.get("generated_at", 0)
+            if age <= self.explanation_ttl + self.explanation_max_stale or self.circuit.is_open:
+                self._refresh_in_background(query, language, cache_key)
+            else:
+                last_resort, result = result, None
+
+        if result is not None:
+            if fetch_media and not result.get("video_id"):
+                result["video_id"] = self.get_youtube_video(result.get("core_term", query))
+        else:
+            if prefetch_related:
+                with self._inflight_lock:
+                    self.inflight += 1
+            try:
+                result = self._generate_explanation(query, language, fetch_media)
+            finally:
+                if prefetch_related:
+                    with self._inflight_lock:
+                        self.inflight -= 1
+            if result.get("source") == "groq" and result.get("is_scientific", True):
+                explanation_store.save(
+                    query_key,
+                    normalize_query(result.get("core_term") or query),
+                    language,
+                    result,
+                    is_corrected=bool(result.get("is_corrected", False)),
+                    replace=last_resort is not None
+                )
+                if prefetch_related:
+                    self.prefetcher.schedule(result.get("related_words", []), language)
+            elif result.get("source") in ("fallback_error", "glossary") and last_resort is not None:
+                result = last_resort
+
+        # Only real scientific answers are cached; fallbacks and rejections
+        # quote the user's exact input and must not be replayed for others.
+        if result.get("source") in ("groq", "groq_translation", "store") and result.get("is_scientific", True) and not result.get("stale"):
+            self.explanation_cache.set(cache_key, dict(result))
+        result["time_ms"] = int((time.time() - start_time) * 1000)
+        return result
+
+    def _is_stale(self, explanation: dict) -> bool:
+        return time.time() - explanation.get("generated_at", 0) > self.explanation_ttl
+
+    def _refresh_in_background(self, query: str, language: str, cache_key: str):
+        """Regenerate a stale explanation off the request path (at most one refresh per key)"""
+        if self.circuit.is_open:
+            return
+        with self._refresh_lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+        self._refresh_executor.submit(self._refresh_explanation, query, language, cache_key)
+
+    def _refresh_explanation(self, query: str, language: str, cache_key: str):
+        try:
+            result = self._generate_explanation(query, language, fetch_media=True)
+            if result.get("source") == "groq" and result.get("is_scientific", True):
+                explanation_store.save(
+                    normalize_query(query),
+                    normalize_query(result.get("core_term") or query),
+                    language,
+                    result,
+                    is_corrected=bool(result.get("is_corrected", False)),
+                    replace=True
+                )
+                self.explanation_cache.set(cache_key, dict(result))
+        except Exception as e:
+            print(f"[ERROR] Background refresh failed for '{query}': {e}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(cache_key)
+
+    def _create_completion(self, **kwargs):
+        """Chat completion guarded by the Groq circuit breaker"""
+        if not self.circuit.allow_request():
+            raise Exception("Groq circuit is open")
+        try:
+            completion = self.client.chat.completions.create(**kwargs)
+        except Exception:
+            self.circuit.record_failure()
+            raise
+        self.circuit.record_success()
+        usage = getattr(completion, "usage", None)
+        self._usage.tokens = getattr(self._usage, "tokens", 0) + (getattr(usage, "total_tokens", 0) or 0)
+        return completion
+
+    def last_completion_tokens(self) -> int:
+        """Tokens used by this thread's completions since the previous call"""
+        tokens = getattr(self._usage, "tokens", 0)
+        self._usage.tokens = 0
+        return tokens
+
+    def stats(self) -> dict:
+        return {
+            "explanation_cache": self.explanation_cache.stats(),
+            "circuit": self.circuit.stats(),
+            "prefetch": self.prefetcher.stats(),
+            "inflight_generations": self.inflight,
+        }
+
+    def preload(self, query: str, language: str = "English") -> bool:
+        """Put a stored, fresh explanation into the memory cache without calling Groq (startup warmup)."""
+        result = self._get_stored_explanation(query, normalize_query(query), language, translate=False)
+        if result is None or self._is_stale(result):
+            return False
+        self.explanation_cache.set(explanation_cache_key(query, language), result)
+        return True
+
+    def _get_stored_explanation(self, query: str, query_key: str, language: str, translate: bool = True):
+        """Reuse the explanation stored for this exact query instead of generating from scratch.
+
+        Only a query that was answered before (an alias hit) is served from the
+        store: its core term's variant in `language` as is, or, if the concept
+        was only explained in other languages, a translation of that (unless
+        `translate` is False). A query in Telugu or Hindi script without an
+        alias is first put into English with one small completion, so a
+        question already answered in English is translated rather than
+        generated. Other queries mapping to the same core term are generated,
+        since a coarse core term ("cell" for "cell structure") does not make
+        two questions the same.
+        """
+        core_key, is_corrected = explanation_store.resolve(query_key)
+        aliased = core_key is not None
+        if not aliased and translate and not query_key.isascii():
+            english_key = self._english_query_key(query)
+            if english_key:
+                core_key, is_corrected = explanation_store.resolve(english_key)
+        if not core_key:
+            return None
+
+        variant = explanation_store.get_variant(core_key, language)
+        source = "store"
+        if not variant and translate:
+            _, canonical = explanation_store.get_canonical(core_key, exclude_language=language)
+            if canonical:
+                variant = self._translate_explanation(canonical, language)
+                if variant:
+                    explanation_store.save(query_key, core_key, language, variant, source="translated", is_corrected=is_corrected)
+                    source = "groq_translation"
+
+        if not variant:
+            return None
+        if not aliased and source == "store":
+            # Found through the English query: remember it for next time.
+            explanation_store.save(query_key, core_key, language, variant, source="translated", is_corrected=is_corrected)
+
+        result = dict(variant)
+        result["is_corrected"] = is_corrected
+        result["corrected_term"] = variant.get("translated_term", query) if is_corrected else query
+        result["source"] = source
+        return result
+
+    def _english_query_key(self, query: str):
+        """Normalized English rendering of a non-English query (one small completion), or None"""
+        try:
+            chat_completion = self._create_completion(
+                messages=[
+                    {"role": "system", "content": "You translate science search queries into English. Reply with the English query only."},
+                    {"role": "user", "content": query}
+                ],
+                model=self.fast_text_model,
+                temperature=0,
+                max_tokens=30
+            )
+            english = (chat_completion.choices[0].message.content or "").strip().strip('"')
+        except Exception as e:
+            print(f"[ERROR] Groq query translation error: {e}")
+            return None
+        return normalize_query(english) if english else None
+
+    def _translate_explanation(self, canonical: dict, language: str):
+        """Translate a stored explanation into `language` with one small completion"""
+        start_time = time.time()
+        try:
+            lang_instruction = ""
+            if language.lower() == "telugu":
+                lang_instruction = "IMPORTANT: Provide the output in Telugu script (తెలుగు). Do not use English transliteration. Ensure the JSON is valid."
+            elif language.lower() == "hindi":
+                lang_instruction = "IMPORTANT: Provide the output in Hindi script (देवनागरी). Do not use English transliteration."
+
+            fields = {
+                "translated_term": canonical.get("core_term") or canonical.get("translated_term"),
+                "easy": canonical.get("easy"),
+                "medium": canonical.get("medium"),
+                "hard": canonical.get("hard"),
+                "examples": canonical.get("examples", []),
+                "related_words": canonical.get("related_words", []),
+            }
+            prompt = (
+                f"Translate the values of this JSON object into {language} ({lang_instruction}). "
+                f"Keep the JSON keys in English and keep the same structure, meaning and number of sentences. "
+                f"Return STRICT JSON only.\n"
+                f"{json.dumps(fields, ensure_ascii=False)}"
+            )
+
+            chat_completion = self._create_completion(
+                messages=[
+                    {"role": "system", "content": f"You are a precise scientific translator fluent in {language}. You must output valid JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                model=self.fast_text_model,
+                response_format={"type": "json_object"},
+                temperature=0.2,
+                max_tokens=1500
+            )
+            response_content = chat_completion.choices[0].message.content
+            start_idx = response_content.find('{')
+            end_idx = response_content.rfind('}')
+            if start_idx != -1 and end_idx != -1:
+                response_content = response_content[start_idx:end_idx+1]
+            data = json.loads(response_content)
+
+            easy_def = data.get("easy") or data.get("medium") or fields["easy"]
+            return {
+                "translated_term": data.get("translated_term", fields["translated_term"]),
+                "core_term": canonical.get("core_term"),
+                "is_corrected": False,
+                "corrected_term": data.get("translated_term", fields["translated_term"]),
+                "is_scientific": True,
+                "easy": easy_def,
+                "medium": data.get("medium", easy_def),
+                "hard": data.get("hard", easy_def),
+                "examples": data.get("examples", fields["examples"]),
+                "related_words": data.get("related_words", fields["related_words"]),
+                "category": canonical.get("category", "General Science"),
+                "video_id": canonical.get("video_id"),
+                "source": "groq_translation",
+                "generated_at": time.time(),
+                "time_ms": int((time.time() - start_time) * 1000)
+            }
+        except Exception as e:
+            print(f"[ERROR] Groq Translation Error: {e}")
+            return None
+
+    def _generate_explanation(self, query: str, language: str = "English", fetch_media: bool = True) -> dict:
         """Get explanation in <1 second using Groq"""
         start_time = time.time()
         try:
@@ -101,7 +428,7 @@ class FastLLMService:
                 f"The misspelled word should NEVER appear in 'corrected_term' or 'translated_term'."
             )
             
-            chat_completion = self.client.chat.completions.create(
+            chat_completion = self._create_completion(
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": prompt}
@@ -189,6 +516,7 @@ class FastLLMService:
                 "category": data.get("category", "General Science"),
                 "video_id": video_id,
                 "source": "groq",
+                "generated_at": time.time(),
                 "time_ms": int((time.time() - start_time) * 1000)
             }
             return result
@@ -211,9 +539,31 @@ class FastLLMService:
 
     def _get_fallback_explanation(self, query: str, start_time: float, language: str = "English") -> dict:
         lang_lower = language.lower()
-        
-       
-        
+
+        # The glossary is English-only: Telugu and Hindi searches get the
+        # localized error below rather than an untranslated summary.
+        glossary = get_glossary() if lang_lower == "english" else None
+        if glossary is not None:
+            core_key, _ = explanation_store.resolve(normalize_query(query))
+            entry = glossary.lookup(query) or (glossary.lookup(core_key) if core_key else None)
+            if entry:
+                return {
+                    "translated_term": entry["title"],
+                    "core_term": entry["title"],
+                    "is_corrected": False,
+                    "corrected_term": query,
+                    "easy": entry["summary"],
+                    "medium": entry["summary"],
+                    "hard": entry["summary"],
+                    "examples": [],
+                    "related_words": [],
+                    "is_scientific": True,
+                    "category": "Science",
+                    "video_id": None,
+                    "source": "glossary",
+                    "time_ms": int((time.time() - start_time) * 1000)
+                }
+
         if lang_lower == "telugu":
             definition = "క్షమించండి, సర్వర్ ప్రస్తుతం బిజీగా ఉంది. దయచేసి కాసేపటి తర్వాత మళ్ళీ ప్రయత్నించండి."
             examples = []
@@ -251,12 +601,15 @@ class FastLLMService:
             "video_id": full.get("video_id"),
             "is_corrected": full.get("is_corrected", False),
             "corrected_term": full.get("corrected_term", query),
-            "is_scientific": full.get("is_scientific", True)
+            "core_term": full.get("core_term", query),
+            "is_scientific": full.get("is_scientific", True),
+            "stale": full.get("stale", False)
         }
     def get_image_explanation(self, image_bytes: bytes, language: str = "English", level: str = None) -> dict:
         """Analyze image using Groq Vision model with specified difficulty level"""
         start_time = time.time()
         try:
+            import base64
             base64_image = base64.b64encode(image_bytes).decode('utf-8')
             
             vision_model = "meta-llama/llama-4-scout-17b-16e-instruct"
@@ -0,0 +1,199 @@
+"""Offline science glossary built from a local Wikipedia dump or extract.
+
+The glossary is a single read-only file that is memory-mapped at runtime:
+
+    header        8s magic, uint32 entry count, uint32 reserved
+    offset table  one (key_offset, key_length, value_offset, value_length) record
+                  per entry, sorted by key bytes
+    blob          UTF-8 keys and values ("title\\0summary")
+
+Lookups binary-search the offset table directly in the mapped pages, so they
+need no network, no parsing at startup and well under a millisecond.
+"""
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from pathlib import Path
+
+from .query_normalizer import normalize_query
+
+MAGIC = b"CCGLOSS1"
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<QIQI")
+
+DEFAULT_GLOSSARY_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "glossary.bin"
+
+
+def _lead_paragraph(text: str, max_chars: int) -> str:
+    """First real paragraph of an article, trimmed at a sentence boundary."""
+    for paragraph in re.split(r"\n\s*\n|\n", text or ""):
+        paragraph = paragraph.strip()
+        if len(paragraph) < 40 or paragraph.startswith(("{{", "|", "!", "[[File:", "[[Image:", "=")):
+            continue
+        if len(paragraph) <= max_chars:
+            return paragraph
+        cut = paragraph.rfind(". ", 0, max_chars)
+        return paragraph[:cut + 1] if cut > 0 else paragraph[:max_chars].rstrip() + "..."
+    return ""
+
+
+_WIKI_PATTERNS = [
+    (re.compile(r"<ref[^>]*/>"), ""),
+    (re.compile(r"<ref[^>]*>.*?</ref>", re.S), ""),
+    (re.compile(r"<!--.*?-->", re.S), ""),
+    (re.compile(r"<[^>]+>"), ""),
+    (re.compile(r"\[\[(?:File|Image|Category):[^\]]*\]\]"), ""),
+    (re.compile(r"\[\[[^\]|]*\|([^\]]*)\]\]"), r"\1"),
+    (re.compile(r"\[\[([^\]]*)\]\]"), r"\1"),
+    (re.compile(r"\[https?://[^\s\]]+ ([^\]]*)\]"), r"\1"),
+    (re.compile(r"'{2,}"), ""),
+]
+
+
+def _strip_wikitext(text: str) -> str:
+    # Templates nest, so peel them from the inside out.
+    previous = None
+    while previous != text:
+        previous = text
+        text = re.sub(r"\{\{[^{}]*\}\}", "", text)
+    text = re.sub(r"\{\|.*?\|\}", "", text, flags=re.S)
+    for pattern, replacement in _WIKI_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return re.sub(r"[ \t]+", " ", text)
+
+
+def _iter_jsonl(path: Path):
+    """Articles from a JSON-lines extract ({"title": ..., "text": ...} per line, as written by WikiExtractor --json)."""
+    import bz2
+    opener = bz2.open if path.suffix == ".bz2" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            article = json.loads(line)
+            yield article.get("title", ""), article.get("text", "")
+
+
+def _iter_xml_dump(path: Path):
+    """Articles from a MediaWiki XML dump (optionally .bz2), skipping redirects and non-article namespaces."""
+    import bz2
+    import xml.etree.ElementTree as ET
+    opener = bz2.open if path.suffix == ".bz2" else open
+    with opener(path, "rb") as f:
+        title, namespace, redirect, text = None, "0", False, ""
+        for event, elem in ET.iterparse(f, events=("end",)):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if tag == "title":
+                title = elem.text
+            elif tag == "ns":
+                namespace = elem.text
+            elif tag == "redirect":
+                redirect = True
+            elif tag == "text":
+                text = elem.text or ""
+            elif tag == "page":
+                if title and namespace == "0" and not redirect:
+                    yield title, _strip_wikitext(text)
+                title, namespace, redirect, text = None, "0", False, ""
+                elem.clear()
+
+
+def build_glossary(input_path: str, output_path: str = None, max_summary_chars: int = 600) -> int:
+    """Build the glossary file from a local dump or extract. Returns the entry count."""
+    input_path = Path(input_path)
+    output_path = Path(output_path) if output_path else DEFAULT_GLOSSARY_PATH
+    if ".xml" in input_path.suffixes:
+        articles = _iter_xml_dump(input_path)
+    else:
+        articles = _iter_jsonl(input_path)
+
+    entries = {}
+    for title, text in articles:
+        key = normalize_query(title)
+        summary = _lead_paragraph(text, max_summary_chars)
+        if key and summary and key not in entries:
+            entries[key] = f"{title}\0{summary}"
+
+    keys = sorted(entries, key=lambda k: k.encode("utf-8"))
+    blob_start = HEADER.size + RECORD.size * len(keys)
+    records = []
+    blob = bytearray()
+    for key in keys:
+        key_bytes = key.encode("utf-8")
+        value_bytes = entries[key].encode("utf-8")
+        key_offset = blob_start + len(blob)
+        blob += key_bytes
+        value_offset = blob_start + len(blob)
+        blob += value_bytes
+        records.append(RECORD.pack(key_offset, len(key_bytes), value_offset, len(value_bytes)))
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys), 0))
+        f.write(b"".join(records))
+        f.write(blob)
+    os.replace(tmp_path, output_path)
+    return len(keys)
+
+
+class Glossary:
+    """Read-only, memory-mapped view of a glossary file."""
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a glossary file")
+
+    def _key_at(self, index: int):
+        key_offset, key_length, value_offset, value_length = RECORD.unpack_from(self._mm, HEADER.size + index * RECORD.size)
+        return self._mm[key_offset:key_offset + key_length], value_offset, value_length
+
+    def lookup(self, query: str):
+        """Return {"title", "summary"} for a query, or None."""
+        target = normalize_query(query).encode("utf-8")
+        if not target:
+            return None
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key, value_offset, value_length = self._key_at(mid)
+            if key < target:
+                lo = mid + 1
+            elif key > target:
+                hi = mid
+            else:
+                title, summary = self._mm[value_offset:value_offset + value_length].decode("utf-8").split("\0", 1)
+                return {"title": title, "summary": summary}
+        return None
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+_glossary = None
+_glossary_loaded = False
+_glossary_lock = threading.Lock()
+
+
+def get_glossary():
+    """The glossary at GLOSSARY_PATH, opened on first use; None if it has not been built."""
+    global _glossary, _glossary_loaded
+    if not _glossary_loaded:
+        with _glossary_lock:
+            if not _glossary_loaded:
+                path = Path(os.getenv("GLOSSARY_PATH", str(DEFAULT_GLOSSARY_PATH)))
+                if path.exists():
+                    try:
+                        _glossary = Glossary(path)
+                    except Exception as e:
+                        print(f"[ERROR] Failed to open glossary {path}: {e}")
+                _glossary_loaded = True
+    return _glossary
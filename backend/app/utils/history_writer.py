@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import func, insert, text
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from ..database import SessionLocal, engine
+from ..models import SearchHistory
+from .background import PeriodicFlusher
+from .dashboard_cache import dashboard_cache
+from .user_stats import increment_statement
+
+
+class HistoryWriter(PeriodicFlusher):
+    """Write-behind buffer for search_history inserts.
+
+    `add()` assigns the row its final id up front and returns immediately; rows
+    are inserted in bulk once HISTORY_FLUSH_SIZE are buffered or every
+    HISTORY_FLUSH_INTERVAL seconds, and drained on shutdown.
+
+    Ids come from the table's Postgres sequence, reserved HISTORY_ID_BLOCK at a
+    time, so several app processes can buffer side by side. Elsewhere (the
+    SQLite dev database) they are counted up from max(id), which assumes a
+    single process.
+
+    Anything that reads or changes a user's history calls `ensure_flushed()`
+    first, so a row the client already has an id for is always visible. If the
+    database is unavailable, rows are kept and retried; beyond
+    HISTORY_MAX_BUFFER the oldest are dropped, which bounds memory (and the loss)
+    during an outage. When the database is up but rejects the batch, its rows
+    are written one at a time and only the rows rejected on their own are
+    dropped, so one bad row cannot hold back everything buffered after it.
+    """
+    def __init__(self, session_factory=SessionLocal):
+        super().__init__("history-writer", float(os.getenv("HISTORY_FLUSH_INTERVAL", "1.0")))
+        self.session_factory = session_factory
+        self.flush_size = int(os.getenv("HISTORY_FLUSH_SIZE", "100"))
+        self.max_buffer = int(os.getenv("HISTORY_MAX_BUFFER", "10000"))
+        self.id_block = int(os.getenv("HISTORY_ID_BLOCK", "100"))
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._id_lock = threading.Lock()
+        self._ids = []
+        self._next_local_id = None
+        self._pending = []
+        self._inflight = []
+        self.buffered = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.forced_flushes = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.last_flush_ms = 0.0
+
+    def _reserve_ids(self):
+        db = self.session_factory()
+        try:
+            if engine.dialect.name == "postgresql":
+                rows = db.execute(
+                    text("SELECT nextval(pg_get_serial_sequence('search_history', 'id')) FROM generate_series(1, :n)"),
+                    {"n": self.id_block},
+                ).all()
+                return [r[0] for r in rows]
+            if self._next_local_id is None:
+                self._next_local_id = (db.query(func.max(SearchHistory.id)).scalar() or 0) + 1
+            start = self._next_local_id
+            self._next_local_id += self.id_block
+            return list(range(start, start + self.id_block))
+        finally:
+            db.close()
+
+    def _next_id(self) -> int:
+        with self._id_lock:
+            if not self._ids:
+                self._ids = self._reserve_ids()
+            return self._ids.pop(0)
+
+    def add(self, **values) -> int:
+        """Buffer a SearchHistory row and return its id."""
+        row = {
+            "feedback": None,
+            "video_watched": False,
+            **values,
+            "id": self._next_id(),
+            "created_at": values.get("created_at") or datetime.utcnow(),
+        }
+        with self._lock:
+            self._pending.append(row)
+            self.buffered += 1
+            full = len(self._pending) >= self.flush_size
+        self._ensure_worker()
+        if full:
+            self.wake()
+        return row["id"]
+
+    @staticmethod
+    def _write(db, rows: list):
+        db.execute(insert(SearchHistory.__table__), rows)
+        deltas = {}
+        for row in rows:
+            counts = deltas.setdefault(row["user_id"], {"searches": 0, "videos_watched": 0})
+            counts["searches"] += 1
+            counts["videos_watched"] += 1 if row["video_watched"] else 0
+        db.execute(increment_statement(db.get_bind().dialect.name, deltas))
+        db.commit()
+
+    @staticmethod
+    def _unavailable(error: Exception) -> bool:
+        """Whether `error` means the database could not be reached (as opposed to rejecting the rows)."""
+        return isinstance(error, (OperationalError, InterfaceError)) or getattr(error, "connection_invalidated", False)
+
+    def _requeue(self, rows: list):
+        with self._lock:
+            self._pending = rows + self._pending
+            overflow = len(self._pending) - self.max_buffer
+            if overflow > 0:
+                del self._pending[:overflow]
+                self.dropped += overflow
+                print(f"[ERROR] History buffer full, dropped {overflow} rows")
+
+    def _write_one_by_one(self, db, batch: list) -> int:
+        """Write a rejected batch row by row; returns the rows written."""
+        written = 0
+        for position, row in enumerate(batch):
+            try:
+                self._write(db, [row])
+                written += 1
+            except Exception as e:
+                db.rollback()
+                if self._unavailable(e):
+                    print(f"[ERROR] Failed to write {len(batch) - position} history rows, will retry: {e}")
+                    self._requeue(batch[position:])
+                    break
+                with self._lock:
+                    self.rejected += 1
+                print(f"[ERROR] Dropped history row {row['id']} rejected by the database: {e}")
+        return written
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                self._inflight, self._pending = self._pending, []
+            batch = self._inflight
+            start = time.perf_counter()
+            db = self.session_factory()
+            try:
+                try:
+                    self._write(db, batch)
+                    written = len(batch)
+                except Exception as e:
+                    db.rollback()
+                    if self._unavailable(e):
+                        print(f"[ERROR] Failed to write {len(batch)} history rows, will retry: {e}")
+                        self._requeue(batch)
+                        return
+                    written = self._write_one_by_one(db, batch)
+                if written:
+                    dashboard_cache.bump("searches")
+                    with self._lock:
+                        self.flushed += written
+                        self.flushes += 1
+                        self.last_flush_ms = round((time.perf_counter() - start) * 1000, 2)
+            finally:
+                db.close()
+                with self._lock:
+                    self._inflight = []
+
+    def ensure_flushed(self, user_id: int = None, history_id: int = None):
+        """Flush now if a buffered row belongs to `user_id` or has id `history_id`."""
+        with self._lock:
+            waiting = any(
+                (user_id is not None and row["user_id"] == user_id) or row["id"] == history_id
+                for row in self._pending + self._inflight
+            )
+        if waiting:
+            with self._lock:
+                self.forced_flushes += 1
+            self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "buffered": self.buffered,
+                "flushed": self.flushed,
+                "flushes": self.flushes,
+                "rows_per_flush": round(self.flushed / self.flushes, 2) if self.flushes else 0.0,
+                "forced_flushes": self.forced_flushes,
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+                "last_flush_ms": self.last_flush_ms,
+            }
+
+
+history_writer = HistoryWriter()
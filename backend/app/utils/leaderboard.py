@@ -0,0 +1,219 @@
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+
+from sqlalchemy import func, select
+
+from ..database import SessionLocal
+from ..models import QuizResult, User, quiz_score_ratio
+from .background import PeriodicFlusher
+
+
+class LeaderboardEntry:
+    """A user's best quiz result on one board; `key` sorts best first."""
+    __slots__ = ("id", "user_id", "score", "total_questions", "difficulty", "topic", "time_taken", "created_at", "key")
+
+    def __init__(self, id, user_id, score, total_questions, difficulty, topic=None, time_taken=0, created_at=None):
+        self.id = id
+        self.user_id = user_id
+        self.score = score
+        self.total_questions = total_questions
+        self.difficulty = difficulty
+        self.topic = topic
+        self.time_taken = time_taken
+        self.created_at = created_at
+        # Same order as `quiz_score_ratio` desc, total_questions desc,
+        # created_at desc, with the result id as the final tie-breaker. The
+        # user id comes last so a key leads back to its entry.
+        ratio = score / total_questions if total_questions else 0.0
+        created = created_at.timestamp() if created_at else 0.0
+        self.key = (-ratio, -total_questions, -created, -id, user_id)
+
+    @classmethod
+    def from_result(cls, result: QuizResult):
+        return cls(
+            id=result.id,
+            user_id=result.user_id,
+            score=result.score,
+            total_questions=result.total_questions,
+            difficulty=result.difficulty,
+            topic=result.topic,
+            time_taken=result.time_taken,
+            created_at=result.created_at,
+        )
+
+
+class _Board:
+    def __init__(self):
+        self.best = {}
+        self.keys = []
+
+    def offer(self, entry: LeaderboardEntry):
+        current = self.best.get(entry.user_id)
+        if current is not None:
+            if current.key <= entry.key:
+                return
+            del self.keys[bisect_left(self.keys, current.key)]
+        self.best[entry.user_id] = entry
+        insort(self.keys, entry.key)
+
+    def remove(self, user_id: int):
+        entry = self.best.pop(user_id, None)
+        if entry is not None:
+            del self.keys[bisect_left(self.keys, entry.key)]
+
+    def top(self, limit: int):
+        return [self.best[key[-1]] for key in self.keys[:max(limit, 0)]]
+
+    def rank(self, user_id: int):
+        entry = self.best.get(user_id)
+        if entry is None:
+            return None, None
+        return bisect_left(self.keys, entry.key) + 1, entry
+
+
+class Leaderboard(PeriodicFlusher):
+    """Each user's best quiz result, per difficulty and overall, kept sorted in memory.
+
+    Top-N is a slice and a user's rank one binary search, instead of sorting
+    every quiz_results row per request. The boards are built on first use from
+    one query that keeps each user's best row per difficulty, and
+    `record()` adds results saved by this process. Results saved by other
+    workers show up when the boards are rebuilt every LEADERBOARD_RELOAD_INTERVAL
+    seconds by the background thread (here `flush()` pulls from the database
+    rather than pushing to it).
+    """
+    def __init__(self, session_factory=SessionLocal):
+        super().__init__("leaderboard", float(os.getenv("LEADERBOARD_RELOAD_INTERVAL", "60")))
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._reload_lock = threading.RLock()
+        self._boards = None
+        self._pending = None
+        self.reloads = 0
+        self.last_reload_ms = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._boards is not None
+
+    def ensure_loaded(self):
+        if self._boards is None:
+            with self._reload_lock:
+                if self._boards is None:
+                    self.flush()
+        self._ensure_worker()
+
+    def flush(self):
+        with self._reload_lock:
+            with self._lock:
+                # Results recorded while the rows are being read are replayed on
+                # the new boards, so none is lost between the query and the swap.
+                self._pending = []
+            start = time.perf_counter()
+            try:
+                boards = self._build()
+            except Exception:
+                with self._lock:
+                    self._pending = None
+                raise
+            with self._lock:
+                for entry in self._pending:
+                    self._offer(boards, entry)
+                self._boards = boards
+                self._pending = None
+            self.reloads += 1
+            self.last_reload_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    def _build(self) -> dict:
+        ranked = (
+            select(
+                QuizResult,
+                func.row_number().over(
+                    partition_by=(QuizResult.user_id, QuizResult.difficulty),
+                    order_by=(quiz_score_ratio.desc(), QuizResult.total_questions.desc(), QuizResult.created_at.desc(), QuizResult.id.desc()),
+                ).label("position"),
+            )
+            # Results left behind by deleted users are not ranked.
+            .where(QuizResult.user_id.in_(select(User.id)))
+            .subquery()
+        )
+        best = select(ranked).where(ranked.c.position == 1)
+        db = self.session_factory()
+        try:
+            rows = db.execute(best).mappings().all()
+        finally:
+            db.close()
+
+        boards = {}
+        for row in rows:
+            entry = LeaderboardEntry(
+                id=row["id"],
+                user_id=row["user_id"],
+                score=row["score"],
+                total_questions=row["total_questions"],
+                difficulty=row["difficulty"],
+                topic=row["topic"],
+                time_taken=row["time_taken"],
+                created_at=row["created_at"],
+            )
+            self._offer(boards, entry)
+        return boards
+
+    @staticmethod
+    def _offer(boards: dict, entry: LeaderboardEntry):
+        for difficulty in (entry.difficulty, None):
+            board = boards.get(difficulty)
+            if board is None:
+                board = boards[difficulty] = _Board()
+            board.offer(entry)
+
+    def record(self, result: QuizResult):
+        """Add a just-saved result (a no-op until the boards are first loaded)."""
+        entry = LeaderboardEntry.from_result(result)
+        with self._lock:
+            if self._boards is not None:
+                self._offer(self._boards, entry)
+            if self._pending is not None:
+                self._pending.append(entry)
+
+    def discard(self, user_ids):
+        """Drop users that no longer exist from every board until the next reload."""
+        with self._lock:
+            for board in (self._boards or {}).values():
+                for user_id in user_ids:
+                    board.remove(user_id)
+
+    def top(self, difficulty: str = None, limit: int = 10):
+        """The best `limit` users on a difficulty's board (None: all difficulties)."""
+        self.ensure_loaded()
+        with self._lock:
+            board = self._boards.get(difficulty)
+            return board.top(limit) if board else []
+
+    def rank(self, user_id: int, difficulty: str = None):
+        """(1-based rank, best entry, number of ranked users); rank is None if the user has no result."""
+        self.ensure_loaded()
+        with self._lock:
+            board = self._boards.get(difficulty)
+            if board is None:
+                return None, None, 0
+            rank, entry = board.rank(user_id)
+            return rank, entry, len(board.keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            boards = self._boards or {}
+            sizes = {difficulty: len(board.keys) for difficulty, board in boards.items()}
+        return {
+            "loaded": self._boards is not None,
+            "ranked_users": sizes.pop(None, 0),
+            "boards": sizes,
+            "reloads": self.reloads,
+            "last_reload_ms": self.last_reload_ms,
+            "reload_interval_seconds": self.interval,
+        }
+
+
+leaderboard = Leaderboard()
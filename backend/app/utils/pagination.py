@@ -0,0 +1,18 @@
+import base64
+from datetime import datetime
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for the row a page ended on."""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor. Returns (created_at, id); raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
@@ -0,0 +1,139 @@
+import os
+import queue
+import threading
+import time
+
+from .cache import TTLCache
+from .query_normalizer import explanation_cache_key
+
+
+class RelatedWordPrefetcher:
+    """Warms the explanation cache for the related words of fresh results.
+
+    Students usually click one of the related words next, so a single low-priority
+    worker explains the top few in the background (same language, no media).
+    It stays within a rolling per-minute token budget and drops its queue as soon
+    as foreground traffic is busy or the Groq circuit is open.
+    """
+    def __init__(self, service):
+        self.service = service
+        self.enabled = os.getenv("PREFETCH_ENABLED", "1") == "1"
+        self.words_per_result = int(os.getenv("PREFETCH_WORDS", "3"))
+        self.token_budget = int(os.getenv("PREFETCH_TOKEN_BUDGET", "20000"))  # per minute
+        self.max_inflight = int(os.getenv("PREFETCH_MAX_FOREGROUND", "4"))
+        self._queue = queue.Queue(maxsize=int(os.getenv("PREFETCH_QUEUE_SIZE", "50")))
+        self._thread = None
+        self._lock = threading.Lock()
+        # Counters and the token window are updated by request threads and
+        # the worker alike.
+        self._counter_lock = threading.Lock()
+        self._window_start = time.time()
+        self._window_tokens = 0
+        # Keys warmed by the prefetcher, so later cache hits can be attributed to it.
+        self._warmed = TTLCache(maxsize=5000, ttl=int(os.getenv("EXPLANATION_CACHE_TTL", "86400")))
+        self.scheduled = 0
+        self.completed = 0
+        self.hits = 0
+        self.tokens_used = 0
+        self.skipped_budget = 0
+        self.cancelled = 0
+
+    def _overloaded(self) -> bool:
+        return self.service.inflight >= self.max_inflight or self.service.circuit.is_open
+
+    def _cancel_pending(self):
+        dropped = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            dropped += 1
+        with self._counter_lock:
+            self.cancelled += dropped
+
+    def schedule(self, related_words: list, language: str):
+        if not self.enabled or not related_words:
+            return
+        if self._overloaded():
+            self._cancel_pending()
+            return
+        self._ensure_worker()
+        for word in related_words[:self.words_per_result]:
+            if not isinstance(word, str) or not word.strip():
+                continue
+            cache_key = explanation_cache_key(word, language)
+            if cache_key in self.service.explanation_cache:
+                continue
+            try:
+                self._queue.put_nowait((word, language, cache_key))
+                with self._counter_lock:
+                    self.scheduled += 1
+            except queue.Full:
+                break
+
+    def record_hit(self, cache_key: str):
+        """Called on a cache hit; counts it once if the entry came from a prefetch."""
+        if cache_key in self._warmed:
+            self._warmed.delete(cache_key)
+            with self._counter_lock:
+                self.hits += 1
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="related-word-prefetch", daemon=True)
+                self._thread.start()
+
+    def _within_budget(self) -> bool:
+        now = time.time()
+        with self._counter_lock:
+            if now - self._window_start >= 60:
+                self._window_start = now
+                self._window_tokens = 0
+            return self._window_tokens < self.token_budget
+
+    def _spend(self, tokens: int):
+        with self._counter_lock:
+            self._window_tokens += tokens
+            self.tokens_used += tokens
+
+    def _run(self):
+        while True:
+            word, language, cache_key = self._queue.get()
+            if self._overloaded():
+                with self._counter_lock:
+                    self.cancelled += 1
+                self._cancel_pending()
+                continue
+            if not self._within_budget():
+                with self._counter_lock:
+                    self.skipped_budget += 1
+                continue
+            if cache_key in self.service.explanation_cache:
+                continue
+            try:
+                result = self.service.get_fast_explanation(word, language, fetch_media=False, prefetch_related=False)
+            except Exception as e:
+                print(f"[ERROR] Prefetch failed for '{word}': {e}")
+                continue
+            self._spend(self.service.last_completion_tokens())
+            if result.get("source") in ("groq", "groq_translation", "store"):
+                self._warmed.set(cache_key, True)
+                with self._counter_lock:
+                    self.completed += 1
+
+    def stats(self) -> dict:
+        with self._counter_lock:
+            return {
+                "enabled": self.enabled,
+                "scheduled": self.scheduled,
+                "completed": self.completed,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.completed, 4) if self.completed else 0.0,
+                "tokens_used": self.tokens_used,
+                "token_budget_per_minute": self.token_budget,
+                "skipped_budget": self.skipped_budget,
+                "cancelled": self.cancelled,
+                "queued": self._queue.qsize(),
+            }
@@ -0,0 +1,107 @@
+import hashlib
+import re
+import unicodedata
+
+
+# Question phrasings users wrap around a term. They carry no meaning for the
+# lookup, so "What is Photosynthesis?" and "photosynthesis" share one key.
+_LEADING_PHRASES = [
+    "what is the meaning of",
+    "what is meant by",
+    "what is a",
+    "what is an",
+    "what is the",
+    "what is",
+    "what are the",
+    "what are",
+    "what s",
+    "whats",
+    "define the term",
+    "define",
+    "definition of",
+    "meaning of",
+    "explain the concept of",
+    "explain",
+    "describe",
+    "tell me about",
+    "the",
+    "a",
+    "an",
+]
+
+_TRAILING_PHRASES = [
+    "meaning",
+    "definition",
+    # Hindi: "... kya hai", "... kya hota/hoti hai", "... ki paribhasha", "... ka arth"
+    "क्या होता है",
+    "क्या होती है",
+    "क्या हैं",
+    "क्या है",
+    "की परिभाषा",
+    "का अर्थ",
+    # Telugu: "... ante emiti", "... anaga emi", "... emiti"
+    "అంటే ఏమిటి",
+    "అనగా ఏమి",
+    "ఏమిటి",
+]
+
+_LEADING_RE = re.compile(r"^(?:(?:%s)\s+)+" % "|".join(re.escape(p) for p in _LEADING_PHRASES))
+_TRAILING_RE = re.compile(r"(?:\s+(?:%s))+$" % "|".join(re.escape(p) for p in _TRAILING_PHRASES))
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Keys are stored in String(255) columns (search_history.normalized_query,
+# core_key, explanation_aliases.query_key).
+MAX_KEY_LENGTH = 255
+
+
+def _strip_punctuation(text: str) -> str:
+    """Replace punctuation, symbols and format characters with spaces.
+
+    Combining marks (category M) are kept: Telugu and Devanagari vowel signs
+    and viramas are marks, and dropping them would change the word.
+    """
+    chars = []
+    for ch in text:
+        category = unicodedata.category(ch)
+        if category == "Cf":
+            # Zero-width joiners only affect rendering of Indic conjuncts.
+            continue
+        if category[0] in ("P", "S", "Z", "C"):
+            chars.append(" ")
+        else:
+            chars.append(ch)
+    return "".join(chars)
+
+
+def normalize_query(query: str) -> str:
+    """Return the canonical key for a search query.
+
+    The same key is used for explanation caching and for grouping queries in
+    the admin analytics, so both always agree on what "the same search" is.
+    """
+    if not query:
+        return ""
+
+    text = unicodedata.normalize("NFC", query).casefold()
+    text = _strip_punctuation(text)
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+
+    stripped = _LEADING_RE.sub("", text)
+    stripped = _TRAILING_RE.sub("", stripped).strip()
+
+    # Never reduce a query to nothing ("what is" on its own stays as typed).
+    key = stripped or text
+    if len(key) > MAX_KEY_LENGTH:
+        # Keep a readable prefix; the digest of the whole key keeps long
+        # queries that share the prefix apart.
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        key = f"{key[:MAX_KEY_LENGTH - len(digest) - 1]}#{digest}"
+    return key
+
+
+def explanation_cache_key(query: str, language: str = "English", level: str = None) -> str:
+    """Cache key for an explanation of `query` in `language` (and optional level)."""
+    key = f"{(language or 'English').lower()}:{normalize_query(query)}"
+    if level:
+        key = f"{key}:{level.lower()}"
+    return key
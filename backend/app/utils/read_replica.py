@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+from ..database import ReadSessionLocal, SessionLocal, read_engine
+from .background import PeriodicFlusher
+
+
+# Seconds the replica is behind the primary: zero when it has replayed
+# everything it received (an idle primary writes nothing to replay), else the
+# age of the last replayed transaction.
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReadReplica(PeriodicFlusher):
+    """Hands out sessions for read-only analytics: on READ_DATABASE_URL when usable, else on the primary.
+
+    The replica is used while it answers and lags the primary by at most
+    READ_REPLICA_MAX_LAG seconds. A background thread checks both every
+    READ_REPLICA_CHECK_INTERVAL seconds (here `flush()` probes the replica),
+    so requests only ever read the last verdict and never wait on a replica
+    that does not answer. Until the first check, when it fails, or when no
+    READ_DATABASE_URL is set, sessions go to the primary, so callers never
+    need to know which database they read. Only non-PostgreSQL replicas (e.g.
+    a SQLite copy for local testing) are assumed to have no lag.
+    """
+    def __init__(self, engine=read_engine, replica_factory=ReadSessionLocal, primary_factory=SessionLocal):
+        super().__init__("read-replica-check", float(os.getenv("READ_REPLICA_CHECK_INTERVAL", "5")))
+        self.engine = engine
+        self.replica_factory = replica_factory
+        self.primary_factory = primary_factory
+        self.max_lag = float(os.getenv("READ_REPLICA_MAX_LAG", "30"))
+        self._checked_at = None
+        self._usable = False
+        self._counter_lock = threading.Lock()
+        self.lag = None
+        self.last_error = None
+        self.replica_sessions = 0
+        self.primary_sessions = 0
+        self.fallbacks = 0
+
+    @property
+    def configured(self) -> bool:
+        return self.engine is not None
+
+    def usable(self) -> bool:
+        if not self.configured:
+            return False
+        self._ensure_worker()
+        if self._checked_at is None:
+            # First use: probe right away rather than after a full interval.
+            self.wake()
+        return self._usable
+
+    def flush(self):
+        if self.configured:
+            self._usable = self._check()
+            self._checked_at = time.time()
+
+    def _check(self) -> bool:
+        try:
+            with self.engine.connect() as connection:
+                if self.engine.dialect.name == "postgresql":
+                    self.lag = float(connection.execute(REPLICA_LAG_SQL).scalar() or 0)
+                else:
+                    connection.execute(text("SELECT 1"))
+                    self.lag = 0.0
+        except Exception as e:
+            if self._usable or self.last_error is None:
+                print(f"[ERROR] Read replica unavailable, reading from the primary: {e}")
+            self.last_error = str(e)
+            self.lag = None
+            return False
+        if self.lag > self.max_lag:
+            self.last_error = f"replica {self.lag:.1f}s behind (max {self.max_lag:g}s)"
+            return False
+        self.last_error = None
+        return True
+
+    def session(self):
+        """A new session on the replica if it is usable, else on the primary."""
+        replica = self.usable()
+        with self._counter_lock:
+            if replica:
+                self.replica_sessions += 1
+            else:
+                self.primary_sessions += 1
+                self.fallbacks += 1 if self.configured else 0
+        return self.replica_factory() if replica else self.primary_factory()
+
+    def stats(self) -> dict:
+        return {
+            "configured": self.configured,
+            "usable": self._usable if self.configured else False,
+            "lag_seconds": self.lag,
+            "checked_seconds_ago": round(time.time() - self._checked_at, 1) if self._checked_at else None,
+            "max_lag_seconds": self.max_lag,
+            "last_error": self.last_error,
+            "replica_sessions": self.replica_sessions,
+            "primary_sessions": self.primary_sessions,
+            "fallbacks": self.fallbacks,
+        }
+
+
+read_replica = ReadReplica()
+
+
+def read_session():
+    """Session factory for read-only work (background jobs, caches)."""
+    return read_replica.session()
+
+
+def on_replica(db) -> bool:
+    """Whether `db` reads from the replica rather than the primary."""
+    return read_replica.configured and db.get_bind() is read_replica.engine
+
+
+def get_read_db():
+    """Request dependency like `get_db`, for endpoints that only read."""
+    db = read_replica.session()
+    try:
+        yield db
+    finally:
+        db.close()
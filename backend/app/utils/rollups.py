@@ -0,0 +1,239 @@
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Date, case, cast, delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..database import SessionLocal
+from ..models import QuizDailyRollup, QuizResult, RollupDirtyDay, RollupState, SearchDailyRollup, SearchHistory, User
+from .background import PeriodicFlusher
+
+
+STATE_NAME = "daily"
+
+
+def utc_day(column, dialect_name: str):
+    """The (UTC) calendar day of a DateTime column."""
+    # CAST(... AS DATE) has numeric affinity on SQLite and yields just the year.
+    if dialect_name == "sqlite":
+        return func.date(column)
+    return cast(column, Date)
+
+
+def _midnight(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+
+def mark_dirty_statement(dialect_name: str, days):
+    """Insert recording that history rows of `days` changed, or None if none of them can be rolled up yet.
+
+    Executed in the same transaction as the change; today is skipped, since
+    it is read from the raw tables anyway.
+    """
+    today = datetime.utcnow().date()
+    # func.date() returns ISO strings on SQLite.
+    days = sorted({date.fromisoformat(day) if isinstance(day, str) else day for day in days if day is not None})
+    days = [day for day in days if day < today]
+    if not days:
+        return None
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    now = datetime.utcnow()
+    return dialect_insert(RollupDirtyDay).values([{"day": day, "marked_at": now} for day in days]).on_conflict_do_nothing(
+        index_elements=[RollupDirtyDay.day]
+    )
+
+
+class RollupJob(PeriodicFlusher):
+    """Keeps the daily rollup tables in step with search_history and quiz_results.
+
+    The rollups hold whole UTC days, each row counting one (day, role,
+    language, level, source) combination, and are complete for every day
+    before `covered_until()`; /admin/stats reads those days from them and only
+    the rest (today, and partial days at the edges of a window) from the raw
+    tables.
+
+    Every ROLLUP_INTERVAL seconds the days from ROLLUP_REFRESH_DAYS before the
+    covered range up to yesterday are rebuilt, which also picks up history
+    rows flushed after midnight and videos watched on recent searches. Older
+    days are rebuilt when marked in rollup_dirty_days, which the history
+    routes do in the same transaction as deleting a search or recording a
+    video view. Rebuilding a day replaces its rows, so the job is safe to
+    repeat; on PostgreSQL an advisory lock keeps workers from rebuilding at
+    the same time.
+    Nothing is rolled up until `python -m app.manage backfill-rollups` has run
+    once. Rows are attributed to the user's role at rollup time.
+    """
+    def __init__(self, session_factory=SessionLocal):
+        super().__init__("rollups", float(os.getenv("ROLLUP_INTERVAL", "3600")))
+        self.session_factory = session_factory
+        self.refresh_days = int(os.getenv("ROLLUP_REFRESH_DAYS", "2"))
+        self.state_ttl = float(os.getenv("ROLLUP_STATE_TTL", "60"))
+        self._lock = threading.Lock()
+        self._covered_until = None
+        self._checked_at = 0.0
+        self.rebuilds = 0
+        self.days_rebuilt = 0
+        self.last_rebuild_ms = 0.0
+
+    def covered_until(self, db=None):
+        """First day that is not rolled up yet (None before the first backfill).
+
+        With `db` the state is read on that session rather than from the
+        cache, so a read replica session gets the state matching the rollup
+        rows it has replayed.
+        """
+        if db is not None:
+            return self._read_state(db)
+        if time.time() - self._checked_at > self.state_ttl:
+            with self._lock:
+                if time.time() - self._checked_at > self.state_ttl:
+                    self._covered_until = self._read_state()
+                    self._checked_at = time.time()
+            self._ensure_worker()
+        return self._covered_until
+
+    def _read_state(self, session=None):
+        db = session or self.session_factory()
+        try:
+            return db.scalar(select(RollupState.covered_until).where(RollupState.name == STATE_NAME))
+        except Exception as e:
+            # Missing tables (migration not applied yet) mean no rollups: read raw.
+            print(f"[ERROR] Failed to read rollup state: {e}")
+            db.rollback()
+            return None
+        finally:
+            if session is None:
+                db.close()
+
+    def flush(self):
+        covered = self._read_state()
+        if covered is None:
+            return
+        today = datetime.utcnow().date()
+        first_day = covered - timedelta(days=self.refresh_days)
+        self.rebuild(first_day, today)
+        for day in self._dirty_days(first_day):
+            self.rebuild(day, day + timedelta(days=1))
+
+    def _dirty_days(self, before: date) -> list:
+        db = self.session_factory()
+        try:
+            return db.scalars(select(RollupDirtyDay.day).where(RollupDirtyDay.day < before).order_by(RollupDirtyDay.day)).all()
+        except Exception as e:
+            print(f"[ERROR] Failed to read dirty rollup days: {e}")
+            return []
+        finally:
+            db.close()
+
+    def rebuild(self, first_day: date, end_day: date):
+        """Recompute the rollups of days [first_day, end_day) from the raw tables."""
+        start = time.perf_counter()
+        db = self.session_factory()
+        try:
+            dialect = db.get_bind().dialect.name
+            if dialect == "postgresql":
+                # Held until commit, so concurrent rebuilds cannot interleave.
+                db.execute(text("SELECT pg_advisory_xact_lock(hashtext('daily_rollups'))"))
+
+            # Cleared before the days are aggregated: a change marked after
+            # this point stays marked and is picked up by the next run.
+            db.execute(delete(RollupDirtyDay).where(RollupDirtyDay.day >= first_day, RollupDirtyDay.day < end_day))
+
+            start_dt, end_dt = _midnight(first_day), _midnight(end_day)
+            for rollup in (SearchDailyRollup, QuizDailyRollup):
+                db.execute(delete(rollup).where(rollup.day >= first_day, rollup.day < end_day))
+
+            search_day = utc_day(SearchHistory.created_at, dialect)
+            search_language = func.lower(SearchHistory.search_language)
+            db.execute(insert(SearchDailyRollup).from_select(
+                ["day", "role", "language", "level", "source", "searches", "video_views"],
+                select(
+                    search_day,
+                    User.role,
+                    search_language,
+                    SearchHistory.search_level,
+                    SearchHistory.search_source,
+                    func.count(),
+                    func.sum(case((SearchHistory.video_watched == True, 1), else_=0)),
+                )
+                .select_from(SearchHistory)
+                .outerjoin(User, User.id == SearchHistory.user_id)
+                .where(SearchHistory.created_at >= start_dt, SearchHistory.created_at < end_dt)
+                .group_by(search_day, User.role, search_language, SearchHistory.search_level, SearchHistory.search_source)
+            ))
+
+            quiz_day = utc_day(QuizResult.created_at, dialect)
+            db.execute(insert(QuizDailyRollup).from_select(
+                ["day", "role", "difficulty", "attempts", "time_taken", "score_sum", "question_sum"],
+                select(
+                    quiz_day,
+                    User.role,
+                    QuizResult.difficulty,
+                    func.count(),
+                    func.coalesce(func.sum(QuizResult.time_taken), 0),
+                    func.sum(QuizResult.score),
+                    func.sum(QuizResult.total_questions),
+                )
+                .select_from(QuizResult)
+                .outerjoin(User, User.id == QuizResult.user_id)
+                .where(QuizResult.created_at >= start_dt, QuizResult.created_at < end_dt)
+                .group_by(quiz_day, User.role, QuizResult.difficulty)
+            ))
+
+            # Coverage only grows over a contiguous range of days.
+            state = db.get(RollupState, STATE_NAME)
+            if state is None:
+                db.add(RollupState(name=STATE_NAME, covered_until=end_day, updated_at=datetime.utcnow()))
+            elif first_day <= state.covered_until < end_day:
+                state.covered_until = end_day
+                state.updated_at = datetime.utcnow()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self._checked_at = 0.0
+        self.rebuilds += 1
+        self.days_rebuilt += (end_day - first_day).days
+        self.last_rebuild_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    def backfill(self, chunk_days: int = 30) -> int:
+        """Roll up all history up to yesterday, `chunk_days` per transaction; returns the days covered."""
+        db = self.session_factory()
+        try:
+            oldest = [
+                db.scalar(select(func.min(SearchHistory.created_at))),
+                db.scalar(select(func.min(QuizResult.created_at))),
+            ]
+        finally:
+            db.close()
+
+        today = datetime.utcnow().date()
+        oldest = [value.date() for value in oldest if value is not None]
+        day = min(oldest) if oldest else today
+        first_day = day
+        while True:
+            end = min(day + timedelta(days=chunk_days), today)
+            # Runs at least once, so the coverage is recorded even without data.
+            self.rebuild(day, end)
+            day = end
+            if day >= today:
+                break
+        return (today - first_day).days
+
+    def stats(self) -> dict:
+        covered = self._covered_until
+        return {
+            "covered_until": covered.isoformat() if covered else None,
+            "rebuilds": self.rebuilds,
+            "days_rebuilt": self.days_rebuilt,
+            "last_rebuild_ms": self.last_rebuild_ms,
+            "interval_seconds": self.interval,
+        }
+
+
+rollup_job = RollupJob()
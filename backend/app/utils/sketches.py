@@ -0,0 +1,141 @@
+"""Fixed-size streaming summaries: heavy hitters and distinct counts.
+
+Both are mergeable, so summaries kept by different workers (or for different
+hours) can be combined into one answer.
+"""
+import base64
+import hashlib
+import math
+
+
+class SpaceSaving:
+    """Approximate top-K counter over a stream, holding at most `capacity` terms.
+
+    A new term that finds the summary full replaces the term with the smallest
+    count and inherits that count as its error. Each reported count is an upper
+    bound on the true count, at most `error` too high, and every term seen more
+    than total/capacity times is guaranteed to be present.
+    """
+    __slots__ = ("capacity", "counts", "errors", "total")
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, term: str, count: int = 1):
+        self.total += count
+        if term in self.counts:
+            self.counts[term] += count
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[term] = count
+            self.errors[term] = 0
+            return
+        # A linear scan is cheaper than keeping a heap in step at this size.
+        evicted = min(self.counts, key=self.counts.get)
+        floor = self.counts.pop(evicted)
+        del self.errors[evicted]
+        self.counts[term] = floor + count
+        self.errors[term] = floor
+
+    def floor(self) -> int:
+        """Upper bound on the count of any term that is not in the summary."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def top(self, limit: int):
+        """[(term, count, error)] of the `limit` largest counts."""
+        ranked = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(term, count, self.errors[term]) for term, count in ranked]
+
+    @classmethod
+    def merge(cls, summaries, capacity: int = None):
+        """Combine summaries of disjoint streams, keeping the bounds valid."""
+        summaries = list(summaries)
+        merged = cls(capacity or max((s.capacity for s in summaries), default=100))
+        floors = [s.floor() for s in summaries]
+        terms = set()
+        for s in summaries:
+            terms.update(s.counts)
+            merged.total += s.total
+        for term in terms:
+            count = error = 0
+            for s, floor in zip(summaries, floors):
+                if term in s.counts:
+                    count += s.counts[term]
+                    error += s.errors[term]
+                else:
+                    # The term may have been seen up to `floor` times and evicted.
+                    count += floor
+                    error += floor
+            merged.counts[term] = count
+            merged.errors[term] = error
+        if len(merged.counts) > merged.capacity:
+            keep = sorted(merged.counts, key=lambda term: (-merged.counts[term], term))[:merged.capacity]
+            merged.counts = {term: merged.counts[term] for term in keep}
+            merged.errors = {term: merged.errors[term] for term in keep}
+        return merged
+
+    def to_dict(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "total": self.total,
+            "items": [[term, count, self.errors[term]] for term, count in self.counts.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        summary = cls(data["capacity"])
+        summary.total = data.get("total", 0)
+        for term, count, error in data["items"]:
+            summary.counts[term] = count
+            summary.errors[term] = error
+        return summary
+
+
+class HyperLogLog:
+    """Distinct count estimate in 2**precision bytes (about 1.04 / sqrt(2**precision) relative error)."""
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = 11, registers: bytes = None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(1 << precision)
+
+    def add(self, value):
+        hashed = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        # Position of the first 1 bit in the remaining 64 - precision bits.
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting).
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def update(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLogs of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def to_dict(self) -> dict:
+        return {"precision": self.precision, "registers": base64.b64encode(bytes(self.registers)).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data["precision"], base64.b64decode(data["registers"]))
@@ -0,0 +1,244 @@
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, tuple_
+
+from ..database import SessionLocal
+from ..models import SketchSnapshot
+from .background import PeriodicFlusher
+from .sketches import HyperLogLog, SpaceSaving
+
+
+HOUR_FORMAT = "%Y-%m-%dT%H"
+DAY_FORMAT = "%Y-%m-%d"
+LANGUAGE_KEYS = {"english": "en", "telugu": "te", "hindi": "hi"}
+
+
+def _language_key(language: str) -> str:
+    language = (language or "en").strip().lower()
+    return LANGUAGE_KEYS.get(language, language)
+
+
+class TrendTracker(PeriodicFlusher):
+    """Live "trending now" terms and daily active users, kept in fixed-size sketches.
+
+    The search and quiz routes feed every event in as it happens: the resolved
+    core term goes into a Space-Saving summary per (UTC hour, language) and the
+    user id into a HyperLogLog per (UTC day, role). Nothing reads the history
+    tables, and memory stays bounded by TRENDS_TERMS_CAPACITY terms per hour
+    and language for TRENDS_RETENTION_HOURS hours, plus 2**ACTIVE_USERS_HLL_PRECISION
+    bytes per role and day for ACTIVE_USERS_RETENTION_DAYS days (about 4 MB
+    with the defaults and the three app languages).
+
+    Every TRENDS_SNAPSHOT_INTERVAL seconds the sketches that changed are
+    written to sketch_snapshots under this process's name. Reads merge the
+    live sketches with the snapshots of every other process (including
+    earlier runs of this one), so each worker answers for the whole
+    deployment, lagging by at most one interval; events of a process that
+    dies before its next snapshot are lost.
+    """
+    def __init__(self, session_factory=SessionLocal):
+        super().__init__("trends", float(os.getenv("TRENDS_SNAPSHOT_INTERVAL", "60")))
+        self.session_factory = session_factory
+        self.capacity = int(os.getenv("TRENDS_TERMS_CAPACITY", "100"))
+        self.retention_hours = int(os.getenv("TRENDS_RETENTION_HOURS", "48"))
+        self.retention_days = int(os.getenv("ACTIVE_USERS_RETENTION_DAYS", "7"))
+        self.precision = int(os.getenv("ACTIVE_USERS_HLL_PRECISION", "11"))
+        self.source = f"{socket.gethostname()}:{os.getpid()}"[:100]
+        self._lock = threading.Lock()
+        self._terms = {}  # (hour, language) -> SpaceSaving
+        self._users = {}  # (day, role) -> HyperLogLog
+        self._dirty = set()
+        self.events = 0
+        self.snapshots = 0
+        self.last_snapshot_ms = 0.0
+
+    def record_search(self, term: str, language: str, user_id: int = None, role: str = None):
+        """Count a search for its resolved term; signed-in users also count as active."""
+        now = datetime.utcnow()
+        bucket = (now.strftime(HOUR_FORMAT), _language_key(language))
+        with self._lock:
+            if term:
+                summary = self._terms.get(bucket)
+                if summary is None:
+                    summary = self._terms[bucket] = SpaceSaving(self.capacity)
+                    self._prune(now)
+                summary.add(term)
+                self._dirty.add(("terms",) + bucket)
+            if user_id is not None:
+                self._add_user(now, user_id, role)
+            self.events += 1
+        self._ensure_worker()
+
+    def record_activity(self, user_id: int, role: str = None):
+        """Count a user as active today (e.g. on a saved quiz)."""
+        now = datetime.utcnow()
+        with self._lock:
+            self._add_user(now, user_id, role)
+            self.events += 1
+        self._ensure_worker()
+
+    def _add_user(self, now: datetime, user_id: int, role: str):
+        day = now.strftime(DAY_FORMAT)
+        for key in (role or "unknown", "all"):
+            sketch = self._users.get((day, key))
+            if sketch is None:
+                sketch = self._users[(day, key)] = HyperLogLog(self.precision)
+                self._prune(now)
+            sketch.add(user_id)
+            self._dirty.add(("users", day, key))
+
+    def _prune(self, now: datetime):
+        # Called with the lock held whenever a new bucket is opened.
+        first_hour = (now - timedelta(hours=self.retention_hours - 1)).strftime(HOUR_FORMAT)
+        first_day = (now - timedelta(days=self.retention_days - 1)).strftime(DAY_FORMAT)
+        for bucket in [bucket for bucket in self._terms if bucket[0] < first_hour]:
+            del self._terms[bucket]
+        for bucket in [bucket for bucket in self._users if bucket[0] < first_day]:
+            del self._users[bucket]
+
+    def flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            rows = []
+            for kind, bucket, key in dirty:
+                sketch = (self._terms if kind == "terms" else self._users).get((bucket, key))
+                if sketch is not None:
+                    rows.append({
+                        "source": self.source,
+                        "kind": kind,
+                        "bucket": bucket,
+                        "key": key,
+                        "payload": json.dumps(sketch.to_dict(), ensure_ascii=False),
+                        "updated_at": datetime.utcnow(),
+                    })
+        if not rows:
+            return
+
+        start = time.perf_counter()
+        db = self.session_factory()
+        try:
+            db.execute(delete(SketchSnapshot).where(
+                SketchSnapshot.source == self.source,
+                tuple_(SketchSnapshot.kind, SketchSnapshot.bucket, SketchSnapshot.key).in_(
+                    [(row["kind"], row["bucket"], row["key"]) for row in rows]
+                ),
+            ))
+            db.execute(insert(SketchSnapshot), rows)
+            cutoff = datetime.utcnow() - timedelta(days=self.retention_days, hours=1)
+            db.execute(delete(SketchSnapshot).where(SketchSnapshot.updated_at < cutoff))
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._dirty |= dirty
+            raise
+        finally:
+            db.close()
+        self.snapshots += 1
+        self.last_snapshot_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    def _snapshots(self, kind: str, first_bucket: str):
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(SketchSnapshot.bucket, SketchSnapshot.key, SketchSnapshot.payload)
+                .filter(
+                    SketchSnapshot.kind == kind,
+                    SketchSnapshot.bucket >= first_bucket,
+                    SketchSnapshot.source != self.source,
+                )
+                .all()
+            )
+        except Exception as e:
+            # Without the table (migration not applied) only this process is reported.
+            print(f"[ERROR] Failed to read trend snapshots: {e}")
+            return []
+        finally:
+            db.close()
+        return [(bucket, key, json.loads(payload)) for bucket, key, payload in rows]
+
+    def trending(self, hours: int = 6, language: str = None, limit: int = 10) -> dict:
+        """Top terms of the last `hours` hours, with their counts in the hours before."""
+        hours = max(1, min(hours, self.retention_hours // 2))
+        language = _language_key(language) if language else None
+        now = datetime.utcnow()
+        current_start = (now - timedelta(hours=hours - 1)).strftime(HOUR_FORMAT)
+        previous_start = (now - timedelta(hours=2 * hours - 1)).strftime(HOUR_FORMAT)
+
+        current, previous = [], []
+        with self._lock:
+            live = [(bucket, key, SpaceSaving.from_dict(summary.to_dict())) for (bucket, key), summary in self._terms.items()]
+        stored = [(bucket, key, SpaceSaving.from_dict(data)) for bucket, key, data in self._snapshots("terms", previous_start)]
+        for bucket, key, summary in live + stored:
+            if language and key != language:
+                continue
+            if bucket >= current_start:
+                current.append(summary)
+            elif bucket >= previous_start:
+                previous.append(summary)
+
+        merged = SpaceSaving.merge(current, self.capacity)
+        before = SpaceSaving.merge(previous, self.capacity)
+        return {
+            "hours": hours,
+            "language": language,
+            "searches": merged.total,
+            "terms": [
+                {"word": term, "count": count, "error": error, "previous": before.counts.get(term, 0)}
+                for term, count, error in merged.top(limit)
+            ],
+        }
+
+    def active_users(self, days: int = 7) -> list:
+        """Estimated distinct active users per UTC day, overall and per role, newest first."""
+        days = max(1, min(days, self.retention_days))
+        today = datetime.utcnow().date()
+        first_day = (today - timedelta(days=days - 1)).strftime(DAY_FORMAT)
+
+        merged = {}
+        with self._lock:
+            live = [(bucket, key, HyperLogLog(sketch.precision, sketch.registers)) for (bucket, key), sketch in self._users.items()]
+        stored = [(bucket, key, HyperLogLog.from_dict(data)) for bucket, key, data in self._snapshots("users", first_day)]
+        for bucket, key, sketch in live + stored:
+            if bucket < first_day:
+                continue
+            existing = merged.get((bucket, key))
+            if existing is None:
+                merged[(bucket, key)] = sketch
+            else:
+                existing.update(sketch)
+
+        result = []
+        for offset in range(days):
+            day = (today - timedelta(days=offset)).strftime(DAY_FORMAT)
+            total = merged.get((day, "all"))
+            result.append({
+                "date": day,
+                "active_users": total.count() if total else 0,
+                "by_role": {key: sketch.count() for (bucket, key), sketch in sorted(merged.items()) if bucket == day and key != "all"},
+            })
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            tracked_terms = sum(len(summary) for summary in self._terms.values())
+            hll_bytes = sum(len(sketch.registers) for sketch in self._users.values())
+            term_buckets, user_buckets = len(self._terms), len(self._users)
+        return {
+            "events": self.events,
+            "term_buckets": term_buckets,
+            "tracked_terms": tracked_terms,
+            "user_buckets": user_buckets,
+            "hll_bytes": hll_bytes,
+            "snapshots": self.snapshots,
+            "last_snapshot_ms": self.last_snapshot_ms,
+            "snapshot_interval_seconds": self.interval,
+        }
+
+
+trends = TrendTracker()
@@ -0,0 +1,104 @@
+"""Maintenance of the per-user totals in user_stats.
+
+Every write path that adds or removes something counted there executes
+`increment_statement()` (or `decrement_statement()`) in the same transaction
+as the row change, so the totals commit or roll back together with it.
+`reconcile()` rebuilds the whole table from search_history and quiz_results.
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, case, delete, func, insert, literal, select, text, union, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..models import QuizResult, SearchHistory, UserStats
+
+
+COUNTERS = ("searches", "videos_watched", "quiz_attempts", "quiz_score_sum", "quiz_question_sum", "quiz_time")
+
+
+def increment_statement(dialect_name: str, deltas: dict):
+    """Upsert adding `deltas` ({user_id: {counter: amount}}) to each user's row."""
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    now = datetime.utcnow()
+    # One row per user: an upsert may not touch the same row twice.
+    rows = [
+        {"user_id": user_id, **{name: counts.get(name, 0) for name in COUNTERS}, "updated_at": now}
+        for user_id, counts in deltas.items()
+    ]
+    statement = dialect_insert(UserStats).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={
+            **{name: getattr(UserStats, name) + getattr(statement.excluded, name) for name in COUNTERS},
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+
+
+def decrement_statement(user_id: int, **counts):
+    """Subtract `counts` from a user's row (a no-op for users without one yet)."""
+    return (
+        update(UserStats)
+        .where(UserStats.user_id == user_id)
+        .values(
+            **{name: getattr(UserStats, name) - amount for name, amount in counts.items()},
+            updated_at=datetime.utcnow(),
+        )
+    )
+
+
+def reconcile(db) -> int:
+    """Rebuild user_stats from the source tables in one transaction; returns the rows written."""
+    if db.get_bind().dialect.name == "postgresql":
+        # Blocks the write paths' upserts until the rebuild commits, so none
+        # is lost or counted twice; plain reads continue.
+        db.execute(text("LOCK TABLE user_stats IN EXCLUSIVE MODE"))
+
+    searches = (
+        select(
+            SearchHistory.user_id.label("user_id"),
+            func.count().label("searches"),
+            func.sum(case((SearchHistory.video_watched == True, 1), else_=0)).label("videos_watched"),
+        )
+        .group_by(SearchHistory.user_id)
+        .subquery()
+    )
+    quizzes = (
+        select(
+            QuizResult.user_id.label("user_id"),
+            func.count().label("quiz_attempts"),
+            func.sum(QuizResult.score).label("quiz_score_sum"),
+            func.sum(QuizResult.total_questions).label("quiz_question_sum"),
+            func.sum(func.coalesce(QuizResult.time_taken, 0)).label("quiz_time"),
+        )
+        .group_by(QuizResult.user_id)
+        .subquery()
+    )
+    # Every user id found in the history, as the write paths' upserts do: a
+    # deleted user's rows keep counting wherever history rows are counted.
+    user_ids = union(
+        select(SearchHistory.user_id.label("user_id")).where(SearchHistory.user_id.isnot(None)),
+        select(QuizResult.user_id.label("user_id")),
+    ).subquery()
+    totals = (
+        select(
+            user_ids.c.user_id,
+            func.coalesce(searches.c.searches, 0),
+            func.coalesce(searches.c.videos_watched, 0),
+            func.coalesce(quizzes.c.quiz_attempts, 0),
+            func.coalesce(quizzes.c.quiz_score_sum, 0),
+            func.coalesce(quizzes.c.quiz_question_sum, 0),
+            func.coalesce(quizzes.c.quiz_time, 0),
+            literal(datetime.utcnow(), DateTime),
+        )
+        .outerjoin(searches, searches.c.user_id == user_ids.c.user_id)
+        .outerjoin(quizzes, quizzes.c.user_id == user_ids.c.user_id)
+    )
+    try:
+        db.execute(delete(UserStats))
+        result = db.execute(insert(UserStats).from_select(["user_id", *COUNTERS, "updated_at"], totals))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return result.rowcount
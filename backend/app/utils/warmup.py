@@ -0,0 +1,162 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+from ..database import SessionLocal, async_engine, engine
+from ..models import SearchHistory
+from .fast_llm_service import llm_service
+
+
+LANGUAGE_NAMES = {"en": "English", "te": "Telugu", "hi": "Hindi"}
+
+
+class Warmup:
+    """Startup warmup behind the /ready readiness gate.
+
+    Until `run()` finishes, /ready answers 503 so the load balancer keeps
+    traffic on the old instance while this one:
+
+    * opens WARMUP_DB_CONNECTIONS pooled connections on both the sync and the
+      async engine (retried until the database answers),
+    * completes a TLS handshake with Groq and with YouTube, so the first search
+      does not pay for DNS, TCP and TLS set-up (best effort: an outage of
+      either does not keep the instance out of rotation),
+    * loads the explanations of the WARMUP_PRELOAD_TOP_K most searched terms of
+      the last 30 days from the explanation store into the memory cache.
+
+    /health stays a plain liveness check. WARMUP_ENABLED=0 marks the instance
+    ready immediately.
+    """
+    def __init__(self):
+        self.enabled = os.getenv("WARMUP_ENABLED", "1") == "1"
+        self.db_connections = int(os.getenv("WARMUP_DB_CONNECTIONS", "5"))
+        self.preload_top_k = int(os.getenv("WARMUP_PRELOAD_TOP_K", "50"))
+        self.handshake_timeout = float(os.getenv("WARMUP_HANDSHAKE_TIMEOUT", "5"))
+        self.state = "pending"
+        self.steps = {}
+        self.total_ms = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    async def run(self):
+        if not self.enabled:
+            self.state = "ready"
+            return
+        self.state = "running"
+        start = time.perf_counter()
+
+        await self._step("db_pool", asyncio.to_thread, self._open_sync_pool, retry=True)
+        await self._step("async_db_pool", self._open_async_pool, retry=True)
+        await asyncio.gather(
+            self._step("groq_handshake", asyncio.to_thread, self._groq_handshake),
+            self._step("youtube_handshake", asyncio.to_thread, self._youtube_handshake),
+        )
+        if self.preload_top_k > 0:
+            await self._step("preload_explanations", asyncio.to_thread, self._preload_explanations)
+
+        self.total_ms = round((time.perf_counter() - start) * 1000, 2)
+        self.state = "ready"
+        timings = ", ".join(f"{name} {step['ms']}ms{'' if step['ok'] else ' (failed)'}" for name, step in self.steps.items())
+        print(f"[INFO] Warmup finished in {self.total_ms}ms: {timings}")
+
+    async def _step(self, name: str, func, *args, retry: bool = False):
+        start = time.perf_counter()
+        delay = 0.5
+        while True:
+            try:
+                detail = await func(*args)
+                self.steps[name] = {"ok": True, "ms": round((time.perf_counter() - start) * 1000, 2), "detail": detail}
+                return
+            except Exception as e:
+                self.steps[name] = {"ok": False, "ms": round((time.perf_counter() - start) * 1000, 2), "error": str(e)}
+                if not retry:
+                    print(f"[ERROR] Warmup step {name} failed: {e}")
+                    return
+                print(f"[ERROR] Warmup step {name} failed, retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 10)
+
+    def _connection_count(self, pool) -> int:
+        size = pool.size() if hasattr(pool, "size") else self.db_connections
+        return max(0, min(self.db_connections, size))
+
+    def _open_sync_pool(self):
+        # All connections are held at once, so the pool really opens N of them
+        # instead of handing the same one back N times.
+        connections = []
+        try:
+            for _ in range(self._connection_count(engine.pool)):
+                connection = engine.connect()
+                connections.append(connection)
+                connection.execute(text("SELECT 1"))
+        finally:
+            for connection in connections:
+                connection.close()
+        return {"connections": len(connections)}
+
+    async def _open_async_pool(self):
+        connections = []
+        try:
+            for _ in range(self._connection_count(async_engine.pool)):
+                connection = await async_engine.connect()
+                connections.append(connection)
+                await connection.execute(text("SELECT 1"))
+        finally:
+            for connection in connections:
+                await connection.close()
+        return {"connections": len(connections)}
+
+    def _groq_handshake(self):
+        # Any HTTP answer (even 401) means DNS, TCP and TLS are done and the
+        # client's connection pool holds a live connection.
+        client = llm_service.client.with_options(timeout=self.handshake_timeout, max_retries=0)
+        try:
+            client.models.list()
+        except Exception as e:
+            if getattr(e, "status_code", None) is None:
+                raise
+            return {"status": e.status_code}
+        return {"status": 200}
+
+    def _youtube_handshake(self):
+        response = llm_service.http.head("https://www.youtube.com/", timeout=self.handshake_timeout)
+        return {"status": response.status_code}
+
+    def _preload_explanations(self):
+        since = datetime.utcnow() - timedelta(days=30)
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(SearchHistory.normalized_query, SearchHistory.search_language)
+                .where(SearchHistory.created_at >= since, SearchHistory.normalized_query.isnot(None))
+                .group_by(SearchHistory.normalized_query, SearchHistory.search_language)
+                .order_by(func.count().desc())
+                .limit(self.preload_top_k)
+            ).all()
+        finally:
+            db.close()
+
+        loaded = 0
+        for query, language in rows:
+            language = LANGUAGE_NAMES.get((language or "en").lower(), language)
+            try:
+                if llm_service.preload(query, language):
+                    loaded += 1
+            except Exception as e:
+                print(f"[ERROR] Failed to preload explanation for {query!r}: {e}")
+        return {"candidates": len(rows), "loaded": loaded}
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "total_ms": self.total_ms,
+            "steps": self.steps,
+        }
+
+
+warmup = Warmup()
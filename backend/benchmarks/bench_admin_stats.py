@@ -0,0 +1,156 @@
+"""Latency and database round trips of GET /admin/stats on a large history.
+
+    cd backend
+    python -m benchmarks.bench_admin_stats                          # 1M searches, throwaway SQLite
+    python -m benchmarks.bench_admin_stats --rows 5000000
+    python -m benchmarks.bench_admin_stats --database-url $DATABASE_URL --rows 0   # existing data
+    python -m benchmarks.bench_admin_stats --rollups                # read whole days from the daily rollups
+
+Seeds --rows search_history rows (plus users, quiz results and reviews), then
+requests the dashboard with a few typical filter combinations and reports the
+median and p95 latency and the number of SQL statements per request. The
+dashboard result cache is cleared before every request. --rollups runs the
+rollup backfill first; without it the rollup state is removed so every request
+scans the raw tables.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from .harness import create_schema, percentile, setup_environment
+
+FILTERS = [
+    ("all time", {}),
+    ("last 7 days", {"timeframe": "7d"}),
+    ("30 days, students", {"timeframe": "30d", "roles": "student"}),
+    ("Telugu + Hindi", {"languages": "telugu,hindi"}),
+    ("physics quizzes >= 50%", {"topics": "physics", "min_quiz_score": 50}),
+]
+
+
+def _seed(db, models, rows: int, users: int):
+    from sqlalchemy import insert, text
+
+    rng = random.Random(41)
+    now = datetime.utcnow()
+    terms = ["photosynthesis", "gravity", "dna", "atom", "mitosis", "osmosis", "friction", "magnetism"]
+    terms += [f"term {i}" for i in range(2000)]
+
+    db.execute(insert(models.User.__table__), [
+        {
+            "username": f"stats_user_{i}",
+            "role": "admin" if i % 100 == 0 else rng.choice(["student", "teacher", "general_user"]),
+            "password_hash": "x",
+            "time_spent": rng.randint(0, 36000),
+            "created_at": now - timedelta(days=rng.random() * 365),
+        }
+        for i in range(users)
+    ])
+    db.execute(insert(models.AppReview.__table__), [
+        {"user_id": user_id, "rating": rng.randint(1, 5), "comment": "", "created_at": now - timedelta(days=rng.random() * 365)}
+        for user_id in range(1, users + 1, 3)
+    ])
+    for start in range(0, rows, 10000):
+        batch = min(10000, rows - start)
+        db.execute(insert(models.SearchHistory.__table__), [
+            {
+                "user_id": rng.randint(1, users),
+                "query": rng.choice(terms).title(),
+                "normalized_query": None,
+                "result": "",
+                "created_at": now - timedelta(days=rng.random() * 365),
+                "search_level": rng.choice(["easy", "medium", "hard"]),
+                "search_language": rng.choices(["en", "te", "hi"], weights=[8, 1, 1])[0],
+                "search_source": rng.choices(["text", "image", "voice"], weights=[8, 1, 1])[0],
+                "video_watched": rng.random() < 0.1,
+            }
+            for _ in range(batch)
+        ])
+        db.execute(insert(models.QuizResult.__table__), [
+            {
+                "user_id": rng.randint(1, users),
+                "score": rng.randint(0, 20),
+                "total_questions": 20,
+                "difficulty": rng.choice(["easy", "medium", "hard"]),
+                "topic": rng.choice(["Physics", "Biology", "Chemistry"]),
+                "time_taken": rng.randint(30, 900),
+                "created_at": now - timedelta(days=rng.random() * 365),
+            }
+            for _ in range(batch // 50)
+        ])
+    db.commit()
+    db.execute(text("ANALYZE"))
+    db.commit()
+
+
+def main(args):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import delete, event, select
+
+    from app import models
+    from app.auth import create_token
+    from app.database import SessionLocal, engine
+    from app.main import app
+    from app.utils.dashboard_cache import dashboard_cache
+    from app.utils.rollups import rollup_job
+
+    create_schema()
+    db = SessionLocal()
+    try:
+        if args.rows:
+            start = time.perf_counter()
+            _seed(db, models, args.rows, args.users)
+            print(f"seeded {args.rows} searches in {time.perf_counter() - start:.1f}s")
+        if args.rollups:
+            start = time.perf_counter()
+            rollup_job.backfill()
+            print(f"rolled up daily history in {time.perf_counter() - start:.1f}s")
+        else:
+            db.execute(delete(models.RollupState))
+            db.commit()
+        admin_id = db.scalar(select(models.User.id).where(models.User.role == "admin").limit(1))
+    finally:
+        db.close()
+    if admin_id is None:
+        raise SystemExit("no admin user in the database")
+
+    statements = [0]
+
+    def count_statement(*_):
+        statements[0] += 1
+
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_token('benchmark-admin', user_id=admin_id)}"}
+    print(f"database: {engine.dialect.name}, {args.repeat} requests per filter")
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        for label, params in FILTERS:
+            client.get("/admin/stats", params=params, headers=headers).raise_for_status()
+            statements[0] = 0
+            timings = []
+            for _ in range(args.repeat):
+                dashboard_cache.clear()
+                start = time.perf_counter()
+                client.get("/admin/stats", params=params, headers=headers).raise_for_status()
+                timings.append((time.perf_counter() - start) * 1000)
+            print(
+                f"  {label:<24} median {statistics.median(timings):8.1f}ms  p95 {percentile(timings, 95):8.1f}ms"
+                f"  {statements[0] / args.repeat:4.1f} statements/request"
+            )
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="search_history rows to seed (0 uses existing data)")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rollups", action="store_true", help="backfill the daily rollups before measuring")
+    args = parser.parse_args()
+
+    setup_environment(args.database_url)
+    main(args)
@@ -0,0 +1,97 @@
+"""Import time and time-to-first-response of a fresh worker.
+
+    cd backend
+    python -m benchmarks.bench_cold_start
+    python -m benchmarks.bench_cold_start --auto-migrate      # also create the schema on startup
+    python -m benchmarks.bench_cold_start --database-url $DATABASE_URL
+
+Each run starts a new interpreter, as a Render cold start does. "import" is
+the time to `import app.main`; "first response" is the time from launching
+uvicorn until GET /quiz/leaderboard (one real DB query) answers. The heavy
+optional modules that ended up imported are listed, to catch regressions that
+pull the Groq SDK or requests back onto the import path.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from .harness import BACKEND_DIR, create_schema, setup_environment
+
+HEAVY_MODULES = ["groq", "requests", "httpx", "asyncpg"]
+
+_IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import(env) -> dict:
+    out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_first_response(env, timeout: float = 60) -> float:
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/quiz/leaderboard"
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=5) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("server did not answer within the timeout")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(args):
+    create_schema()
+    env = dict(os.environ)
+    if args.auto_migrate:
+        env["AUTO_MIGRATE"] = "1"
+
+    imports = [measure_import(env) for _ in range(args.runs)]
+    first_responses = [measure_first_response(env) for _ in range(args.runs)]
+
+    import_ms = [r["seconds"] * 1000 for r in imports]
+    first_ms = [t * 1000 for t in first_responses]
+    print(f"runs={args.runs} auto_migrate={args.auto_migrate}")
+    print(f"  import app.main   median {statistics.median(import_ms):7.1f}ms  min {min(import_ms):7.1f}ms")
+    print(f"  first response    median {statistics.median(first_ms):7.1f}ms  min {min(first_ms):7.1f}ms")
+    print(f"  heavy modules loaded at import: {', '.join(imports[0]['loaded']) or 'none'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--auto-migrate", action="store_true", help="set AUTO_MIGRATE=1 (create the schema on startup)")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    setup_environment(args.database_url)
+    main(args)
@@ -0,0 +1,159 @@
+"""Memory and throughput of streaming GET /admin/export_data.
+
+    cd backend
+    python -m benchmarks.bench_export                       # 1M searches, throwaway SQLite
+    python -m benchmarks.bench_export --rows 200000 --json  # also time the one-document JSON export
+    python -m benchmarks.bench_export --database-url $DATABASE_URL --rows 0
+
+Seeds --rows search_history rows, starts the app under uvicorn in a child
+process, downloads the search_analytics section as gzipped CSV and as NDJSON,
+and reports rows per second and the server's peak RSS during each download
+(read from /proc, so Linux only). A constant-memory export keeps the peak flat
+as --rows increases; --json runs the all-sections JSON document for comparison.
+The server runs in its own process because the in-process TestClient buffers
+whole response bodies.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from .harness import BACKEND_DIR, create_schema, setup_environment
+
+
+def _memory_mb(pid: int, field: str) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _reset_peak(pid: int):
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as refs:
+            refs.write("5")  # resets VmHWM to the current RSS
+    except OSError:
+        pass
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _seed(db, models, rows: int, users: int):
+    import random
+
+    from sqlalchemy import insert
+
+    rng = random.Random(48)
+    now = datetime.utcnow()
+    db.execute(insert(models.User.__table__), [
+        {"username": f"export_user_{i}", "role": "admin" if i == 0 else "student", "password_hash": "x", "created_at": now}
+        for i in range(users)
+    ])
+    for start in range(0, rows, 10000):
+        db.execute(insert(models.SearchHistory.__table__), [
+            {
+                "user_id": rng.randint(2, users),
+                "query": f"term {rng.randint(0, 5000)}",
+                "result": "",
+                "created_at": now - timedelta(minutes=start + i),
+                "search_level": rng.choice(["easy", "medium", "hard"]),
+                "search_language": rng.choice(["en", "te", "hi"]),
+                "search_source": "text",
+            }
+            for i in range(min(10000, rows - start))
+        ])
+    db.commit()
+
+
+def _download(client, headers, params, encoding):
+    start = time.perf_counter()
+    received = 0
+    with client.stream("GET", "/admin/export_data", params=params, headers={**headers, "Accept-Encoding": encoding}, timeout=None) as response:
+        response.raise_for_status()
+        for chunk in response.iter_raw():
+            received += len(chunk)
+    return time.perf_counter() - start, received
+
+
+def main(args):
+    import httpx
+    from sqlalchemy import func, select
+
+    from app import models
+    from app.database import SessionLocal
+    from app.utils.user_stats import reconcile
+
+    create_schema()
+    db = SessionLocal()
+    try:
+        if args.rows:
+            start = time.perf_counter()
+            _seed(db, models, args.rows, args.users)
+            reconcile(db)
+            print(f"seeded {args.rows} searches in {time.perf_counter() - start:.1f}s")
+        admin_id = db.scalar(select(models.User.id).where(models.User.role == "admin").limit(1))
+        total = db.scalar(select(func.count()).select_from(models.SearchHistory))
+    finally:
+        db.close()
+    if admin_id is None:
+        raise SystemExit("no admin user in the database")
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=os.environ.copy(),
+    )
+    client = httpx.Client(base_url=f"http://127.0.0.1:{port}")
+    try:
+        for _ in range(100):
+            try:
+                client.get("/health")
+                break
+            except httpx.TransportError:
+                time.sleep(0.2)
+        _measure(client, server.pid, admin_id, total, args)
+    finally:
+        client.close()
+        server.terminate()
+        server.wait()
+
+
+def _measure(client, pid, admin_id, total, args):
+    from app.auth import create_token
+
+    headers = {"Authorization": f"Bearer {create_token('benchmark-admin', user_id=admin_id)}"}
+    runs = [
+        ("csv, gzip", {"format": "csv", "section": "search_analytics"}, "gzip"),
+        ("ndjson", {"format": "ndjson", "section": "search_analytics"}, "identity"),
+    ]
+    if args.json:
+        runs.append(("json document", {}, "identity"))
+
+    print(f"{total} search_history rows, server RSS {_memory_mb(pid, 'VmRSS'):.0f} MB at start")
+    for label, params, encoding in runs:
+        _reset_peak(pid)
+        elapsed, received = _download(client, headers, params, encoding)
+        print(
+            f"  {label:<14} {elapsed:7.1f}s  {total / elapsed:10.0f} rows/s  {received / 1e6:8.1f} MB sent"
+            f"  server peak RSS {_memory_mb(pid, 'VmHWM'):.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="search_history rows to seed (0 uses existing data)")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="also measure the all-sections JSON export")
+    args = parser.parse_args()
+
+    setup_environment(args.database_url)
+    main(args)
@@ -0,0 +1,113 @@
+"""Login throughput vs. /search latency under a mixed load.
+
+    cd backend
+    python -m benchmarks.bench_login_vs_search --logins 300 --searches 200
+    python -m benchmarks.bench_login_vs_search --inline-bcrypt   # previous behaviour
+
+Phase 1 measures /search alone. Phase 2 fires a login storm and the same
+searches concurrently. With the dedicated bcrypt pool, search latency should
+stay close to phase 1 while excess logins get a fast 503; with
+--inline-bcrypt, bcrypt runs in the shared threadpool as it used to and
+searches queue behind it.
+"""
+import argparse
+import asyncio
+import time
+
+from .harness import create_schema, install_simulated_llm, percentile, setup_environment
+
+
+async def _timed(client, method, url, **kwargs):
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    return response.status_code, time.perf_counter() - start
+
+
+async def _run_searches(client, count, prefix):
+    return await asyncio.gather(*[
+        _timed(client, "GET", "/search", params={"q": f"{prefix} term {i}", "fetch_media": "false"})
+        for i in range(count)
+    ])
+
+
+async def _run_logins(client, count, users):
+    return await asyncio.gather(*[
+        _timed(client, "POST", "/login", json={"username": users[i % len(users)], "password": "Benchmark1!"})
+        for i in range(count)
+    ])
+
+
+def _report(label, results):
+    latencies = [t for status, t in results if status == 200]
+    print(
+        f"  {label:<8} ok={len(latencies):>4} "
+        f"503={sum(1 for s, _ in results if s == 503):>4} "
+        f"p50={percentile(latencies, 50) * 1000:7.1f}ms p95={percentile(latencies, 95) * 1000:7.1f}ms"
+    )
+
+
+async def main(args):
+    import httpx
+    from app.main import app
+    from app.database import SessionLocal
+    from app.models import User
+    from app import security
+
+    create_schema()
+    install_simulated_llm(args.llm_latency)
+
+    if args.inline_bcrypt:
+        from fastapi.concurrency import run_in_threadpool
+
+        async def inline(fn, *fn_args):
+            return await run_in_threadpool(fn, *fn_args)
+        security._run_bcrypt = inline
+
+    password_hash = security.hash_password("Benchmark1!")
+    users = [f"bench_user_{i}" for i in range(args.users)]
+    db = SessionLocal()
+    db.add_all([User(username=name, role="student", password_hash=password_hash) for name in users])
+    db.commit()
+    db.close()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        print(f"bcrypt rounds={security.BCRYPT_ROUNDS} workers={security.BCRYPT_WORKERS} "
+              f"queue={security.BCRYPT_MAX_QUEUE} inline={args.inline_bcrypt} llm_latency={args.llm_latency}s")
+
+        print("phase 1: search only")
+        _report("search", await _run_searches(client, args.searches, "baseline"))
+
+        print("phase 2: login storm + search")
+        start = time.perf_counter()
+        logins, searches = await asyncio.gather(
+            _run_logins(client, args.logins, users),
+            _run_searches(client, args.searches, "mixed"),
+        )
+        elapsed = time.perf_counter() - start
+        _report("search", searches)
+        _report("login", logins)
+        ok_logins = sum(1 for status, _ in logins if status == 200)
+        print(f"  login throughput: {ok_logins / elapsed:.1f}/s over {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=300)
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--bcrypt-workers", type=int, default=2)
+    parser.add_argument("--bcrypt-queue", type=int, default=16)
+    parser.add_argument("--inline-bcrypt", action="store_true", help="run bcrypt in the shared threadpool (old behaviour)")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    setup_environment(
+        args.database_url,
+        BCRYPT_ROUNDS=args.bcrypt_rounds,
+        BCRYPT_WORKERS=args.bcrypt_workers,
+        BCRYPT_MAX_QUEUE=args.bcrypt_queue,
+    )
+    asyncio.run(main(args))
@@ -0,0 +1,208 @@
+"""Check that the hot read paths use their indexes.
+
+    cd backend
+    python -m benchmarks.explain_indexes                        # throwaway SQLite
+    python -m benchmarks.explain_indexes --database-url $DATABASE_URL --seed 0
+
+Each query below mirrors a route (/history, /admin/stats) or the top-quiz ranking.
+The script runs it once to capture the exact SQL and parameters the app would
+send, asks the database for its plan (EXPLAIN (FORMAT JSON) on Postgres,
+EXPLAIN QUERY PLAN on SQLite) and checks the expected index appears in it.
+It also reports the median run time. Exits non-zero if any index is unused.
+
+--seed inserts synthetic rows first (and runs ANALYZE) so the planner has
+realistic statistics; use --seed 0 against a database that already has data.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from .harness import create_schema, setup_environment
+
+
+def _queries(db, models):
+    from sqlalchemy import func, tuple_
+    User, SearchHistory, QuizResult = models.User, models.SearchHistory, models.QuizResult
+    week_ago = datetime.utcnow() - timedelta(days=7)
+
+    return [
+        (
+            "history: next page after a cursor",
+            "ix_search_history_user_id_created_at",
+            db.query(SearchHistory.id, SearchHistory.query, SearchHistory.created_at)
+            .filter(SearchHistory.user_id == 7, tuple_(SearchHistory.created_at, SearchHistory.id) < tuple_(week_ago, 10 ** 9))
+            .order_by(SearchHistory.created_at.desc(), SearchHistory.id.desc())
+            .limit(51),
+        ),
+        (
+            "admin stats: searches for one term (legacy key)",
+            "ix_search_history_query_lower_trim",
+            db.query(func.count(SearchHistory.id)).filter(func.lower(func.trim(SearchHistory.query)) == "photosynthesis"),
+        ),
+        (
+            "admin stats: last 7 days",
+            "ix_search_history_created_at",
+            db.query(SearchHistory.search_level, func.count(SearchHistory.id))
+            .filter(SearchHistory.created_at >= week_ago)
+            .group_by(SearchHistory.search_level),
+        ),
+        (
+            "admin stats: last 7 days in Telugu",
+            "ix_search_history_language_created_at",
+            db.query(func.count(SearchHistory.id))
+            .filter(SearchHistory.created_at >= week_ago, func.lower(SearchHistory.search_language).in_(["te", "telugu"])),
+        ),
+        (
+            "top quizzes: one difficulty",
+            "ix_quiz_results_difficulty_ratio",
+            db.query(QuizResult, User).join(User, QuizResult.user_id == User.id)
+            .filter(QuizResult.difficulty == "hard")
+            .order_by(models.quiz_score_ratio.desc(), QuizResult.total_questions.desc(), QuizResult.created_at.desc())
+            .limit(10),
+        ),
+        (
+            "top quizzes: all difficulties",
+            "ix_quiz_results_ratio",
+            db.query(QuizResult, User).join(User, QuizResult.user_id == User.id)
+            .order_by(models.quiz_score_ratio.desc(), QuizResult.total_questions.desc(), QuizResult.created_at.desc())
+            .limit(10),
+        ),
+    ]
+
+
+def _seed(db, models, rows: int, users: int):
+    from sqlalchemy import insert, text
+
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    terms = ["photosynthesis", "gravity", "dna", "atom", "mitosis", "osmosis", "friction", "magnetism"]
+    terms += [f"term {i}" for i in range(2000)]
+
+    db.execute(insert(models.User.__table__), [
+        {"username": f"explain_user_{i}", "role": "student", "password_hash": "x", "created_at": now}
+        for i in range(users)
+    ])
+    for start in range(0, rows, 10000):
+        db.execute(insert(models.SearchHistory.__table__), [
+            {
+                "user_id": rng.randint(1, users),
+                "query": rng.choice(terms).title(),
+                "result": "{}",
+                "created_at": now - timedelta(days=rng.random() * 365),
+                "search_level": rng.choice(["easy", "medium", "hard"]),
+                "search_language": rng.choices(["en", "te", "hi"], weights=[8, 1, 1])[0],
+                "search_source": "text",
+            }
+            for _ in range(min(10000, rows - start))
+        ])
+        db.execute(insert(models.QuizResult.__table__), [
+            {
+                "user_id": rng.randint(1, users),
+                "score": rng.randint(0, 20),
+                "total_questions": 20,
+                "difficulty": rng.choice(["easy", "medium", "hard"]),
+                "created_at": now - timedelta(days=rng.random() * 365),
+            }
+            for _ in range(min(10000, rows - start) // 5)
+        ])
+    db.commit()
+    db.execute(text("ANALYZE"))
+    db.commit()
+
+
+def _capture_sql(engine, run):
+    """Run `run()` and return the (statement, parameters) of its last cursor execute."""
+    from sqlalchemy import event
+
+    captured = {}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        captured["sql"] = (statement, parameters)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured["sql"]
+
+
+def _plan(engine, statement, parameters):
+    """Return (index names used, printable plan)."""
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if engine.dialect.name == "postgresql":
+            cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            indexes, lines = set(), []
+
+            def walk(node, depth=0):
+                name = node.get("Index Name")
+                if name:
+                    indexes.add(name)
+                lines.append("  " * depth + node["Node Type"] + (f" using {name}" if name else ""))
+                for child in node.get("Plans", []):
+                    walk(child, depth + 1)
+
+            walk(plan[0]["Plan"])
+            return indexes, lines
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        lines = [row[-1] for row in cursor.fetchall()]
+        indexes = {word for line in lines for word in line.replace("(", " ").split() if word.startswith("ix_")}
+        return indexes, lines
+    finally:
+        raw.close()
+
+
+def main(args):
+    from app import models
+    from app.database import SessionLocal, engine
+
+    create_schema()
+    db = SessionLocal()
+    try:
+        if args.seed:
+            start = time.perf_counter()
+            _seed(db, models, args.seed, args.users)
+            print(f"seeded {args.seed} searches in {time.perf_counter() - start:.1f}s")
+
+        print(f"database: {engine.dialect.name}")
+        failures = 0
+        for label, expected, query in _queries(db, models):
+            statement, parameters = _capture_sql(engine, query.all)
+            indexes, plan = _plan(engine, statement, parameters)
+
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                query.all()
+                timings.append(time.perf_counter() - start)
+
+            used = expected in indexes
+            failures += not used
+            print(f"{'PASS' if used else 'FAIL'}  {label:<44} {statistics.median(timings) * 1000:8.2f}ms  {expected}")
+            if not used or args.verbose:
+                for line in plan:
+                    print(f"        {line}")
+        return 1 if failures else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--seed", type=int, default=100000, help="synthetic search rows to insert first (0 to skip)")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--verbose", action="store_true", help="print every plan, not only failing ones")
+    args = parser.parse_args()
+
+    setup_environment(args.database_url)
+    sys.exit(main(args))
@@ -0,0 +1,86 @@
+"""Shared setup for the benchmark scripts.
+
+Benchmarks run the real FastAPI app in-process against a throwaway SQLite
+database (or DATABASE_URL when --database-url is given) with Groq replaced by
+a simulated backend of fixed latency, so results do not depend on the network.
+Import this module before anything from `app`.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def setup_environment(database_url: str = None, **env):
+    """Point the app at a benchmark database and set env overrides. Call before importing `app`."""
+    if not database_url:
+        database_url = f"sqlite:///{tempfile.mkdtemp(prefix='cc-bench-')}/bench.db"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ.setdefault("PREFETCH_ENABLED", "0")
+    os.environ.setdefault("WARMUP_ENABLED", "0")
+    for key, value in env.items():
+        os.environ[key] = str(value)
+    return database_url
+
+
+_EXPLANATION = {
+    "core_term": "Benchmark term",
+    "translated_term": "Benchmark term",
+    "is_corrected": False,
+    "corrected_term": "benchmark term",
+    "is_scientific": True,
+    "easy": "Easy explanation. Second line.",
+    "medium": "Medium explanation.",
+    "hard": "Hard explanation.",
+    "examples": ["Example 1", "Example 2"],
+    "related_words": ["One", "Two", "Three", "Four", "Five"],
+}
+
+
+class _SimulatedCompletions:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def create(self, **kwargs):
+        time.sleep(self.latency)
+        message = types.SimpleNamespace(content=json.dumps(_EXPLANATION))
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=message)],
+            usage=types.SimpleNamespace(total_tokens=800),
+        )
+
+
+class SimulatedGroq:
+    """Stands in for the Groq client: every completion sleeps `latency` seconds."""
+    def __init__(self, latency: float = 0.2):
+        self.chat = types.SimpleNamespace(completions=_SimulatedCompletions(latency))
+
+
+def install_simulated_llm(latency: float = 0.2):
+    from app.utils.fast_llm_service import llm_service
+    llm_service.client = SimulatedGroq(latency)
+    llm_service.get_youtube_video = lambda query: None
+    return llm_service
+
+
+def create_schema():
+    from app.database import Base, engine
+    from app import models  # noqa: F401  (registers the tables)
+    Base.metadata.create_all(engine)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
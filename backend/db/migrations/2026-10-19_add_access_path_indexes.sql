@@ -0,0 +1,41 @@
+-- Indexes for the hot read paths: /history, /admin/stats and the quiz leaderboard.
+-- CONCURRENTLY keeps the tables writable while the indexes build; run this file
+-- outside a transaction block (plain `psql -f`, not `psql -1`).
+
+-- /history and the quiz term picker: WHERE user_id = ? ORDER BY created_at DESC
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_search_history_user_id_created_at
+ON search_history (user_id, created_at DESC);
+
+-- The composite index above serves every user_id lookup the old one did.
+DROP INDEX CONCURRENTLY IF EXISTS ix_search_history_user_id;
+
+-- /admin/stats, legacy grouping key for rows without normalized_query
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_search_history_query_lower_trim
+ON search_history (lower(trim(query)));
+
+-- /admin/stats and /admin/export_data date windows
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_search_history_created_at
+ON search_history (created_at);
+
+-- /admin/stats language filter: WHERE lower(search_language) IN (...) AND created_at >= ?
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_search_history_language_created_at
+ON search_history (lower(search_language), created_at);
+
+-- Quiz leaderboard ordering. The expression must stay identical to
+-- `quiz_score_ratio` in app/models.py or the planner will not use these.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_quiz_results_difficulty_ratio
+ON quiz_results (
+  difficulty,
+  COALESCE(score * 1.0 / NULLIF(total_questions, 0), 0) DESC,
+  total_questions DESC,
+  created_at DESC
+);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_quiz_results_ratio
+ON quiz_results (
+  COALESCE(score * 1.0 / NULLIF(total_questions, 0), 0) DESC,
+  total_questions DESC,
+  created_at DESC
+);
+
+-- Verify with: python -m benchmarks.explain_indexes --database-url $DATABASE_URL
@@ -0,0 +1,36 @@
+-- Daily analytics rollups read by /admin/stats for whole days, so dashboard
+-- queries stop scanning the full search history. Filled by
+-- `python -m app.manage backfill-rollups` and kept current by the app.
+
+CREATE TABLE IF NOT EXISTS search_daily_rollups (
+  id SERIAL PRIMARY KEY,
+  day DATE NOT NULL,
+  role VARCHAR(30),
+  language VARCHAR(20),
+  level VARCHAR(20),
+  source VARCHAR(20),
+  searches INTEGER NOT NULL DEFAULT 0,
+  video_views INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS ix_search_daily_rollups_day ON search_daily_rollups (day);
+
+CREATE TABLE IF NOT EXISTS quiz_daily_rollups (
+  id SERIAL PRIMARY KEY,
+  day DATE NOT NULL,
+  role VARCHAR(30),
+  difficulty VARCHAR(20),
+  attempts INTEGER NOT NULL DEFAULT 0,
+  time_taken BIGINT NOT NULL DEFAULT 0,
+  score_sum BIGINT NOT NULL DEFAULT 0,
+  question_sum BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS ix_quiz_daily_rollups_day ON quiz_daily_rollups (day);
+
+-- Every day before covered_until is complete in the rollups.
+CREATE TABLE IF NOT EXISTS rollup_state (
+  name VARCHAR(50) PRIMARY KEY,
+  covered_until DATE NOT NULL,
+  updated_at TIMESTAMP DEFAULT NOW()
+);
@@ -0,0 +1,24 @@
+-- Explanations stored once per English core term and language, so a concept
+-- explained in one language is translated (not regenerated) for the others.
+
+CREATE TABLE IF NOT EXISTS explanations (
+  id SERIAL PRIMARY KEY,
+  core_key VARCHAR(255) NOT NULL,
+  language VARCHAR(20) NOT NULL,
+  payload TEXT NOT NULL,
+  source VARCHAR(20) DEFAULT 'generated',
+  created_at TIMESTAMP DEFAULT NOW(),
+  CONSTRAINT uq_explanations_core_key_language UNIQUE (core_key, language)
+);
+
+CREATE INDEX IF NOT EXISTS ix_explanations_core_key ON explanations (core_key);
+
+-- Normalized user query (any script) -> core term it resolved to
+CREATE TABLE IF NOT EXISTS explanation_aliases (
+  query_key VARCHAR(255) PRIMARY KEY,
+  core_key VARCHAR(255) NOT NULL,
+  is_corrected BOOLEAN DEFAULT FALSE,
+  created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_explanation_aliases_core_key ON explanation_aliases (core_key);
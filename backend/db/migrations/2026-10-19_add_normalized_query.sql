@@ -0,0 +1,11 @@
+-- Canonical query key shared by the explanation cache and admin analytics
+
+ALTER TABLE search_history
+ADD COLUMN IF NOT EXISTS normalized_query VARCHAR(255);
+
+CREATE INDEX IF NOT EXISTS ix_search_history_normalized_query
+ON search_history (normalized_query);
+
+-- Existing rows are filled in by the application normalizer
+-- (Unicode NFC, punctuation and "what is"/"define" stripping):
+--   python -m app.manage backfill-normalized-queries
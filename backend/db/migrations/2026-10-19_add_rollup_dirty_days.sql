@@ -0,0 +1,8 @@
+-- Days before the rollup refresh window whose search history changed
+-- (a search deleted, a video marked watched). The next rollup run rebuilds
+-- them and clears the mark.
+
+CREATE TABLE IF NOT EXISTS rollup_dirty_days (
+  day DATE PRIMARY KEY,
+  marked_at TIMESTAMP DEFAULT NOW()
+);
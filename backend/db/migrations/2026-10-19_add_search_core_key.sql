@@ -0,0 +1,13 @@
+-- Core term each search resolved to, so admin analytics can count concepts
+-- with a plain GROUP BY instead of fuzzy-merging query strings
+
+ALTER TABLE search_history
+ADD COLUMN IF NOT EXISTS core_key VARCHAR(255);
+
+CREATE INDEX IF NOT EXISTS ix_search_history_core_key
+ON search_history (core_key);
+
+-- Existing rows take the core term recorded in explanation_aliases, or their
+-- normalized query when the query never reached the explanation store
+-- (run backfill-normalized-queries first):
+--   python -m app.manage backfill-core-keys
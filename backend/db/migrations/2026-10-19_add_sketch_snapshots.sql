@@ -0,0 +1,17 @@
+-- Periodic snapshots of each app process's streaming trend sketches
+-- (top terms per hour and language, distinct users per day and role),
+-- merged by /admin/trending so every worker reports the whole deployment.
+
+CREATE TABLE IF NOT EXISTS sketch_snapshots (
+  id SERIAL PRIMARY KEY,
+  source VARCHAR(100) NOT NULL,
+  kind VARCHAR(20) NOT NULL,
+  bucket VARCHAR(20) NOT NULL,
+  key VARCHAR(30) NOT NULL,
+  payload TEXT NOT NULL,
+  updated_at TIMESTAMP DEFAULT NOW(),
+  CONSTRAINT uq_sketch_snapshots_bucket UNIQUE (source, kind, bucket, key)
+);
+
+CREATE INDEX IF NOT EXISTS ix_sketch_snapshots_bucket ON sketch_snapshots (bucket);
+CREATE INDEX IF NOT EXISTS ix_sketch_snapshots_updated_at ON sketch_snapshots (updated_at);
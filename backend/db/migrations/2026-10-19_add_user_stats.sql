@@ -0,0 +1,17 @@
+-- Per-user totals (searches, videos watched, quiz attempts, score and time)
+-- kept current by the write paths and read by /admin/users and
+-- /admin/export_data instead of aggregating the raw tables per user.
+
+CREATE TABLE IF NOT EXISTS user_stats (
+  user_id INTEGER PRIMARY KEY,
+  searches INTEGER NOT NULL DEFAULT 0,
+  videos_watched INTEGER NOT NULL DEFAULT 0,
+  quiz_attempts INTEGER NOT NULL DEFAULT 0,
+  quiz_score_sum BIGINT NOT NULL DEFAULT 0,
+  quiz_question_sum BIGINT NOT NULL DEFAULT 0,
+  quiz_time BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Fill it from the existing history and quiz results (safe to re-run):
+--   python -m app.manage reconcile-user-stats
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The app reads its configuration at import time: point it at a throwaway
+# SQLite database and keep the network-bound background work off.
+_data_dir = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_data_dir}/primary.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("WARMUP_ENABLED", "0")
+os.environ.setdefault("PREFETCH_ENABLED", "0")
+os.environ.setdefault("EXPORT_DIR", f"{_data_dir}/exports")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,162 @@
+"""compute_stats (one GROUPING SETS / UNION ALL statement for the search
+breakdowns) against the separate per-breakdown queries it replaced."""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import AppReview, QuizResult, SearchHistory, User
+from app.utils import admin_stats
+from app.utils.admin_stats import LANGUAGE_NAMES, StatsFilter, compute_stats
+from app.utils.user_stats import reconcile
+
+FIRST_DAY = datetime(2026, 9, 1)
+ROLES = {1: "admin", 2: "student", 3: "student", 4: "teacher", 5: "general_user"}
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('stats') / 'stats.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    rng = random.Random(7)
+
+    def moment():
+        return FIRST_DAY + timedelta(days=rng.randrange(20), minutes=rng.randrange(24 * 60))
+
+    for user_id, role in ROLES.items():
+        session.add(User(id=user_id, username=f"user{user_id}", role=role, password_hash="x",
+                         created_at=moment(), time_spent=rng.randrange(1000)))
+    # User 99 was deleted; their rows stay in the history tables.
+    user_ids = [*ROLES, 99]
+    for _ in range(400):
+        session.add(SearchHistory(
+            user_id=rng.choice(user_ids),
+            query=rng.choice(["Photosynthesis", "cell", "atom", "gravity"]),
+            result="",
+            created_at=moment(),
+            search_level=rng.choice(["easy", "medium", "hard", None]),
+            search_language=rng.choice(["en", "EN", "english", "te", "Telugu", "hi", "fr", None]),
+            search_source=rng.choice(["text", "voice", "image", None]),
+            video_watched=rng.random() < 0.3,
+        ))
+    for _ in range(60):
+        total = rng.choice([5, 10])
+        session.add(QuizResult(user_id=rng.choice(user_ids), score=rng.randrange(total + 1), total_questions=total,
+                               difficulty=rng.choice(["easy", "hard"]), topic=rng.choice(["cells", "atoms"]),
+                               time_taken=rng.randrange(300), created_at=moment()))
+    for _ in range(20):
+        session.add(AppReview(user_id=rng.choice(user_ids), rating=rng.randrange(1, 6), created_at=moment()))
+    session.commit()
+    reconcile(session)
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def no_rollups(monkeypatch):
+    monkeypatch.setattr(admin_stats.rollup_job, "covered_until", lambda db=None: None)
+
+
+def _old_filter(query, model, flt: StatsFilter, admin_ids, languages=True):
+    """The filters each query of the old endpoint repeated."""
+    query = query.filter(model.user_id.notin_(admin_ids))
+    if flt.start_dt:
+        query = query.filter(model.created_at >= flt.start_dt)
+    if flt.end_dt:
+        query = query.filter(model.created_at <= flt.end_dt)
+    if flt.roles:
+        query = query.join(User, model.user_id == User.id).filter(User.role.in_(flt.roles))
+    if languages and flt.language_codes:
+        query = query.filter(func.lower(SearchHistory.search_language).in_(flt.language_codes))
+    return query
+
+
+def _old_stats(db, flt: StatsFilter) -> dict:
+    admin_ids = [user_id for user_id, in db.query(User.id).filter(User.role == "admin")]
+
+    def searches(*columns):
+        return _old_filter(db.query(*columns), SearchHistory, flt, admin_ids)
+
+    def grouped(column):
+        return {key or "unknown": count for key, count in searches(column, func.count(SearchHistory.id)).group_by(column)}
+
+    languages = {}
+    for code, count in searches(SearchHistory.search_language, func.count(SearchHistory.id)).group_by(SearchHistory.search_language):
+        name = LANGUAGE_NAMES.get((code or "").strip().lower())
+        if name:
+            languages[name] = languages.get(name, 0) + count
+
+    day = func.date(SearchHistory.created_at)
+    daily = searches(day, func.count(SearchHistory.id)).group_by(day).order_by(day.desc()).limit(30).all()
+
+    members = db.query(User).filter(User.role != "admin")
+    if flt.start_dt:
+        members = members.filter(User.created_at >= flt.start_dt)
+    if flt.end_dt:
+        members = members.filter(User.created_at <= flt.end_dt)
+    if flt.roles:
+        members = members.filter(User.role.in_(flt.roles))
+    roles = {}
+    for member in members:
+        roles[member.role] = roles.get(member.role, 0) + 1
+
+    reviews = _old_filter(db.query(func.count(AppReview.id), func.avg(AppReview.rating)), AppReview, flt, admin_ids, languages=False).one()
+    quizzes = _old_filter(db.query(func.sum(QuizResult.time_taken), func.count(func.distinct(QuizResult.user_id))),
+                          QuizResult, flt, admin_ids, languages=False).one()
+    return {
+        "total_members": members.count(),
+        "roles_stats": roles,
+        "total_time_spent": sum(member.time_spent for member in members),
+        "total_reviews": reviews[0],
+        "average_rating": round(reviews[1] or 0.0, 1),
+        "level_stats": grouped(SearchHistory.search_level),
+        "source_stats": grouped(SearchHistory.search_source),
+        "language_stats": languages,
+        "daily_searches": [{"date": str(date), "count": count} for date, count in reversed(daily)],
+        "total_video_views": searches(func.count(SearchHistory.id)).filter(SearchHistory.video_watched == True).scalar(),
+        "total_quiz_time": quizzes[0] or 0,
+        "total_quiz_users": quizzes[1],
+    }
+
+
+def _as_dict(stats: list) -> dict:
+    return {item["name"]: item["value"] for item in stats}
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"start_date": "2026-09-05", "end_date": "2026-09-12"},
+    {"start_date": "2026-09-15"},
+    {"end_date": "2026-09-03"},
+    {"roles": "student"},
+    {"roles": "student,teacher", "start_date": "2026-09-04"},
+    {"languages": "telugu"},
+    {"languages": "english,hindi", "end_date": "2026-09-10"},
+    {"roles": "teacher", "languages": "english", "start_date": "2026-09-02", "end_date": "2026-09-18"},
+    {"roles": "admin"},
+])
+def test_compute_stats_matches_the_per_breakdown_queries(db, params):
+    flt = StatsFilter.from_params(**params)
+    new, old = compute_stats(db, flt), _old_stats(db, flt)
+
+    for key in ("level_stats", "source_stats", "language_stats", "roles_stats"):
+        assert _as_dict(new[key]) == old[key], key
+    for key in ("daily_searches", "total_video_views", "total_members", "total_time_spent",
+                "total_reviews", "average_rating", "total_quiz_time", "total_quiz_users"):
+        assert new[key] == old[key], key
+
+
+def test_admin_rows_are_excluded(db):
+    everyone = sum(count for _, count in db.query(SearchHistory.user_id, func.count()).group_by(SearchHistory.user_id))
+    by_admin = db.query(func.count()).filter(SearchHistory.user_id == 1).scalar()
+    stats = compute_stats(db, StatsFilter.from_params())
+
+    assert by_admin > 0
+    assert sum(_as_dict(stats["level_stats"]).values()) == everyone - by_admin
+    assert all(quizzer["user_id"] != 1 for quizzer in stats["top_quizzers"])
+    assert compute_stats(db, StatsFilter.from_params(roles="admin"))["level_stats"] == []
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.auth import create_token
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models import AppReview, User
+from app.utils.dashboard_cache import DashboardCache, dashboard_cache, etag_for, etag_matches
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"calls": self.calls}
+
+
+def test_results_are_cached_per_filter_key():
+    cache, compute = DashboardCache(), Counter()
+
+    first = cache.get_or_compute("stats", ("7d",), cache.TABLES, compute)
+    assert cache.get_or_compute("stats", ("7d",), cache.TABLES, compute) == first
+    assert compute.calls == 1
+
+    cache.get_or_compute("stats", ("30d",), cache.TABLES, compute)
+    cache.get_or_compute("users", ("7d",), cache.TABLES, compute)
+    assert compute.calls == 3
+
+
+def test_bump_invalidates_entries_built_from_that_table():
+    cache, compute = DashboardCache(), Counter()
+    result, etag = cache.get_or_compute("stats", (), ("searches",), compute)
+
+    cache.bump("quizzes")
+    assert cache.get_or_compute("stats", (), ("searches",), compute) == (result, etag)
+
+    cache.bump("searches")
+    fresh, fresh_etag = cache.get_or_compute("stats", (), ("searches",), compute)
+    assert fresh == {"calls": 2}
+    assert fresh_etag != etag
+    assert cache.stats()["versions"]["searches"] == 1
+
+
+def test_write_during_computation_is_not_hidden_by_the_result():
+    cache = DashboardCache()
+
+    def compute():
+        cache.bump("reviews")
+        return {"reviews": 1}
+
+    cache.get_or_compute("stats", (), cache.TABLES, compute)
+    assert cache.get_or_compute("stats", (), cache.TABLES, Counter()) == ({"calls": 1}, etag_for({"calls": 1}))
+
+
+def test_etag_depends_on_content_only():
+    assert etag_for({"a": 1, "b": [1, 2]}) == etag_for({"b": [1, 2], "a": 1})
+    assert etag_for({"a": 1}) != etag_for({"a": 2})
+    assert etag_for({"a": 1}).startswith('"')
+
+
+def test_if_none_match_comparison():
+    etag = etag_for({"a": 1})
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches("", etag)
+
+
+def test_unchanged_dashboard_is_answered_with_304():
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        admin = User(username="dashboard_cache_admin", role="admin", password_hash="x", created_at=datetime.utcnow())
+        db.add(admin)
+        db.commit()
+        headers = {"Authorization": f"Bearer {create_token(admin.username, user_id=admin.id)}"}
+    dashboard_cache.clear()
+
+    with TestClient(app) as client:
+        first = client.get("/admin/stats", headers=headers)
+        etag = first.headers["ETag"]
+        assert first.status_code == 200
+        assert first.headers["Cache-Control"] == "private, no-cache"
+
+        unchanged = client.get("/admin/stats", headers={**headers, "If-None-Match": etag})
+        assert unchanged.status_code == 304
+        assert unchanged.headers["ETag"] == etag
+        assert unchanged.content == b""
+
+        with SessionLocal() as db:
+            db.add(AppReview(user_id=10**6, rating=5, created_at=datetime.utcnow()))
+            db.commit()
+        dashboard_cache.bump("reviews")
+        changed = client.get("/admin/stats", headers={**headers, "If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert changed.json()["total_reviews"] == first.json()["total_reviews"] + 1
+    dashboard_cache.clear()
@@ -0,0 +1,135 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.utils import fast_llm_service
+from app.utils.explanation_store import ExplanationStore
+from app.utils.fast_llm_service import FastLLMService
+from app.utils.query_normalizer import normalize_query
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'explanations.db'}")
+    Base.metadata.create_all(engine)
+    store = ExplanationStore(session_factory=sessionmaker(bind=engine))
+    monkeypatch.setattr(fast_llm_service, "explanation_store", store)
+    yield store
+    engine.dispose()
+
+
+@pytest.fixture
+def service(store):
+    service = FastLLMService()
+    service.generated = []
+    service.translated = []
+    service.english_lookups = []
+
+    def generate(query, language="English", fetch_media=True):
+        service.generated.append((query, language))
+        return _explanation(f"{query} ({language})", core_term=service.core_terms.get(query, query))
+
+    def translate(canonical, language):
+        service.translated.append((canonical["easy"], language))
+        return {**canonical, "easy": f"{canonical['easy']} in {language}", "generated_at": time.time()}
+
+    def english_query_key(query):
+        service.english_lookups.append(query)
+        return service.english_keys.get(normalize_query(query))
+
+    service.core_terms = {}
+    service.english_keys = {}
+    service._generate_explanation = generate
+    service._translate_explanation = translate
+    service._english_query_key = english_query_key
+    return service
+
+
+def _explanation(easy, core_term):
+    return {
+        "core_term": core_term, "translated_term": core_term, "is_scientific": True,
+        "easy": easy, "medium": easy, "hard": easy, "examples": [], "related_words": [],
+        "source": "groq", "generated_at": time.time(),
+    }
+
+
+def _explain(service, query, language="English"):
+    # A fresh memory cache each time, as after expiry or in another worker.
+    service.explanation_cache.clear()
+    return service.get_fast_explanation(query, language, fetch_media=False, prefetch_related=False)
+
+
+def test_repeated_query_is_an_alias_hit(service):
+    first = _explain(service, "Photosynthesis")
+    again = _explain(service, "what is photosynthesis?")
+
+    assert first["source"] == "groq"
+    assert again["source"] == "store"
+    assert again["easy"] == first["easy"]
+    assert len(service.generated) == 1
+
+
+def test_query_matching_an_existing_core_term_is_aliased_to_it(service, store):
+    service.core_terms["process of photosynthesis"] = "Photosynthesis"
+    stored = _explain(service, "process of photosynthesis")
+    _explain(service, "What is photosynthesis?")
+    again = _explain(service, "photosynthesis")
+
+    assert store.resolve("photosynthesis") == ("photosynthesis", False)
+    assert again["source"] == "store"
+    assert again["easy"] == stored["easy"]
+    assert len(service.generated) == 2
+
+
+def test_coarse_core_term_stores_the_new_explanation_under_its_own_key(service, store):
+    service.core_terms["cell structure"] = "Cell"
+    cell = _explain(service, "cell")
+    structure = _explain(service, "cell structure")
+    again = _explain(service, "cell structure")
+
+    assert store.resolve("cell structure") == ("cell structure", False)
+    assert again["source"] == "store"
+    assert again["easy"] == structure["easy"] != cell["easy"]
+    assert _explain(service, "cell")["easy"] == cell["easy"]
+    assert len(service.generated) == 2
+
+
+def test_concept_stored_in_english_is_translated_for_other_scripts(service, store):
+    english = _explain(service, "photosynthesis")
+    service.english_keys["కిరణజన్య సంయోగక్రియ"] = "photosynthesis"
+
+    telugu = _explain(service, "కిరణజన్య సంయోగక్రియ అంటే ఏమిటి?", "Telugu")
+    again = _explain(service, "కిరణజన్య సంయోగక్రియ", "Telugu")
+
+    assert telugu["source"] == "groq_translation"
+    assert telugu["easy"] == f"{english['easy']} in Telugu"
+    assert again["source"] == "store"
+    assert again["easy"] == telugu["easy"]
+    assert store.resolve("కిరణజన్య సంయోగక్రియ") == ("photosynthesis", False)
+    assert service.generated == [("photosynthesis", "English")]
+    assert len(service.translated) == 1
+    assert service.english_lookups == ["కిరణజన్య సంయోగక్రియ అంటే ఏమిటి?"]
+
+
+def test_existing_variant_in_the_language_is_aliased_without_translating(service, store):
+    _explain(service, "photosynthesis")
+    service.english_keys["प्रकाश संश्लेषण"] = "photosynthesis"
+    first = _explain(service, "प्रकाश संश्लेषण", "Hindi")
+    service.english_keys["प्रकाश संश्लेषण की प्रक्रिया"] = "photosynthesis"
+    second = _explain(service, "प्रकाश संश्लेषण की प्रक्रिया", "Hindi")
+
+    assert second["source"] == "store"
+    assert second["easy"] == first["easy"]
+    assert store.resolve("प्रकाश संश्लेषण की प्रक्रिया") == ("photosynthesis", False)
+    assert len(service.translated) == 1
+    assert len(service.generated) == 1
+
+
+def test_unknown_query_in_another_script_is_generated(service):
+    result = _explain(service, "ప్రకాశ సంశ్లేషణ", "Telugu")
+
+    assert result["source"] == "groq"
+    assert service.generated == [("ప్రకాశ సంశ్లేషణ", "Telugu")]
@@ -0,0 +1,221 @@
+"""Background export jobs: submit, progress to done, reuse for the same
+filters, restart when stalled or failed, expire after the TTL, and serve the
+finished files."""
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import create_token
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models import QuizResult, SearchHistory, User
+from app.utils.export_jobs import ExportJobs, ExportUnavailable, export_jobs
+from app.utils.exports import COLUMNS, SECTIONS, ExportFilter, count_rows
+from app.utils.user_stats import reconcile
+
+FIRST_DAY = datetime(2026, 9, 1)
+PARAMS = {"timeframe": "all", "start_date": None, "end_date": None, "roles": None, "languages": None,
+          "min_quiz_score": None, "max_quiz_score": None}
+
+
+def _seed(db, role: str, prefix: str):
+    for index in range(6):
+        user = User(username=f"{prefix}{index}", role=role, password_hash="x", created_at=FIRST_DAY + timedelta(days=index))
+        db.add(user)
+        db.flush()
+        for attempt in range(3):
+            db.add(QuizResult(user_id=user.id, score=index + attempt, total_questions=10, difficulty="easy",
+                              time_taken=30, created_at=FIRST_DAY + timedelta(days=index, hours=attempt)))
+            db.add(SearchHistory(user_id=user.id, query=f"term {attempt}", result="", search_language="en",
+                                 created_at=FIRST_DAY + timedelta(days=index, hours=attempt)))
+    db.commit()
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    jobs_engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(jobs_engine)
+    factory = sessionmaker(bind=jobs_engine)
+    with factory() as db:
+        _seed(db, "student", "student")
+        reconcile(db)
+    yield factory
+    jobs_engine.dispose()
+
+
+@pytest.fixture
+def jobs(session_factory, tmp_path):
+    jobs = ExportJobs(session_factory=session_factory)
+    jobs.directory = tmp_path / "exports"
+    yield jobs
+    jobs._executor.shutdown(wait=True)
+
+
+def _wait(get, job_id: str) -> dict:
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        job = get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"export {job_id} did not finish")
+
+
+def _csv_rows(path) -> list:
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as file:
+        return list(csv.reader(file))
+
+
+def test_job_writes_every_section(jobs, session_factory):
+    queued = jobs.submit(PARAMS, "csv")
+    assert queued["id"] == ExportJobs.job_id(PARAMS, "csv")
+    assert queued["status"] in ("queued", "running", "done")
+
+    job = _wait(jobs.get, queued["id"])
+    with session_factory() as db:
+        counts = {name: count_rows(db, name, ExportFilter.from_params(**PARAMS)) for name in SECTIONS}
+    assert job["status"] == "done"
+    assert job["error"] is None
+    assert job["finished_at"] >= job["created_at"]
+    assert job["rows_total"] == job["rows_written"] == sum(counts.values())
+    for name in SECTIONS:
+        section = job["sections"][name]
+        path = jobs.file_path(job["id"], name)
+        rows = _csv_rows(path)
+        assert section["done"] and section["rows"] == counts[name]
+        assert section["bytes"] == path.stat().st_size
+        assert rows[0] == list(COLUMNS[name])
+        assert len(rows) - 1 == counts[name]
+    assert not list((jobs.directory / job["id"]).glob("*.part"))
+
+
+def test_same_filters_reuse_the_job(jobs):
+    first = _wait(jobs.get, jobs.submit(PARAMS, "csv")["id"])
+    again = jobs.submit(dict(reversed(PARAMS.items())), "csv")
+    other = jobs.submit({**PARAMS, "roles": "teacher"}, "csv")
+
+    assert again == first
+    assert other["id"] != first["id"]
+    assert jobs.submit(PARAMS, "parquet")["id"] != first["id"]
+    assert jobs.stats()["reused"] == 1
+    assert jobs.stats()["started"] == 3
+    _wait(jobs.get, other["id"])
+
+
+def test_stalled_job_is_restarted(jobs):
+    job = _wait(jobs.get, jobs.submit(PARAMS, "csv")["id"])
+    # A process died while running the job: its manifest stopped being updated.
+    stalled = {**job, "status": "running", "finished_at": None, "updated_at": time.time() - jobs.stall_timeout - 1}
+    (jobs.directory / job["id"] / "job.json").write_text(json.dumps(stalled))
+    assert jobs.file_path(job["id"], "users") is None
+
+    restarted = jobs.submit(PARAMS, "csv")
+    assert restarted["status"] == "queued"
+    assert jobs.stats()["started"] == 2
+    assert _wait(jobs.get, job["id"])["status"] == "done"
+
+
+def test_failed_job_is_reported_and_retried(tmp_path, session_factory):
+    empty_engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    jobs = ExportJobs(session_factory=sessionmaker(bind=empty_engine))
+    jobs.directory = tmp_path / "exports"
+
+    job = _wait(jobs.get, jobs.submit(PARAMS, "csv")["id"])
+    assert job["status"] == "failed"
+    assert "no such table" in job["error"]
+    assert jobs.stats()["failed"] == 1
+    assert jobs.file_path(job["id"], "users") is None
+
+    jobs.session_factory = session_factory
+    assert _wait(jobs.get, jobs.submit(PARAMS, "csv")["id"])["status"] == "done"
+    jobs._executor.shutdown(wait=True)
+    empty_engine.dispose()
+
+
+def test_finished_jobs_expire_after_the_ttl(jobs):
+    job = _wait(jobs.get, jobs.submit(PARAMS, "csv")["id"])
+    jobs.cleanup()
+    assert jobs.get(job["id"]) is not None
+
+    jobs.ttl = 0
+    time.sleep(0.01)
+    jobs.cleanup()
+    assert jobs.get(job["id"]) is None
+    assert not (jobs.directory / job["id"]).exists()
+
+
+def test_unknown_jobs_and_files(jobs):
+    job = _wait(jobs.get, jobs.submit(PARAMS, "csv")["id"])
+    assert jobs.get("0" * 20) is None
+    assert jobs.get("../" + job["id"]) is None
+    assert jobs.file_path(job["id"], "job") is None
+    assert jobs.file_path("0" * 20, "users") is None
+
+
+def test_parquet_job(jobs, session_factory):
+    pq = pytest.importorskip("pyarrow.parquet")
+    job = _wait(jobs.get, jobs.submit(PARAMS, "parquet")["id"])
+    assert job["status"] == "done"
+
+    with session_factory() as db:
+        for name in SECTIONS:
+            table = pq.read_table(jobs.file_path(job["id"], name))
+            assert table.column_names == list(COLUMNS[name])
+            assert table.num_rows == count_rows(db, name, ExportFilter.from_params(**PARAMS))
+
+
+def test_parquet_needs_pyarrow(jobs, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ExportUnavailable):
+        jobs.submit(PARAMS, "parquet")
+    assert jobs.stats()["started"] == 0
+
+
+def test_export_job_routes():
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        admin = User(username="export_jobs_admin", role="admin", password_hash="x", created_at=FIRST_DAY)
+        db.add(admin)
+        db.commit()
+        _seed(db, "export_jobs_role", "export_jobs_user")
+        headers = {"Authorization": f"Bearer {create_token(admin.username, user_id=admin.id)}"}
+
+    with TestClient(app) as client:
+        created = client.post("/admin/exports", params={"roles": " export_jobs_role,export_jobs_role"}, headers=headers)
+        assert created.status_code == 202
+        job_id = created.json()["id"]
+        assert created.json()["params"]["roles"] == "export_jobs_role"
+
+        _wait(export_jobs.get, job_id)
+        job = client.get(f"/admin/exports/{job_id}", headers=headers).json()
+        assert job["status"] == "done"
+        assert job["progress"] == 1.0
+        assert job["rows_total"] == 6 + 6 + 18 + 18
+        for stamp in (job["created_at"], job["finished_at"]):
+            moment = datetime.fromisoformat(stamp)
+            assert moment.tzinfo == timezone.utc
+            assert abs(moment - datetime.now(timezone.utc)) < timedelta(minutes=1)
+
+        download = client.get(job["files"]["quiz_results"]["url"], headers=headers)
+        assert download.status_code == 200
+        assert download.headers["content-type"] == "application/gzip"
+        rows = list(csv.reader(io.StringIO(gzip.decompress(download.content).decode("utf-8"))))
+        assert len(rows) - 1 == 18
+
+        partial = client.get(job["files"]["quiz_results"]["url"], headers={**headers, "Range": "bytes=0-9"})
+        assert partial.status_code == 206
+        assert partial.content == download.content[:10]
+
+        assert client.get("/admin/exports/0123456789abcdef0123", headers=headers).status_code == 404
+        assert client.get(f"/admin/exports/{job_id}/nope", headers=headers).status_code == 404
+        assert client.post("/admin/exports", params={"format": "xlsx"}, headers=headers).status_code == 422
+        assert client.get(f"/admin/exports/{job_id}").status_code == 401
@@ -0,0 +1,158 @@
+"""Streaming exports: every row of a section is written once under its header,
+as CSV or NDJSON, and the gzip stream decompresses back to the same bytes."""
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import create_token
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models import QuizResult, SearchHistory, User
+from app.utils.exports import COLUMNS, ROWS, SECTIONS, ExportFilter, count_rows, csv_chunks, gzip_chunks, ndjson_chunks
+from app.utils.user_stats import reconcile
+
+FIRST_DAY = datetime(2026, 9, 1)
+
+
+def _seed(db, role: str, users: int, prefix: str):
+    ids = []
+    for index in range(users):
+        user = User(username=f"{prefix}{index}", email=f"{prefix}{index}@example.com", role=role, password_hash="x",
+                    created_at=FIRST_DAY + timedelta(days=index % 10), time_spent=index)
+        db.add(user)
+        db.flush()
+        ids.append(user.id)
+    for index in range(users * 3):
+        db.add(QuizResult(user_id=ids[index % users], score=index % 11, total_questions=10, difficulty="easy",
+                          topic="cell_biology", time_taken=index, created_at=FIRST_DAY + timedelta(hours=index)))
+        db.add(SearchHistory(user_id=ids[index % users], query=f"term, \"{index}\"\nline two", result="",
+                             search_language=("en", "te", "hi")[index % 3], search_level="easy",
+                             created_at=FIRST_DAY + timedelta(hours=index)))
+    db.commit()
+    return ids
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    export_engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('exports') / 'exports.db'}")
+    Base.metadata.create_all(export_engine)
+    session = sessionmaker(bind=export_engine)()
+    session.add(User(username="export_admin", role="admin", password_hash="x", created_at=FIRST_DAY))
+    _seed(session, "student", 25, "student")
+    reconcile(session)
+    yield session
+    session.close()
+    export_engine.dispose()
+
+
+def _parse_csv(data: bytes) -> list:
+    return list(csv.reader(io.StringIO(data.decode("utf-8"))))
+
+
+@pytest.mark.parametrize("section", SECTIONS)
+@pytest.mark.parametrize("rows_per_chunk", [1, 7, 500])
+def test_csv_has_the_header_and_every_row(db, section, rows_per_chunk):
+    flt = ExportFilter.from_params()
+    rows = list(ROWS[section](db, flt))
+    chunks = list(csv_chunks(iter(rows), COLUMNS[section], rows_per_chunk=rows_per_chunk))
+    parsed = _parse_csv(b"".join(chunks))
+
+    assert len(rows) == count_rows(db, section, flt) > 0
+    assert parsed[0] == list(COLUMNS[section])
+    assert len(parsed) - 1 == len(rows)
+    assert parsed[1:] == [[str(row[column]) for column in COLUMNS[section]] for row in rows]
+    assert len(chunks) == len(rows) // rows_per_chunk + 1
+
+
+def test_csv_of_no_rows_is_just_the_header():
+    assert _parse_csv(b"".join(csv_chunks(iter(()), COLUMNS["users"]))) == [list(COLUMNS["users"])]
+    assert list(ndjson_chunks(iter(()))) == []
+
+
+@pytest.mark.parametrize("section", SECTIONS)
+def test_ndjson_has_one_object_per_row(db, section):
+    flt = ExportFilter.from_params()
+    rows = list(ROWS[section](db, flt))
+    lines = b"".join(ndjson_chunks(iter(rows), rows_per_chunk=4)).decode("utf-8").splitlines()
+
+    assert len(lines) == len(rows) == count_rows(db, section, flt)
+    assert [json.loads(line) for line in lines] == rows
+
+
+def test_filters_apply_to_the_rows_and_their_count(db):
+    flt = ExportFilter.from_params(start_date="2026-09-02", end_date="2026-09-02", languages="telugu",
+                                   min_quiz_score=50)
+    searches = list(ROWS["search_analytics"](db, flt))
+    quizzes = list(ROWS["quiz_results"](db, flt))
+
+    assert 0 < len(searches) == count_rows(db, "search_analytics", flt)
+    assert {row["language"] for row in searches} == {"te"}
+    assert 0 < len(quizzes) == count_rows(db, "quiz_results", flt)
+    assert all(row["score"] >= 5 and row["attempt_date"].startswith("2026-09-02") for row in quizzes)
+    assert all(row["role"] != "admin" for row in ROWS["users"](db, ExportFilter.from_params()))
+
+
+def test_gzip_stream_round_trips(db):
+    chunks = list(csv_chunks(ROWS["search_analytics"](db, ExportFilter.from_params()), COLUMNS["search_analytics"], rows_per_chunk=5))
+    compressed = list(gzip_chunks(iter(chunks), level=1))
+
+    assert gzip.decompress(b"".join(compressed)) == b"".join(chunks)
+    assert gzip.decompress(b"".join(gzip_chunks(iter(())))) == b""
+
+
+@pytest.fixture(scope="module")
+def admin_headers():
+    """An admin plus users of a role of their own, so the route's rows can be counted exactly."""
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        admin = User(username="export_route_admin", role="admin", password_hash="x", created_at=FIRST_DAY)
+        db.add(admin)
+        db.commit()
+        _seed(db, "export_route_role", 4, "export_route_user")
+        return {"Authorization": f"Bearer {create_token(admin.username, user_id=admin.id)}"}
+
+
+def test_export_route_streams_csv_and_ndjson(admin_headers):
+    params = {"roles": "export_route_role"}
+    with TestClient(app) as client:
+        plain = client.get("/admin/export_data", params={**params, "format": "csv", "section": "quiz_results"},
+                           headers={**admin_headers, "Accept-Encoding": "identity"})
+        ndjson = client.get("/admin/export_data", params={**params, "format": "ndjson", "section": "users"},
+                            headers={**admin_headers, "Accept-Encoding": "identity"})
+        missing = client.get("/admin/export_data", params={"format": "csv"}, headers=admin_headers)
+
+    assert plain.status_code == 200
+    assert plain.headers["content-type"].startswith("text/csv")
+    assert plain.headers["content-disposition"] == 'attachment; filename="quiz_results.csv"'
+    assert "content-encoding" not in plain.headers
+    rows = _parse_csv(plain.content)
+    assert rows[0] == list(COLUMNS["quiz_results"])
+    assert len(rows) - 1 == 12
+
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    users = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert sorted(user["name"] for user in users) == [f"export_route_user{index}" for index in range(4)]
+
+    assert missing.status_code == 400
+
+
+def test_export_route_gzips_when_accepted(admin_headers):
+    params = {"roles": "export_route_role", "format": "csv", "section": "search_analytics"}
+    with TestClient(app) as client:
+        with client.stream("GET", "/admin/export_data", params=params,
+                           headers={**admin_headers, "Accept-Encoding": "gzip"}) as response:
+            raw = b"".join(response.iter_raw())
+            encoding = response.headers["content-encoding"]
+        identity = client.get("/admin/export_data", params=params, headers={**admin_headers, "Accept-Encoding": "identity"})
+
+    assert encoding == "gzip"
+    assert raw[:2] == b"\x1f\x8b"
+    assert gzip.decompress(raw) == identity.content
+    assert len(_parse_csv(identity.content)) - 1 == 12
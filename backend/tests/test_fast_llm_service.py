@@ -0,0 +1,139 @@
+import types
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.utils import fast_llm_service
+from app.utils.explanation_store import ExplanationStore
+from app.utils.fast_llm_service import FastLLMService
+
+DAY = 86400
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_800_000_000.0
+
+    def time(self):
+        return self.now
+
+
+class Executor:
+    """Runs nothing until told to, so tests decide when a refresh happens."""
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append((fn, args))
+
+    def run_all(self):
+        submitted, self.submitted = self.submitted, []
+        for fn, args in submitted:
+            fn(*args)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(fast_llm_service, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch, clock):
+    engine = create_engine(f"sqlite:///{tmp_path / 'explanations.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(fast_llm_service, "explanation_store", ExplanationStore(session_factory=sessionmaker(bind=engine)))
+
+    service = FastLLMService()
+    service.explanation_ttl = 7 * DAY
+    service.explanation_max_stale = 30 * DAY
+    service._refresh_executor = Executor()
+    service.generated = []
+    service.fail = False
+
+    def generate(query, language="English", fetch_media=True):
+        service.generated.append(query)
+        if service.fail:
+            return {"easy": "Please try again.", "source": "fallback_error", "is_scientific": True}
+        return {
+            "core_term": query, "is_scientific": True, "easy": f"{query} #{len(service.generated)}",
+            "examples": [], "related_words": [], "source": "groq", "generated_at": clock.time(),
+        }
+
+    service._generate_explanation = generate
+    yield service
+    engine.dispose()
+
+
+def _explain(service, query="photosynthesis"):
+    return service.get_fast_explanation(query, fetch_media=False, prefetch_related=False)
+
+
+def test_stale_explanation_is_served_while_it_refreshes(service, clock):
+    first = _explain(service)
+    clock.now += 8 * DAY
+
+    stale = _explain(service)
+    assert stale["stale"] is True
+    assert stale["easy"] == first["easy"]
+    assert service.generated == ["photosynthesis"]
+    assert len(service._refresh_executor.submitted) == 1
+
+    service._refresh_executor.run_all()
+    fresh = _explain(service)
+    assert fresh["source"] == "cache"
+    assert fresh["easy"] == "photosynthesis #2"
+    assert not fresh.get("stale")
+    assert service._refreshing == set()
+
+
+def test_concurrent_stale_hits_start_one_refresh(service, clock):
+    _explain(service)
+    clock.now += 8 * DAY
+
+    for _ in range(3):
+        assert _explain(service)["stale"] is True
+    assert len(service._refresh_executor.submitted) == 1
+
+    service._refresh_executor.run_all()
+    clock.now += 8 * DAY
+    _explain(service)
+    assert len(service._refresh_executor.submitted) == 1
+
+
+def test_past_max_stale_is_regenerated_inline(service, clock):
+    _explain(service)
+    clock.now += 40 * DAY
+
+    result = _explain(service)
+    assert result["source"] == "groq"
+    assert result["easy"] == "photosynthesis #2"
+    assert service._refresh_executor.submitted == []
+    assert _explain(service)["easy"] == "photosynthesis #2"
+
+
+def test_past_max_stale_falls_back_to_the_old_explanation_when_generation_fails(service, clock):
+    first = _explain(service)
+    clock.now += 40 * DAY
+    service.fail = True
+
+    result = _explain(service)
+    assert result["easy"] == first["easy"]
+    assert result["stale"] is True
+    assert len(service.generated) == 2
+
+
+def test_open_circuit_serves_stale_without_calling_groq(service, clock):
+    first = _explain(service)
+    clock.now += 40 * DAY
+    for _ in range(service.circuit.failure_threshold):
+        service.circuit.record_failure()
+
+    result = _explain(service)
+    assert result["easy"] == first["easy"]
+    assert result["stale"] is True
+    assert service.generated == ["photosynthesis"]
+    assert service._refresh_executor.submitted == []
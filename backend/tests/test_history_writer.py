@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import SearchHistory, UserStats
+from app.utils.history_writer import HistoryWriter
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _row(row_id, user_id=1, query="photosynthesis"):
+    return {
+        "id": row_id, "user_id": user_id, "query": query, "result": "", "feedback": None,
+        "video_watched": False, "created_at": datetime.utcnow(),
+    }
+
+
+def test_rejected_row_does_not_block_the_batch(session_factory):
+    with session_factory() as db:
+        db.add(SearchHistory(**_row(2)))
+        db.commit()
+
+    writer = HistoryWriter(session_factory=session_factory)
+    writer._pending = [_row(1), _row(2), _row(3)]  # id 2 already exists
+    writer.flush()
+
+    with session_factory() as db:
+        assert db.scalars(select(SearchHistory.id).order_by(SearchHistory.id)).all() == [1, 2, 3]
+        assert db.get(UserStats, 1).searches == 2
+    assert writer._pending == []
+    assert writer.rejected == 1
+    assert writer.flushed == 2
+
+
+def test_unreachable_database_keeps_the_rows(tmp_path):
+    unreachable = sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'missing' / 'history.db'}"))
+    writer = HistoryWriter(session_factory=unreachable)
+    writer._pending = [_row(1), _row(2)]
+    writer.flush()
+
+    assert [row["id"] for row in writer._pending] == [1, 2]
+    assert writer.rejected == 0
+    assert writer.flushed == 0
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import create_token
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models import QuizResult, User
+from app.utils.leaderboard import Leaderboard, LeaderboardEntry, _Board, leaderboard
+
+NOW = datetime(2026, 10, 1, 12, 0)
+
+
+def _entry(id, user_id, score, total=10, difficulty="easy", minutes=0):
+    return LeaderboardEntry(id=id, user_id=user_id, score=score, total_questions=total, difficulty=difficulty,
+                            created_at=NOW + timedelta(minutes=minutes))
+
+
+def test_board_orders_by_ratio_then_size_then_recency():
+    board = _Board()
+    board.offer(_entry(1, user_id=1, score=5))
+    board.offer(_entry(2, user_id=2, score=9))
+    board.offer(_entry(3, user_id=3, score=18, total=20))
+    board.offer(_entry(4, user_id=4, score=9, minutes=5))
+
+    assert [entry.user_id for entry in board.top(10)] == [3, 4, 2, 1]
+    assert [entry.user_id for entry in board.top(2)] == [3, 4]
+    assert board.top(0) == []
+    assert board.rank(2) == (3, board.best[2])
+    assert board.rank(99) == (None, None)
+
+
+def test_board_keeps_each_users_best_result():
+    board = _Board()
+    board.offer(_entry(1, user_id=1, score=6))
+    board.offer(_entry(2, user_id=2, score=7))
+    board.offer(_entry(3, user_id=1, score=4))
+    assert board.best[1].id == 1
+    assert board.rank(1)[0] == 2
+
+    board.offer(_entry(4, user_id=1, score=8))
+    assert board.best[1].id == 4
+    assert board.rank(1)[0] == 1
+    assert len(board.keys) == 2
+
+    board.remove(1)
+    assert board.rank(1) == (None, None)
+    assert [entry.user_id for entry in board.top(10)] == [2]
+
+
+def test_reload_ranks_best_results_of_existing_users(tmp_path):
+    board_engine = create_engine(f"sqlite:///{tmp_path / 'leaderboard.db'}")
+    Base.metadata.create_all(board_engine)
+    session_factory = sessionmaker(bind=board_engine)
+    with session_factory() as db:
+        db.add_all([User(id=1, username="ada", password_hash="x"), User(id=2, username="alan", password_hash="x")])
+        db.add_all([
+            QuizResult(user_id=1, score=6, total_questions=10, difficulty="easy", created_at=NOW),
+            QuizResult(user_id=1, score=9, total_questions=10, difficulty="hard", created_at=NOW),
+            QuizResult(user_id=2, score=8, total_questions=10, difficulty="easy", created_at=NOW),
+            QuizResult(user_id=3, score=10, total_questions=10, difficulty="easy", created_at=NOW),  # deleted user
+        ])
+        db.commit()
+
+    board = Leaderboard(session_factory=session_factory)
+    board.flush()
+    assert [entry.user_id for entry in board.top("easy")] == [2, 1]
+    assert [(entry.user_id, entry.score) for entry in board.top()] == [(1, 9), (2, 8)]
+    assert board.rank(1, "easy")[::2] == (2, 2)
+    assert board.rank(3) == (None, None, 2)
+    board_engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def players():
+    """Four users on a board of their own; the best one was deleted after its result was recorded."""
+    Base.metadata.create_all(engine)
+    ids = []
+    with SessionLocal() as db:
+        for index in range(4):
+            user = User(username=f"leaderboard_player_{index}", password_hash="x", created_at=NOW)
+            db.add(user)
+            db.flush()
+            db.add(QuizResult(user_id=user.id, score=9 - index, total_questions=10, difficulty="lb-test", created_at=NOW))
+            ids.append(user.id)
+        db.commit()
+    leaderboard.flush()
+    with SessionLocal() as db:
+        db.delete(db.get(User, ids[0]))
+        db.commit()
+    return ids
+
+
+def test_leaderboard_skips_deleted_users_and_still_fills_the_limit(players):
+    with TestClient(app) as client:
+        response = client.get("/quiz/leaderboard", params={"difficulty": "lb-test", "limit": 2})
+    assert response.status_code == 200
+    assert [row["username"] for row in response.json()] == ["leaderboard_player_1", "leaderboard_player_2"]
+
+
+def test_leaderboard_limit_is_bounded(players):
+    with TestClient(app) as client:
+        assert client.get("/quiz/leaderboard", params={"limit": 0}).status_code == 422
+        assert client.get("/quiz/leaderboard", params={"limit": 101}).status_code == 422
+        assert client.get("/quiz/leaderboard", params={"limit": 100}).status_code == 200
+
+
+def test_my_rank(players):
+    # A result recorded after the reload is ranked right away.
+    leaderboard.record(QuizResult(id=10**6, user_id=players[3], score=10, total_questions=10, difficulty="lb-test", created_at=NOW))
+    headers = {"Authorization": f"Bearer {create_token('leaderboard_player_3', user_id=players[3])}"}
+    with TestClient(app) as client:
+        mine = client.get("/quiz/leaderboard/me", params={"difficulty": "lb-test"}, headers=headers).json()
+        assert client.get("/quiz/leaderboard/me").status_code == 401
+
+    assert mine["rank"] == 1
+    assert mine["total"] == leaderboard.rank(players[3], "lb-test")[2]
+    assert mine["best"]["score"] == 10
+    assert mine["best"]["username"] == "leaderboard_player_3"
@@ -0,0 +1,36 @@
+from app.utils.query_normalizer import MAX_KEY_LENGTH, explanation_cache_key, normalize_query
+
+
+def test_question_phrasing_and_case_share_a_key():
+    assert normalize_query("What is Photosynthesis?") == "photosynthesis"
+    assert normalize_query("  define   the term  PHOTOSYNTHESIS ") == "photosynthesis"
+    assert normalize_query("photosynthesis meaning") == "photosynthesis"
+
+
+def test_indic_trailing_phrases_and_marks():
+    assert normalize_query("प्रकाश संश्लेषण क्या है") == "प्रकाश संश्लेषण"
+    assert normalize_query("కిరణజన్య సంయోగక్రియ అంటే ఏమిటి?") == "కిరణజన్య సంయోగక్రియ"
+
+
+def test_never_reduced_to_nothing():
+    assert normalize_query("What is?") == "what is"
+    assert normalize_query("") == ""
+
+
+def test_long_keys_fit_the_columns():
+    long_query = "photosynthesis " * 100
+    key = normalize_query(long_query)
+    assert len(key) == MAX_KEY_LENGTH
+    assert key.startswith("photosynthesis photosynthesis")
+    assert key == normalize_query(long_query.upper())
+    assert key != normalize_query(long_query + "chlorophyll")
+
+
+def test_short_keys_are_unchanged():
+    query = "x" * MAX_KEY_LENGTH
+    assert normalize_query(query) == query
+
+
+def test_cache_key_includes_language_and_level():
+    assert explanation_cache_key("What is Gravity?", "Telugu", "Easy") == "telugu:gravity:easy"
+    assert explanation_cache_key("gravity", None) == "english:gravity"
@@ -0,0 +1,98 @@
+"""Admin analytics reads go to READ_DATABASE_URL and fall back to the primary.
+
+The primary is the tests' SQLite database; the replica is a second SQLite
+file holding one user the primary does not have, so each response shows
+which database answered.
+"""
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import create_token
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models import User
+from app.utils.dashboard_cache import dashboard_cache
+from app.utils.read_replica import on_replica, read_replica
+
+
+def _add_user(session_factory, username, role="student"):
+    with session_factory() as db:
+        user = User(username=username, role=role, password_hash="x", created_at=datetime.utcnow())
+        db.add(user)
+        db.commit()
+        return user.id
+
+
+@pytest.fixture(scope="module")
+def admin_headers():
+    Base.metadata.create_all(engine)
+    admin_id = _add_user(SessionLocal, "replica_test_admin", role="admin")
+    _add_user(SessionLocal, "on_both")
+    return {"Authorization": f"Bearer {create_token('replica_test_admin', user_id=admin_id)}"}
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """Points the read_replica singleton at a second SQLite file, as READ_DATABASE_URL would."""
+    replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(replica_engine)
+    replica_factory = sessionmaker(bind=replica_engine)
+    _add_user(replica_factory, "on_both")
+    _add_user(replica_factory, "replica_only")
+    monkeypatch.setattr(read_replica, "engine", replica_engine)
+    monkeypatch.setattr(read_replica, "replica_factory", replica_factory)
+    monkeypatch.setattr(read_replica, "_usable", False)
+    monkeypatch.setattr(read_replica, "last_error", None)
+    dashboard_cache.clear()
+    yield replica_engine
+    dashboard_cache.clear()
+    replica_engine.dispose()
+
+
+def _replica_users(client, headers) -> int:
+    response = client.get("/admin/users", params={"search": "replica_only"}, headers=headers)
+    assert response.status_code == 200
+    return int(response.headers["X-Total-Count"])
+
+
+def _replica_users_exported(client, headers) -> bool:
+    response = client.get("/admin/export_data", params={"format": "ndjson", "section": "users"}, headers=headers)
+    assert response.status_code == 200
+    return "replica_only" in response.text
+
+
+def test_admin_reads_use_the_replica(replica, admin_headers):
+    read_replica.flush()
+    assert read_replica.stats()["usable"]
+    with read_replica.session() as db:
+        assert on_replica(db)
+    with TestClient(app) as client:
+        assert _replica_users(client, admin_headers) == 1
+        assert _replica_users_exported(client, admin_headers)
+        assert client.get("/admin/stats", headers=admin_headers).status_code == 200
+
+
+def test_unreachable_replica_falls_back_to_the_primary(replica, admin_headers, tmp_path, monkeypatch):
+    monkeypatch.setattr(read_replica, "engine", create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"))
+    read_replica.flush()
+    assert not read_replica.stats()["usable"]
+    assert read_replica.stats()["last_error"]
+    with TestClient(app) as client:
+        assert _replica_users(client, admin_headers) == 0
+        assert not _replica_users_exported(client, admin_headers)
+
+
+def test_lagging_replica_falls_back_to_the_primary(replica, admin_headers, monkeypatch):
+    # SQLite replicas report no lag, so any negative tolerance is exceeded.
+    monkeypatch.setattr(read_replica, "max_lag", -1.0)
+    read_replica.flush()
+    assert not read_replica.stats()["usable"]
+    assert "behind" in read_replica.stats()["last_error"]
+    with read_replica.session() as db:
+        assert not on_replica(db)
+    with TestClient(app) as client:
+        assert _replica_users(client, admin_headers) == 0
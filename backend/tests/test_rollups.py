@@ -0,0 +1,135 @@
+"""Daily rollups: whole days read from the rollups plus the raw edges of a
+window add up to the raw counts, and history changes to rolled-up days mark
+them dirty until the job rebuilds them."""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+
+from app.auth import create_token
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models import QuizResult, RollupDirtyDay, SearchHistory, User
+from app.utils.admin_stats import StatsFilter, quiz_stats, search_breakdown
+from app.utils.rollups import rollup_job
+
+TODAY = datetime.utcnow().date()
+
+
+def _at(days_ago: int, hour: int) -> datetime:
+    return datetime.combine(TODAY - timedelta(days=days_ago), datetime.min.time()) + timedelta(hours=hour)
+
+
+@pytest.fixture(scope="module")
+def users():
+    """A student and a teacher with searches and quizzes over the last two weeks, rolled up."""
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        ids = []
+        for name, role in (("rollup_student", "student"), ("rollup_teacher", "teacher")):
+            user = User(username=name, role=role, password_hash="x")
+            db.add(user)
+            db.flush()
+            ids.append(user.id)
+        for index in range(60):
+            db.add(SearchHistory(
+                user_id=ids[index % 2], query="photosynthesis", result="", created_at=_at(index % 14, index % 24),
+                search_level=("easy", "medium", "hard")[index % 3], search_language=("en", "te", "hi", "english")[index % 4],
+                search_source="text", video_watched=index % 5 == 0,
+            ))
+            db.add(QuizResult(user_id=ids[index % 2], score=index % 10, total_questions=10, difficulty="easy",
+                              time_taken=10 + index, created_at=_at(index % 14, (index * 7) % 24)))
+        db.commit()
+    rollup_job.backfill()
+    headers = [{"Authorization": f"Bearer {create_token(name, user_id=user_id)}"}
+               for name, user_id in zip(("rollup_student", "rollup_teacher"), ids)]
+    return ids, headers
+
+
+FILTERS = [
+    StatsFilter(),
+    StatsFilter(start_dt=_at(9, 13)),
+    StatsFilter(start_dt=_at(12, 0), end_dt=_at(4, 23) + timedelta(minutes=59, seconds=59)),
+    StatsFilter(end_dt=_at(6, 8)),
+    StatsFilter(roles=["student"], language_codes=["te", "telugu"]),
+]
+
+
+def _sorted(stats: dict) -> dict:
+    return {key: sorted(value, key=str) if isinstance(value, list) else value for key, value in stats.items()}
+
+
+def _from_rollups(db, flt):
+    covered = rollup_job.covered_until(db)
+    return _sorted({**search_breakdown(db, flt, covered), **quiz_stats(db, flt, covered)})
+
+
+def _raw(db, flt):
+    return _sorted({**search_breakdown(db, flt), **quiz_stats(db, flt)})
+
+
+def _dirty_days():
+    with SessionLocal() as db:
+        return set(db.scalars(select(RollupDirtyDay.day)))
+
+
+def test_rollups_plus_edges_equal_raw_counts(users):
+    with SessionLocal() as db:
+        assert rollup_job.covered_until(db) == TODAY
+        for flt in FILTERS:
+            assert _from_rollups(db, flt) == _raw(db, flt)
+
+
+def _old_search(db, user_id: int, days_ago: int) -> SearchHistory:
+    day = _at(days_ago, 0)
+    return db.scalar(
+        select(SearchHistory)
+        .where(SearchHistory.user_id == user_id, SearchHistory.created_at >= day, SearchHistory.created_at < day + timedelta(days=1),
+               SearchHistory.video_watched == False)
+        .limit(1)
+    )
+
+
+def test_history_changes_mark_older_days_dirty_until_rebuilt(users):
+    (student, teacher), (student_headers, teacher_headers) = users
+    with SessionLocal() as db:
+        db.execute(delete(RollupDirtyDay))
+        db.commit()
+        deleted = _old_search(db, student, 10)
+        watched = _old_search(db, student, 8)
+        teacher_days = set(db.scalars(select(SearchHistory.created_at).where(SearchHistory.user_id == teacher)))
+
+    with TestClient(app) as client:
+        assert client.delete(f"/history/{deleted.id}", headers=student_headers).status_code == 200
+        assert client.post(f"/history/{watched.id}/video", headers=student_headers).status_code == 200
+        assert client.delete("/history", headers=teacher_headers).status_code == 200
+
+    # Today is read raw and never marked.
+    expected = {created.date() for created in teacher_days if created.date() < TODAY} | {TODAY - timedelta(days=10), TODAY - timedelta(days=8)}
+    assert _dirty_days() == expected
+    with SessionLocal() as db:
+        assert _from_rollups(db, StatsFilter()) != _raw(db, StatsFilter())
+
+    rollup_job.flush()
+
+    assert _dirty_days() == set()
+    with SessionLocal() as db:
+        for flt in FILTERS:
+            assert _from_rollups(db, flt) == _raw(db, flt)
+
+
+def test_quiz_time_splits_between_rollups_and_raw_rows(users):
+    ids, _ = users
+    with SessionLocal() as db:
+        flt = StatsFilter(start_dt=_at(9, 13), end_dt=_at(2, 11), roles=["student", "teacher"])
+        covered = rollup_job.covered_until(db)
+        span = flt.rollup_span(covered)
+        expected = sum(time_taken for time_taken, in db.execute(
+            select(QuizResult.time_taken).where(QuizResult.user_id.in_(ids), QuizResult.created_at >= flt.start_dt,
+                                                QuizResult.created_at <= flt.end_dt)
+        ))
+
+        # Whole days 8..3 days ago come from the rollups; the partial days at both ends from quiz_results.
+        assert span == (TODAY - timedelta(days=8), TODAY - timedelta(days=2))
+        assert quiz_stats(db, flt, covered)["total_quiz_time"] == expected
@@ -0,0 +1,127 @@
+import json
+import random
+from collections import Counter
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.utils.sketches import HyperLogLog, SpaceSaving
+from app.utils.trends import TrendTracker
+
+
+def _stream(size: int, seed: int):
+    """Zipf-like term stream: a few heavy hitters over a long tail."""
+    rng = random.Random(seed)
+    return [f"term{int(rng.paretovariate(1.1))}" for _ in range(size)]
+
+
+def _assert_bounds(summary: SpaceSaving, truth: Counter):
+    assert summary.total == sum(truth.values())
+    for term, count in summary.counts.items():
+        error = summary.errors[term]
+        assert truth[term] <= count <= truth[term] + error
+        assert error <= summary.total / summary.capacity
+    for term, count in truth.items():
+        if count > summary.total / summary.capacity:
+            assert term in summary.counts, term
+        elif term not in summary.counts:
+            assert count <= summary.floor()
+
+
+def test_space_saving_bounds_hold_over_a_skewed_stream():
+    stream = _stream(20000, seed=1)
+    summary = SpaceSaving(capacity=50)
+    for term in stream:
+        summary.add(term)
+
+    truth = Counter(stream)
+    assert len(summary) == 50
+    _assert_bounds(summary, truth)
+    assert [term for term, _, _ in summary.top(3)] == [term for term, _ in truth.most_common(3)]
+
+
+def test_space_saving_is_exact_below_capacity():
+    summary = SpaceSaving(capacity=10)
+    for term, count in (("cell", 3), ("atom", 5), ("gravity", 1)):
+        summary.add(term, count)
+
+    assert summary.top(2) == [("atom", 5, 0), ("cell", 3, 0)]
+    assert summary.floor() == 0
+
+
+def test_space_saving_merges_snapshots_of_disjoint_streams():
+    streams = [_stream(8000, seed=seed) for seed in (2, 3, 4)]
+    snapshots = []
+    for stream in streams:
+        summary = SpaceSaving(capacity=40)
+        for term in stream:
+            summary.add(term)
+        snapshots.append(json.dumps(summary.to_dict()))
+
+    restored = [SpaceSaving.from_dict(json.loads(snapshot)) for snapshot in snapshots]
+    assert restored[0].to_dict() == json.loads(snapshots[0])
+    merged = SpaceSaving.merge(restored)
+
+    truth = Counter(term for stream in streams for term in stream)
+    assert merged.capacity == 40
+    assert len(merged) <= 40
+    _assert_bounds(merged, truth)
+
+
+@pytest.mark.parametrize("distinct", [50, 1000, 20000])
+def test_hyperloglog_estimate_is_within_its_error_bound(distinct):
+    sketch = HyperLogLog(precision=11)
+    for value in range(distinct):
+        sketch.add(value)
+        sketch.add(value)  # repeats are not counted again
+
+    # Three standard errors of 1.04 / sqrt(2**11).
+    assert abs(sketch.count() - distinct) <= 3 * 1.04 / 2 ** 5.5 * distinct + 1
+
+
+def test_hyperloglog_merges_snapshots_into_the_union():
+    first, second = HyperLogLog(), HyperLogLog()
+    for value in range(0, 6000):
+        first.add(f"user{value}")
+    for value in range(4000, 10000):
+        second.add(f"user{value}")
+
+    merged = HyperLogLog.from_dict(json.loads(json.dumps(first.to_dict())))
+    assert merged.registers == first.registers
+    merged.update(HyperLogLog.from_dict(second.to_dict()))
+    assert abs(merged.count() - 10000) <= 700
+
+    with pytest.raises(ValueError):
+        merged.update(HyperLogLog(precision=10))
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=20)
+
+
+def test_trackers_merge_each_others_snapshots(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'trends.db'}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    first, second = TrendTracker(session_factory), TrendTracker(session_factory)
+    first.source, second.source = "worker-1", "worker-2"
+
+    for user_id in range(30):
+        first.record_search("photosynthesis", "English", user_id=user_id, role="student")
+    for user_id in range(20, 40):
+        second.record_search("photosynthesis", "en", user_id=user_id, role="teacher")
+        second.record_search("gravity", "Telugu", user_id=user_id, role="teacher")
+    first.flush()
+    second.flush()
+
+    trending = second.trending(hours=1, language="english")
+    assert trending["searches"] == 50
+    assert trending["terms"][0] == {"word": "photosynthesis", "count": 50, "error": 0, "previous": 0}
+    assert first.trending(hours=1)["searches"] == 70
+
+    today = first.active_users(days=1)[0]
+    assert today["active_users"] == 40
+    assert today["by_role"] == {"student": 30, "teacher": 20}
+    first.stop()
+    second.stop()
+    engine.dispose()
@@ -1,6 +1,6 @@
 import React from 'react';
 import './HistoryModal.css';
-const HistoryModal = ({ history, onClose, onDeleteItem, onClearAll }) => {
+const HistoryModal = ({ history, hasMore, loadingMore, onLoadMore, onClose, onDeleteItem, onClearAll }) => {
   return (
     <div className="history-modal-overlay" onClick={onClose}>
       <div className="history-modal-content" onClick={e => e.stopPropagation()}>
@@ -30,6 +30,11 @@ const HistoryModal = ({ history, onClose, onDeleteItem, onClearAll }) => {
               </div>
             ))
           )}
+          {hasMore && (
+            <button className="load-more-btn" onClick={onLoadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          )}
         </div>
       </div>
     </div>
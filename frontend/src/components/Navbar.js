@@ -6,6 +6,9 @@ import './Navbar.css';
 export default function Navbar({ isAuthenticated, onLogout, isDarkMode, toggleTheme, t }) {
   const [showHistory, setShowHistory] = useState(false);
   const [history, setHistory] = useState([]);
+  // /history is cursor-paginated; X-Next-Cursor is absent on the last page.
+  const [historyCursor, setHistoryCursor] = useState(null);
+  const [loadingMoreHistory, setLoadingMoreHistory] = useState(false);
   const navigate = useNavigate();
   const location = useLocation();
   const currentPath = location.pathname;
@@ -34,6 +37,7 @@ export default function Navbar({ isAuthenticated, onLogout, isDarkMode, toggleTh
       try {
         const res = await api.get('/history');
         setHistory(res.data);
+        setHistoryCursor(res.headers['x-next-cursor'] || null);
       } catch (err) {
         console.error("Failed to fetch history", err);
       }
@@ -41,6 +45,20 @@ export default function Navbar({ isAuthenticated, onLogout, isDarkMode, toggleTh
     setShowHistory(!showHistory);
   };
 
+  const loadMoreHistory = async () => {
+    if (!historyCursor || loadingMoreHistory) return;
+    setLoadingMoreHistory(true);
+    try {
+      const res = await api.get('/history', { params: { cursor: historyCursor } });
+      setHistory((prev) => [...prev, ...res.data]);
+      setHistoryCursor(res.headers['x-next-cursor'] || null);
+    } catch (err) {
+      console.error("Failed to fetch more history", err);
+    } finally {
+      setLoadingMoreHistory(false);
+    }
+  };
+
   return (
     <nav className={`navbar ${isDarkMode ? 'dark-mode' : ''}`}>
       <div className="nav-container">
@@ -115,6 +133,9 @@ export default function Navbar({ isAuthenticated, onLogout, isDarkMode, toggleTh
       {showHistory && (
         <HistoryModal
           history={history}
+          hasMore={Boolean(historyCursor)}
+          loadingMore={loadingMoreHistory}
+          onLoadMore={loadMoreHistory}
           onClose={() => setShowHistory(false)}
           onDeleteItem={async (id) => {
             try {
@@ -128,6 +149,7 @@ export default function Navbar({ isAuthenticated, onLogout, isDarkMode, toggleTh
             try {
               await api.delete(`/history`);
               setHistory([]);
+              setHistoryCursor(null);
             } catch (err) {
               console.error("Failed to clear history", err);
             }
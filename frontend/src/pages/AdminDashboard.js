@@ -1,4 +1,4 @@
-import React, { useEffect, useState, useMemo } from 'react';
+import React, { useEffect, useState, useMemo, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { api } from '../services/api';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, PieChart, Pie, Cell, Legend } from 'recharts';
@@ -11,6 +11,10 @@ import { translations } from '../utils/translations';
 import './Admin.css';
 import '../components/HistoryModal.css';
 
+// /admin/users is loaded a page at a time; search and sort run on the server.
+const USERS_PAGE_SIZE = 50;
+const USER_SORTS_BY_MODE = { all: 'id', reviews: 'id', quiz: '-quiz_score', top10: '-quiz_score' };
+
 export default function AdminDashboard({ isDarkMode, toggleTheme, t, language }) {
     const [adminLanguage, setAdminLanguage] = useState(() => {
         return localStorage.getItem('adminLanguage') || 'en';
@@ -22,6 +26,13 @@ export default function AdminDashboard({ isDarkMode, toggleTheme, t, language })
     const [showExportModal, setShowExportModal] = useState(false);
     const [users, setUsers] = useState([]);
     const [loadingUsers, setLoadingUsers] = useState(false);
+    const [loadingMoreUsers, setLoadingMoreUsers] = useState(false);
+    const [usersTotal, setUsersTotal] = useState(0);
+    const [usersNextPage, setUsersNextPage] = useState(null);
+    const [userSort, setUserSort] = useState('id');
+    const [topTimeUsers, setTopTimeUsers] = useState([]);
+    const usersRequest = useRef(0);
+    const userSearchTimer = useRef(null);
     const [viewMode, setViewMode] = useState('all');
 
     const [timeframe, setTimeframe] = useState('all');
@@ -99,9 +110,11 @@ export default function AdminDashboard({ isDarkMode, toggleTheme, t, language })
 
     useEffect(() => {
         fetchStats();
-        fetchUsers('all', false);
+        fetchTopTimeUsers();
     }, [navigate, timeframe]);
 
+    useEffect(() => () => clearTimeout(userSearchTimer.current), []);
+
     const applyFilters = () => {
         setRolesDropdownOpen(false);
         setLangsDropdownOpen(false);
@@ -333,31 +346,78 @@ export default function AdminDashboard({ isDarkMode, toggleTheme, t, language })
         XLSX.writeFile(wb, filename);
     };
 
-    const fetchUsers = async (mode = 'all', showModal = true, forceRefresh = false) => {
-        if (users.length > 0 && !forceRefresh) {
-            setViewMode(mode);
-            setSearchQuery('');
-            if (showModal) setShowUsersModal(true);
-            return;
+    const requestUsers = (params) => api.get('/admin/users', {
+        headers: { Authorization: `Bearer ${localStorage.getItem('adminToken')}` },
+        params
+    });
+
+    const fetchTopTimeUsers = async () => {
+        try {
+            const res = await requestUsers({ page: 1, page_size: 5, sort: '-time_spent' });
+            setTopTimeUsers(res.data);
+        } catch (err) {
+            console.error("Failed to fetch most active users", err);
         }
-        setLoadingUsers(true);
+    };
+
+    // Page 1 replaces the list, later pages append. A response to an older
+    // request (e.g. an earlier keystroke of the search) is dropped.
+    const loadUsers = async (page, search, sort) => {
+        const requestId = ++usersRequest.current;
+        const res = await requestUsers({ page, page_size: USERS_PAGE_SIZE, sort, ...(search ? { search } : {}) });
+        if (requestId !== usersRequest.current) return;
+        setUsers(prev => (page === 1 ? res.data : [...prev, ...res.data]));
+        setUsersTotal(Number(res.headers['x-total-count']) || 0);
+        setUsersNextPage(res.headers['x-next-page'] ? Number(res.headers['x-next-page']) : null);
+    };
+
+    const fetchUsers = async (mode = 'all') => {
+        const sort = USER_SORTS_BY_MODE[mode] || 'id';
+        clearTimeout(userSearchTimer.current);
         setViewMode(mode);
         setSearchQuery('');
+        setUserSort(sort);
+        setUsers([]);
+        setLoadingUsers(true);
+        setShowUsersModal(true);
         try {
-            const token = localStorage.getItem('adminToken');
-            const res = await api.get('/admin/users', {
-                headers: { Authorization: `Bearer ${token}` }
-            });
-            setUsers(res.data);
-            if (showModal) setShowUsersModal(true);
+            await loadUsers(1, '', sort);
         } catch (err) {
             console.error("Failed to fetch users", err);
             alert("Failed to load user details.");
+            setShowUsersModal(false);
         } finally {
             setLoadingUsers(false);
         }
     };
 
+    const refreshUsers = (search, sort) => {
+        loadUsers(1, search.trim(), sort).catch(err => console.error("Failed to fetch users", err));
+    };
+
+    const handleUserSearch = (value) => {
+        setSearchQuery(value);
+        clearTimeout(userSearchTimer.current);
+        userSearchTimer.current = setTimeout(() => refreshUsers(value, userSort), 300);
+    };
+
+    const handleUserSort = (sort) => {
+        clearTimeout(userSearchTimer.current);
+        setUserSort(sort);
+        refreshUsers(searchQuery, sort);
+    };
+
+    const loadMoreUsers = async () => {
+        setLoadingMoreUsers(true);
+        try {
+            await loadUsers(usersNextPage, searchQuery.trim(), userSort);
+        } catch (err) {
+            console.error("Failed to fetch users", err);
+        } finally {
+            setLoadingMoreUsers(false);
+        }
+    };
+
     const handleLogout = () => {
         localStorage.removeItem('adminToken');
         navigate('/');
@@ -379,15 +439,8 @@ export default function AdminDashboard({ isDarkMode, toggleTheme, t, language })
             });
         }
 
-        if (!searchQuery) return list;
-
-        const query = searchQuery.toLowerCase();
-        return list.filter(u =>
-            (u.username || '').toLowerCase().includes(query) ||
-            (u.email || '').toLowerCase().includes(query) ||
-            (u.role || '').toLowerCase().includes(query)
-        );
-    }, [users, viewMode, searchQuery, stats]);
+        return list;
+    }, [users, viewMode, stats]);
 
     if (error) {
         return (
@@ -693,7 +746,7 @@ export default function AdminDashboard({ isDarkMode, toggleTheme, t, language })
                             <div className="leaderboard-list-container" style={{ textAlign: 'center', marginTop: '1.5rem' }}>
                                 <button
                                     className="admin-btn-primary"
-                                    onClick={() => fetchUsers('top10', true, true)}
+                                    onClick={() => fetchUsers('top10')}
                                     style={{ width: 'auto', padding: '0.75rem 2rem', borderRadius: '50px' }}
                                 >
                                     {text.viewTop10 || 'View Top 10 Quiz Players'}
@@ -935,10 +988,10 @@ export default function AdminDashboard({ isDarkMode, toggleTheme, t, language })
                                 <div className="chart-card animate-slide-up delay-100">
                                     <h2 className="section-title">{text.timeSpentPerUser || 'Time Spent Per User (Top 5 Active)'}</h2>
                                     <div style={{ height: '340px', width: '100%' }}>
-                                        {users && users.filter(u => u.time_spent > 0).length > 0 ? (
+                                        {topTimeUsers.filter(u => u.time_spent > 0).length > 0 ? (
                                             <ResponsiveContainer width="100%" height="100%">
                                                 <BarChart
-                                                    data={[...users].sort((a, b) => (b.time_spent || 0) - (a.time_spent || 0)).slice(0, 5).map(u => ({ ...u, time_spent_mins: Math.floor((u.time_spent || 0) / 60) }))}
+                                                    data={topTimeUsers.map(u => ({ ...u, time_spent_mins: Math.floor((u.time_spent || 0) / 60) }))}
                                                     margin={{ top: 20, right: 30, left: 20, bottom: isMobile ? 40 : 60 }}
                                                 >
                                                     <CartesianGrid strokeDasharray="3 3" vertical={false} stroke="#f0f0f0" />
@@ -1103,13 +1156,28 @@ export default function AdminDashboard({ isDarkMode, toggleTheme, t, language })
                                     <div className="loading-text">{text.loadingUserData || 'Loading user data...'}</div>
                                 ) : (
                                     <div className="table-container">
-                                        <div style={{ marginBottom: '1rem' }}>
+                                        <div style={{ marginBottom: '1rem', display: 'flex', gap: '0.75rem', flexDirection: isMobile ? 'column' : 'row' }}>
                                             <input
                                                 type="text"
-                                                placeholder={text.searchUserPlaceholder || "Search by username, email, or role..."}
+                                                placeholder={text.searchUserPlaceholder || "Search by username, email, or name..."}
                                                 value={searchQuery}
-                                                onChange={(e) => setSearchQuery(e.target.value)}
-                                                style={{ width: '100%', padding: '0.75rem', borderRadius: '8px', border: '1px solid #cbd5e1', backgroundColor: 'var(--admin-card)', color: 'var(--admin-text)' }}
+                                                onChange={(e) => handleUserSearch(e.target.value)}
+                                                style={{ flex: 1, padding: '0.75rem', borderRadius: '8px', border: '1px solid #cbd5e1', backgroundColor: 'var(--admin-card)', color: 'var(--admin-text)' }}
+                                            />
+                                            <CustomSelect
+                                                name="userSort"
+                                                className="filter-input-custom"
+                                                value={userSort}
+                                                onChange={(e) => handleUserSort(e.target.value)}
+                                                options={[
+                                                    { value: 'id', label: text.sortOldestFirst || 'Oldest first' },
+                                                    { value: '-created_at', label: text.sortNewestFirst || 'Newest first' },
+                                                    { value: 'username', label: text.username || 'Username' },
+                                                    { value: '-time_spent', label: text.timeSpent || 'Time Spent' },
+                                                    { value: '-quiz_score', label: text.averageScore || 'Average Score (Participation)' },
+                                                    { value: '-quiz_time_spent', label: text.quizTimeSpent || 'Quiz Time' },
+                                                    { value: '-videos_watched', label: text.videosWatched || 'Videos Watched' },
+                                                ]}
                                             />
                                         </div>
                                         <table className="admin-table">
@@ -1179,6 +1247,21 @@ export default function AdminDashboard({ isDarkMode, toggleTheme, t, language })
                                                 ))}
                                             </tbody>
                                         </table>
+                                        <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginTop: '1rem', gap: '1rem' }}>
+                                            <span className="text-secondary">
+                                                {`${text.showingUsers || 'Showing'} ${users.length} / ${usersTotal}`}
+                                            </span>
+                                            {usersNextPage && (
+                                                <button
+                                                    className="admin-btn-primary"
+                                                    onClick={loadMoreUsers}
+                                                    disabled={loadingMoreUsers}
+                                                    style={{ width: 'auto', padding: '0.5rem 1.5rem', borderRadius: '50px' }}
+                                                >
+                                                    {loadingMoreUsers ? (text.loadingMoreUsers || 'Loading...') : (text.loadMoreUsers || 'Load more')}
+                                                </button>
+                                            )}
+                                        </div>
                                     </div>
                                 )}
                             </div>
@@ -132,7 +132,13 @@ export const translations = {
         registeredUsersDetails: "Registered Users Details",
         top10Quizzers: "Top 10 Quizzers",
         loadingUserData: "Loading user data...",
-        searchUserPlaceholder: "Search by username, email, or role...",
+        searchUserPlaceholder: "Search by username, email, or name...",
+        sortOldestFirst: "Oldest first",
+        sortNewestFirst: "Newest first",
+        quizTimeSpent: "Quiz Time",
+        showingUsers: "Showing",
+        loadMoreUsers: "Load more",
+        loadingMoreUsers: "Loading...",
         timeSpent: "Time Spent",
         videosWatched: "Videos Watched",
         averageScore: "Average Score (Participation)",
@@ -353,7 +359,13 @@ export const translations = {
         registeredUsersDetails: "నమోదిత వినియోగదారుల వివరాలు",
         top10Quizzers: "టాప్ 10 క్విజర్స్",
         loadingUserData: "వినియోగదారు డేటాను లోడ్ చేస్తోంది...",
-        searchUserPlaceholder: "యూజర్ పేరు, ఈమెయిల్ లేదా పాత్ర ద్వారా వెతకండి...",
+        searchUserPlaceholder: "యూజర్ పేరు, ఈమెయిల్ లేదా పేరు ద్వారా వెతకండి...",
+        sortOldestFirst: "పాతవి ముందుగా",
+        sortNewestFirst: "కొత్తవి ముందుగా",
+        quizTimeSpent: "క్విజ్ సమయం",
+        showingUsers: "చూపిస్తోంది",
+        loadMoreUsers: "మరిన్ని లోడ్ చేయండి",
+        loadingMoreUsers: "లోడ్ అవుతోంది...",
         timeSpent: "గడిపిన సమయం",
         videosWatched: "చూసిన వీడియోలు",
         averageScore: "సగటు స్కోరు (పాల్గొనడం)",
@@ -573,7 +585,13 @@ export const translations = {
         registeredUsersDetails: "पंजीकृत उपयोगकर्ता विवरण",
         top10Quizzers: "शीर्ष 10 क्विज़र्स",
         loadingUserData: "उपयोगकर्ता डेटा लोड हो रहा है...",
-        searchUserPlaceholder: "उपयोगकर्ता नाम, ईमेल या भूमिका द्वारा खोजें...",
+        searchUserPlaceholder: "उपयोगकर्ता नाम, ईमेल या नाम द्वारा खोजें...",
+        sortOldestFirst: "पुराने पहले",
+        sortNewestFirst: "नए पहले",
+        quizTimeSpent: "क्विज़ समय",
+        showingUsers: "दिखाए जा रहे",
+        loadMoreUsers: "और लोड करें",
+        loadingMoreUsers: "लोड हो रहा है...",
         timeSpent: "बिताया गया समय",
         videosWatched: "देखे गए वीडियो",
         averageScore: "औसत स्कोर (भागीदारी)",